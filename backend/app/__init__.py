@@ -44,8 +44,8 @@ def create_app():
         app,
         resources={r"/api/*": {"origins": settings.CORS_ORIGINS}},
         supports_credentials=True,
-        expose_headers=["Content-Type","Authorization", "X-CSRF-TOKEN"],
-        allow_headers=["Content-Type", "Authorization", "Idempotency-Key", "X-Razorpay-Signature", "X-CSRF-TOKEN"],
+        expose_headers=["Content-Type","Authorization", "X-CSRF-TOKEN", "ETag", "Idempotent-Replayed"],
+        allow_headers=["Content-Type", "Authorization", "Idempotency-Key", "X-Razorpay-Signature", "X-CSRF-TOKEN", "If-None-Match"],
         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
     )
     
@@ -70,6 +70,14 @@ def create_app():
     # 6. Register Blueprints
     register_blueprints(app)
 
+    # 6b. Warm in-process catalog indexes (built in background threads)
+    if settings.SEARCH_INDEX_WARMUP:
+        from app.modules.search.services import SearchService, SuggestService
+        from app.modules.catalog.facets import FacetService
+        SearchService.warm_up()
+        SuggestService.warm_up()
+        FacetService.warm_up()
+
     # 7. Health Check
     @app.route('/health')
     def health():
@@ -42,6 +42,22 @@ def register_blueprints(app: Flask):
         log.critical(f"Failed to register Admin Auth: {e}")
         raise e
 
+    try:
+        from app.modules.orders import orders_bp
+        app.register_blueprint(orders_bp, url_prefix='/api/orders')
+        log.info("Registered Enterprise Module: Orders")
+    except ImportError as e:
+        log.critical(f"Failed to register Orders: {e}")
+        raise e
+
+    try:
+        from app.modules.shipping import shipping_bp
+        app.register_blueprint(shipping_bp, url_prefix='/api/shipping')
+        log.info("Registered Enterprise Module: Shipping")
+    except ImportError as e:
+        log.critical(f"Failed to register Shipping: {e}")
+        raise e
+
     # --- 2. Register Legacy Routes ---
     # We removed the try/except block so we can SEE errors if they happen
     
@@ -1,4 +1,9 @@
 # backend/app/celery_worker.py
+import os
+
+# Workers never serve storefront search; skip building the in-process index.
+os.environ.setdefault("SEARCH_INDEX_WARMUP", "false")
+
 from app import create_app
 
 # 1. Initialize Flask App
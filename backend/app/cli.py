@@ -4,9 +4,12 @@ import sys
 import uuid
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
-from app.db import transaction, fetch_one, fetch_all, execute
-from app.config import settings
-from app.logger import get_logger
+from app.shared.database import transaction, fetch_one, fetch_all, execute
+from app.shared.config import settings
+from app.shared.logging_config import get_logger
+from app.modules.catalog.repository import ProductRepository
+from app.modules.catalog.cache import CategoryCache
+from app.modules.catalog.importer import ProductImporter, detect_format, FORMATS as IMPORT_FORMATS
 
 log = get_logger(__name__)
 ph = PasswordHasher(time_cost=2, memory_cost=102400, parallelism=8)  # Argon2id
@@ -132,6 +135,54 @@ def list_admins(args):
         active = "Yes" if a['is_active'] else "No"
         print(f"{a['id']:<5} {a['username']:<15} {a['name'] or '' :<20} {a['role']:<12} {active:<8} {a['created_at']}")
 
+def backfill_primary_images(args):
+    """
+    Populates products.primary_image_path for existing rows.
+    Runs in id-range batches so each transaction stays short. Safe to re-run.
+    """
+    bounds = fetch_one("SELECT MIN(id) AS lo, MAX(id) AS hi FROM products")
+    if not bounds or bounds['lo'] is None:
+        print("No products found.")
+        return
+
+    batch_size = max(1, args.batch_size)
+    updated = 0
+    start = bounds['lo']
+    while start <= bounds['hi']:
+        end = start + batch_size - 1
+        with transaction() as (conn, cur):
+            updated += ProductRepository.backfill_primary_images(cur, start, end)
+        start = end + 1
+
+    log.info("primary_images_backfilled", extra={"rows": updated})
+    print(f"Primary images backfilled. Rows changed: {updated}")
+
+def flush_category_cache(args):
+    """Tells every running worker to drop its cached category list (after editing categories in SQL)."""
+    CategoryCache.invalidate()
+    print("Category cache invalidation published.")
+
+def import_products(args):
+    """
+    Bulk-imports products from a CSV or JSONL file, streamed and written in
+    chunked transactions. Safe to re-run with --import-id: rows already in go
+    in as "already imported" errors instead of duplicates.
+    """
+    fmt = args.format or detect_format(args.file)
+    if not fmt:
+        print("Error: cannot tell the format from the file name; pass --format csv|jsonl")
+        return
+
+    importer = ProductImporter(chunk_size=args.chunk_size, dry_run=args.dry_run, import_id=args.import_id)
+    with open(args.file, "rb") as f:
+        report = importer.run(f, fmt)
+
+    print(f"Import {report['import_id']}: {report['rows']} rows, {report['imported']} imported, {report['failed']} failed.")
+    for error in report["errors"]:
+        print(f"  row {error['row']}: {error['error']}")
+    if report["errors_truncated"]:
+        print(f"  ... only the first {len(report['errors'])} errors shown")
+
 # === Argparse Setup ===
 
 parser = argparse.ArgumentParser(description="Admin CLI Tool")
@@ -162,6 +213,24 @@ p_clear.set_defaults(func=clear_sessions)
 p_list = subparsers.add_parser('list-admins', help='List all admins')
 p_list.set_defaults(func=list_admins)
 
+# backfill-primary-images
+p_backfill = subparsers.add_parser('backfill-primary-images', help='Populate products.primary_image_path')
+p_backfill.add_argument('--batch-size', type=int, default=1000)
+p_backfill.set_defaults(func=backfill_primary_images)
+
+# flush-category-cache
+p_flush_cat = subparsers.add_parser('flush-category-cache', help='Invalidate cached categories in all workers')
+p_flush_cat.set_defaults(func=flush_category_cache)
+
+# import-products
+p_import = subparsers.add_parser('import-products', help='Bulk import products from CSV or JSONL')
+p_import.add_argument('--file', required=True)
+p_import.add_argument('--format', choices=IMPORT_FORMATS)
+p_import.add_argument('--chunk-size', type=int, default=settings.IMPORT_CHUNK_SIZE)
+p_import.add_argument('--import-id', help='Reuse to resume a partial import of a file without refs')
+p_import.add_argument('--dry-run', action='store_true', help='Validate only')
+p_import.set_defaults(func=import_products)
+
 # === Main ===
 
 def main():
@@ -0,0 +1,26 @@
+from celery import shared_task
+from app.modules.cart.store import CartStore
+import logging
+
+log = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def flush_dirty_carts(self, max_batches: int = 20):
+    """
+    Write-behind for CartStore: persists carts changed in Redis to the cart table,
+    a batch of users per transaction.
+    """
+    flushed = 0
+    try:
+        for _ in range(max_batches):
+            count = CartStore.flush_dirty()
+            flushed += count
+            if not count:
+                break
+        if flushed:
+            log.info(f"Cart flush: persisted {flushed} carts.")
+        return flushed
+    except Exception as e:
+        log.error(f"Cart flush failed: flush_dirty_carts - {str(e)}")
+        raise self.retry(exc=e, countdown=10)
@@ -0,0 +1,32 @@
+import os
+from celery import shared_task
+from app.shared.config import settings
+from app.modules.catalog.importer import ProductImporter
+import logging
+
+log = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, acks_late=True)
+def import_products_file(self, path: str, fmt: str, admin_id=None, dry_run: bool = False):
+    """
+    Imports a CSV/JSONL file saved by the admin import endpoint. The report
+    (counts and per-row errors) is the task result, polled through
+    GET /api/admin/products/import/<task_id>. Not retried; the file is
+    removed when the task ends either way.
+    """
+    try:
+        with open(path, "rb") as f:
+            report = ProductImporter(
+                chunk_size=settings.IMPORT_CHUNK_SIZE, dry_run=dry_run, import_id=self.request.id[:12]
+            ).run(f, fmt)
+        log.info(f"Product import {self.request.id} by admin {admin_id}: {report['imported']} imported, {report['failed']} failed.")
+        return report
+    except Exception as e:
+        log.error(f"Product import failed: import_products_file - {str(e)}")
+        raise
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,39 @@
+from celery import shared_task
+from datetime import datetime, timezone
+from app.shared.database import transaction
+from app.modules.inventory.reservations import StockReservations
+import logging
+
+log = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def reconcile_stock_holds(self):
+    """
+    Releases lapsed cart holds back to availability, then mirrors the live
+    holds from Redis into stock_reservations (replaced wholesale, one transaction).
+    """
+    try:
+        released = StockReservations.release_expired()
+
+        mirrored = 0
+        with transaction() as (conn, cursor):
+            cursor.execute("DELETE FROM stock_reservations")
+            for batch in StockReservations.active_holds():
+                cursor.executemany(
+                    """
+                    INSERT INTO stock_reservations (user_id, product_id, variant_id, size, quantity, expires_at)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    [
+                        (user_id, product_id, variant_id, size, qty, datetime.fromtimestamp(deadline, timezone.utc).replace(tzinfo=None))
+                        for user_id, (product_id, variant_id, size), qty, deadline in batch
+                    ],
+                )
+                mirrored += len(batch)
+
+        log.info(f"Stock holds: released {released} expired, mirrored {mirrored} active.")
+        return {"released": released, "active": mirrored}
+    except Exception as e:
+        log.error(f"Reconcile Failed: reconcile_stock_holds - {str(e)}")
+        raise self.retry(exc=e, countdown=60)
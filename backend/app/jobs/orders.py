@@ -0,0 +1,69 @@
+from celery import shared_task
+from app.shared.database import get_cursor
+from app.modules.orders.gateway import GatewayError, get_gateway
+from app.modules.orders.repository import OrderRepository
+from app.modules.orders.services import OrderService
+from app.shared.config import settings
+import logging
+
+log = logging.getLogger(__name__)
+
+GATEWAY_TIMEOUT_SEC = 10  # off the request thread, so the gateway gets a normal budget
+
+
+@shared_task(bind=True, max_retries=5, acks_late=True)
+def create_gateway_order(self, order_id: int):
+    """
+    Creates the Razorpay order for an order whose checkout request gave up on
+    the gateway. Retries with exponential backoff; once retries run out the
+    order is marked payment_failed so the client stops polling.
+    """
+    with get_cursor() as cursor:
+        order = OrderRepository.get(cursor, order_id)
+    if not order or order["gateway_order_id"] or order["status"] != "pending_payment":
+        return None
+
+    try:
+        gateway = get_gateway()
+        if gateway is None:
+            raise GatewayError("Razorpay keys are not configured")
+        gateway_order = gateway.create_order(
+            int(round(float(order["total"]) * 100)),
+            receipt=f"order_{order_id}",
+            notes={"order_id": order_id, "user_id": order["user_id"]},
+            timeout=GATEWAY_TIMEOUT_SEC,
+        )
+    except GatewayError as e:
+        if self.request.retries >= self.max_retries:
+            with get_cursor(commit=True) as cursor:
+                OrderRepository.set_status(cursor, order_id, "payment_failed", ["pending_payment"])
+            log.error(f"Gateway order failed for order {order_id}, giving up: {str(e)}")
+            return None
+        log.warning(f"Gateway order failed for order {order_id}, retrying: {str(e)}")
+        raise self.retry(exc=e, countdown=2 ** self.request.retries * 5)
+
+    with get_cursor(commit=True) as cursor:
+        OrderRepository.set_gateway_order(cursor, order_id, gateway_order["id"])
+    log.info(f"Gateway order {gateway_order['id']} created for order {order_id}.")
+    return gateway_order["id"]
+
+
+@shared_task(bind=True, max_retries=3)
+def expire_unpaid_orders(self, max_batches: int = 20):
+    """
+    Cancels razorpay orders left unpaid (abandoned checkout, failed payment)
+    for ORDER_PAYMENT_TTL_SEC and returns their units to stock.
+    """
+    cancelled = 0
+    try:
+        for _ in range(max_batches):
+            count = OrderService.expire_unpaid(settings.ORDER_PAYMENT_TTL_SEC)
+            cancelled += count
+            if not count:
+                break
+        if cancelled:
+            log.info(f"Order expiry: cancelled {cancelled} unpaid orders.")
+        return cancelled
+    except Exception as e:
+        log.error(f"Order expiry failed: expire_unpaid_orders - {str(e)}")
+        raise self.retry(exc=e, countdown=60)
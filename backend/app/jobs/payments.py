@@ -0,0 +1,27 @@
+from celery import shared_task
+from app.modules.orders.webhooks import PaymentEvents
+import logging
+
+log = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def process_payment_events(self, batch_size: int = 500, max_batches: int = 20):
+    """
+    Drains the Razorpay webhook stream a batch at a time: one transaction and
+    one UPDATE per order transition per batch, however bursty the webhooks.
+    """
+    consumer = PaymentEvents.consumer_name()
+    processed = 0
+    try:
+        for _ in range(max_batches):
+            count = PaymentEvents.process_batch(consumer, batch_size)
+            processed += count
+            if count < batch_size:
+                break
+        if processed:
+            log.info(f"Payment events: processed {processed}.")
+        return processed
+    except Exception as e:
+        log.error(f"Payment events failed: process_payment_events - {str(e)}")
+        raise self.retry(exc=e, countdown=5)
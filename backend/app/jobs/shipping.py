@@ -0,0 +1,65 @@
+from celery import shared_task
+from app.shared.database import get_cursor
+from app.shared.redis_client import RedisClient
+from app.modules.shipping.client import DelhiveryClient
+from app.modules.shipping.repository import ShippingRepository
+from app.modules.shipping.services import ShippingService
+import logging
+
+log = logging.getLogger(__name__)
+
+PREFETCH_WEIGHTS = (500, 1000, 2000)  # grams; covers most beauty orders
+PREFETCH_LOCK_KEY = "lock:prefetch-shipping-quotes"
+PREFETCH_WINDOW_SEC = 13800  # just under the 4 h beat: one dispatch per window, stale chunks dropped
+CHUNK_BUDGET_SEC = 600  # per chunk of DelhiveryClient.MAX_PINCODES pincodes
+
+
+def _claim_run() -> bool:
+    """One scheduled run per window, even with duplicate beats. Runs anyway if Redis is down."""
+    try:
+        return bool(RedisClient.get_client().set(PREFETCH_LOCK_KEY, 1, nx=True, ex=PREFETCH_WINDOW_SEC))
+    except Exception as e:
+        log.warning(f"Prefetch lock unavailable, running unlocked: {str(e)}")
+        return True
+
+
+def _release_run():
+    try:
+        RedisClient.get_client().delete(PREFETCH_LOCK_KEY)
+    except Exception:
+        pass
+
+
+@shared_task(bind=True, max_retries=3)
+def prefetch_shipping_quotes(self, pincodes=None, weights=None):
+    """
+    Refreshes cached Delhivery quotes for the given pincodes, or for every
+    pincode in saved customer addresses, before the cached entries expire.
+    The work is fanned out as one prefetch_shipping_chunk task per chunk.
+    """
+    if pincodes is None and not _claim_run():
+        log.info("Shipping quotes: prefetch already dispatched in this window, skipping.")
+        return 0
+    try:
+        if pincodes is None:
+            with get_cursor() as cursor:
+                pincodes = ShippingRepository.get_address_pincodes(cursor)
+    except Exception as e:
+        log.error(f"Prefetch Failed: prefetch_shipping_quotes - {str(e)}")
+        _release_run()  # so the retry can claim the window
+        raise self.retry(exc=e, countdown=300)
+
+    size = DelhiveryClient.MAX_PINCODES
+    chunks = [pincodes[start:start + size] for start in range(0, len(pincodes), size)]
+    for chunk in chunks:
+        prefetch_shipping_chunk.apply_async((chunk, weights), expires=PREFETCH_WINDOW_SEC)
+    log.info(f"Shipping quotes: {len(chunks)} prefetch chunks queued for {len(pincodes)} pincodes.")
+    return len(chunks)
+
+
+@shared_task(soft_time_limit=CHUNK_BUDGET_SEC + 60)
+def prefetch_shipping_chunk(pincodes, weights=None):
+    """Refreshes one chunk of pincodes within CHUNK_BUDGET_SEC. Failures are left to the next run."""
+    stored = ShippingService.prefetch(pincodes, weights or PREFETCH_WEIGHTS, budget_sec=CHUNK_BUDGET_SEC)
+    log.info(f"Shipping quotes: prefetched {stored} for {len(pincodes)} pincodes.")
+    return stored
@@ -0,0 +1,82 @@
+from typing import Dict, List
+
+from app.shared.database import get_cursor
+from .repository import CartRepository
+
+
+def unit_price(price: float, discount_percent: float) -> float:
+    return round(price * (1 - discount_percent / 100), 2)
+
+
+class CartPricing:
+    """
+    Prices a cart against the live catalog rather than the snapshot taken when
+    each line was added. Current prices come from one batched lookup (two
+    queries at most, independent of cart size); line and cart totals are then
+    computed in a single pass.
+    """
+
+    @staticmethod
+    def price(lines: List[Dict]) -> Dict:
+        """
+        Updates lines in place and returns the cart totals.
+
+        Each line gets the current price/discount_percent, final_price (per unit)
+        and line_total. Lines whose price or discount moved since they were added
+        carry price_changed plus previous_price/previous_discount_percent; lines
+        whose product or variant is gone or disabled are marked unavailable and
+        left out of the totals. The add-time values are added_price/added_discount_percent
+        once CartStore.reprice has stored a newer price on the line, else price/discount_percent.
+        """
+        keys = [(int(line["product_id"]), int(line["variant_id"]) if line.get("variant_id") else None) for line in lines]
+        current = {}
+        if lines:
+            with get_cursor() as cursor:
+                current = CartRepository.get_prices(
+                    cursor, [pid for pid, vid in keys if not vid], [vid for _, vid in keys if vid]
+                )
+
+        items = quantity = changed = 0
+        subtotal = savings = 0.0
+        for line, key in zip(lines, keys):
+            qty = int(line.get("quantity") or 0)
+            snapshot_price = float(line.get("added_price", line.get("price")) or 0)
+            snapshot_discount = float(line.get("added_discount_percent", line.get("discount_percent")) or 0)
+
+            row = current.get(key)
+            line.pop("added_price", None)
+            line.pop("added_discount_percent", None)
+            if row is None:
+                line["unavailable"] = True
+                line["price_changed"] = False
+                line["final_price"] = unit_price(snapshot_price, snapshot_discount)
+                line["line_total"] = 0.0
+                continue
+
+            price = float(row["price"] or 0)
+            discount = float(row["discount"] or 0)
+            final = unit_price(price, discount)
+
+            line["unavailable"] = False
+            line["price_changed"] = price != snapshot_price or discount != snapshot_discount
+            if line["price_changed"]:
+                line["previous_price"] = snapshot_price
+                line["previous_discount_percent"] = snapshot_discount
+                changed += 1
+            line["price"] = price
+            line["discount_percent"] = discount
+            line["final_price"] = final
+            line["line_total"] = round(final * qty, 2)
+
+            items += 1
+            quantity += qty
+            subtotal += line["line_total"]
+            savings += (price - final) * qty
+
+        return {
+            "items": items,
+            "quantity": quantity,
+            "subtotal": round(subtotal, 2),
+            "savings": round(savings, 2),
+            "price_changes": changed,
+        }
@@ -0,0 +1,199 @@
+from typing import Dict, Iterable, List
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+LINE_COLUMNS = (
+    "product_id", "variant_id", "name", "price", "discount_percent",
+    "quantity", "image", "size", "stock", "created_at",
+)
+
+
+class CartRepository:
+    """MySQL side of the cart: the durable copy behind CartStore."""
+
+    @staticmethod
+    def get_lines(cursor, user_id) -> List[Dict]:
+        cursor.execute(
+            f"SELECT {', '.join(LINE_COLUMNS)} FROM cart WHERE user_id = %s ORDER BY created_at DESC",
+            (user_id,),
+        )
+        return cursor.fetchall()
+
+    @staticmethod
+    def get_summary(cursor, user_id) -> Dict:
+        """Header-badge aggregate at live catalog prices, skipping unavailable lines (as CartPricing does)."""
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS items, COALESCE(SUM(c.quantity), 0) AS quantity,
+                COALESCE(SUM(ROUND(COALESCE(v.price, p.price)
+                    * (1 - COALESCE(v.discount, p.discount, 0) / 100), 2) * c.quantity), 0) AS subtotal
+            FROM cart c
+            LEFT JOIN products p ON c.variant_id IS NULL AND p.id = c.product_id AND p.status = 1
+            LEFT JOIN product_variants v ON v.id = c.variant_id AND v.status = 1
+            WHERE c.user_id = %s AND (p.id IS NOT NULL OR v.id IS NOT NULL)
+            """,
+            (user_id,),
+        )
+        row = cursor.fetchone()
+        return {"items": int(row["items"]), "quantity": int(row["quantity"]), "subtotal": float(row["subtotal"])}
+
+    @staticmethod
+    def replace_carts(cursor, carts: Dict[str, Iterable[Dict]]):
+        """
+        Overwrites the cart rows of every user in carts with the given lines.
+        Two statements regardless of how many users or lines are involved.
+        """
+        user_ids = list(carts)
+        if not user_ids:
+            return
+        cursor.execute(f"DELETE FROM cart WHERE user_id IN ({_placeholders(user_ids)})", tuple(user_ids))
+
+        rows = [
+            (user_id, *(line.get(col) for col in LINE_COLUMNS))
+            for user_id, lines in carts.items()
+            for line in lines
+        ]
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO cart (user_id, {', '.join(LINE_COLUMNS)}) VALUES ({_placeholders(rows[0])})",
+                rows,
+            )
+
+    # --- Line-level writes (used directly only when Redis is unavailable) ---
+
+    @staticmethod
+    def upsert_lines(cursor, user_id, lines: List[Dict], increment: bool = False):
+        """
+        Inserts lines, or updates them in place when the (user, product, variant, size)
+        line already exists (uq_cart_line). increment adds to the existing quantity
+        instead of replacing the line. One statement for any number of lines.
+        """
+        if not lines:
+            return
+        if increment:
+            on_duplicate = "quantity = quantity + VALUES(quantity), stock = VALUES(stock)"
+        else:
+            on_duplicate = ", ".join(f"{col} = VALUES({col})" for col in LINE_COLUMNS if col not in ("product_id", "variant_id", "size"))
+        cursor.executemany(
+            f"""
+            INSERT INTO cart (user_id, {', '.join(LINE_COLUMNS)}) VALUES ({_placeholders(LINE_COLUMNS)}, %s)
+            ON DUPLICATE KEY UPDATE {on_duplicate}
+            """,
+            [(user_id, *(line.get(col) for col in LINE_COLUMNS)) for line in lines],
+        )
+
+    @staticmethod
+    def update_quantity(cursor, user_id, product_id, variant_id, size, quantity: int) -> int:
+        cursor.execute(
+            """
+            UPDATE cart SET quantity = %s
+            WHERE user_id = %s AND product_id = %s AND variant_id <=> %s AND size <=> %s
+            """,
+            (quantity, user_id, product_id, variant_id, size),
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def delete_line(cursor, user_id, product_id, variant_id, size) -> int:
+        cursor.execute(
+            """
+            DELETE FROM cart
+            WHERE user_id = %s AND product_id = %s AND variant_id <=> %s AND size <=> %s
+            """,
+            (user_id, product_id, variant_id, size),
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def delete_cart(cursor, user_id) -> int:
+        cursor.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
+        return cursor.rowcount
+
+    @staticmethod
+    def apply_lines(cursor, user_id, puts: List[Dict], quantities: List[tuple], removes: List[tuple]):
+        """
+        Applies a batch of line changes with one executemany per kind.
+        puts: full lines (replaced), quantities: (product_id, variant_id, size, qty),
+        removes: (product_id, variant_id, size).
+        """
+        if removes:
+            cursor.executemany(
+                "DELETE FROM cart WHERE user_id = %s AND product_id = %s AND variant_id <=> %s AND size <=> %s",
+                [(user_id, *target) for target in removes],
+            )
+        if quantities:
+            cursor.executemany(
+                """
+                UPDATE cart SET quantity = %s
+                WHERE user_id = %s AND product_id = %s AND variant_id <=> %s AND size <=> %s
+                """,
+                [(qty, user_id, pid, vid, size) for pid, vid, size, qty in quantities],
+            )
+        CartRepository.upsert_lines(cursor, user_id, puts)
+
+    @staticmethod
+    def get_line_details(cursor, product_ids: Iterable[int], variant_ids: Iterable[int]) -> Dict[tuple, Dict]:
+        """
+        Name, price, discount and image for new cart lines, keyed by
+        (product_id, None) or (product_id, variant_id). One query per kind.
+        """
+        details = {}
+        product_ids = list(dict.fromkeys(product_ids))
+        variant_ids = list(dict.fromkeys(variant_ids))
+        if product_ids:
+            cursor.execute(
+                f"""
+                SELECT p.id AS product_id, p.name, p.price, p.discount AS discount_percent,
+                    p.primary_image_path AS image
+                FROM products p
+                WHERE p.id IN ({_placeholders(product_ids)})
+                """,
+                tuple(product_ids),
+            )
+            for row in cursor.fetchall():
+                details[(row["product_id"], None)] = row
+        if variant_ids:
+            cursor.execute(
+                f"""
+                SELECT v.product_id, v.id AS variant_id, v.name, v.price, v.discount AS discount_percent,
+                    COALESCE((SELECT vi.image_path FROM variant_images vi WHERE vi.variant_id = v.id ORDER BY vi.id LIMIT 1),
+                             v.image_path) AS image
+                FROM product_variants v
+                WHERE v.id IN ({_placeholders(variant_ids)})
+                """,
+                tuple(variant_ids),
+            )
+            for row in cursor.fetchall():
+                details[(row["product_id"], row["variant_id"])] = row
+        return details
+
+    @staticmethod
+    def get_prices(cursor, product_ids: Iterable[int], variant_ids: Iterable[int]) -> Dict[tuple, Dict]:
+        """
+        Current price and discount keyed like get_line_details, for active
+        products/variants only. One query per kind, whatever the cart size.
+        """
+        prices = {}
+        product_ids = list(dict.fromkeys(product_ids))
+        variant_ids = list(dict.fromkeys(variant_ids))
+        if product_ids:
+            cursor.execute(
+                f"SELECT id, price, discount FROM products WHERE id IN ({_placeholders(product_ids)}) AND status = 1",
+                tuple(product_ids),
+            )
+            for row in cursor.fetchall():
+                prices[(row["id"], None)] = row
+        if variant_ids:
+            cursor.execute(
+                f"""
+                SELECT product_id, id, price, discount FROM product_variants
+                WHERE id IN ({_placeholders(variant_ids)}) AND status = 1
+                """,
+                tuple(variant_ids),
+            )
+            for row in cursor.fetchall():
+                prices[(row["product_id"], row["id"])] = row
+        return prices
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional
+
+
+class CartOperationSchema(BaseModel):
+    op: str = Field(..., description="add | update | remove")
+    product_id: int
+    variant_id: Optional[int] = None
+    size: Optional[str] = Field(None, max_length=50)
+    quantity: int = Field(1, ge=1, le=100)
+
+    @validator('op')
+    def validate_op(cls, v):
+        v = (v or "").lower()
+        if v not in ('add', 'update', 'remove'):
+            raise ValueError("op must be 'add', 'update' or 'remove'")
+        return v
+
+
+class CartBatchSchema(BaseModel):
+    operations: List[CartOperationSchema] = Field(..., min_items=1, max_items=100)
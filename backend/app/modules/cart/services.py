@@ -0,0 +1,91 @@
+from typing import Dict, List, Tuple
+
+from app.shared.database import get_cursor
+from app.shared.exceptions import ValidationError, NotFoundError
+from app.modules.inventory.cache import StockCache, make_sku, sku_id
+from app.modules.inventory.reservations import StockReservations
+from .pricing import CartPricing
+from .repository import CartRepository
+from .schema import CartBatchSchema
+from .store import CartStore
+
+
+class CartService:
+
+    @staticmethod
+    def get_priced_lines(user_id) -> Tuple[List[Dict], Dict]:
+        """
+        The cart priced against the live catalog (CartPricing), with its totals.
+        Lines whose stored price, discount or availability moved are written
+        back, so the cart:summary badge agrees with these totals.
+        """
+        lines = CartStore.get_lines(user_id)
+        stored = [
+            (float(line.get("price") or 0), float(line.get("discount_percent") or 0), bool(line.get("unavailable")))
+            for line in lines
+        ]
+        totals = CartPricing.price(lines)
+        CartStore.reprice(user_id, [
+            line for line, before in zip(lines, stored)
+            if before != (float(line["price"] or 0), float(line["discount_percent"] or 0), line["unavailable"])
+        ])
+        return lines, totals
+
+    @staticmethod
+    def apply_batch(user_id, data: dict):
+        """
+        Applies a list of add/update/remove operations as one unit: product
+        details in one lookup, every stock hold in one atomic reservation, and
+        all line changes in one CartStore.apply. Nothing is applied if any
+        product is unknown, any update targets a line not in the cart, or any
+        line is short of stock.
+        """
+        try:
+            batch = CartBatchSchema(**(data or {}))
+        except Exception as e:
+            raise ValidationError(str(e))
+
+        # Last operation on a line wins
+        ops = {}
+        for op in batch.operations:
+            ops[make_sku(op.product_id, op.variant_id, op.size)] = op
+        adds = [sku for sku, op in ops.items() if op.op == 'add']
+
+        # Updates only apply to existing lines; check before any stock is held for them.
+        updates = [sku for sku, op in ops.items() if op.op == 'update']
+        if updates:
+            in_cart = {line["cart_id"] for line in CartStore.get_lines(user_id)}
+            unknown = [sku for sku in updates if sku_id(sku) not in in_cart]
+            if unknown:
+                raise NotFoundError("Item not in cart", details={"items": [sku_id(sku) for sku in unknown]})
+
+        details = {}
+        if adds:
+            with get_cursor() as cursor:
+                details = CartRepository.get_line_details(
+                    cursor, [pid for pid, vid, _ in adds if not vid], [vid for _, vid, _ in adds if vid]
+                )
+            missing = [sku for sku in adds if sku[:2] not in details]
+            if missing:
+                raise NotFoundError("Product not found", details={"items": [sku_id(sku) for sku in missing]})
+
+        short = StockReservations.reserve_many(
+            user_id, [(sku, 0 if op.op == 'remove' else op.quantity) for sku, op in ops.items()]
+        )
+        if short:
+            raise ValidationError("Not enough stock", details={"items": [sku_id(sku) for sku in short]})
+
+        levels = StockCache.get_many(adds)
+        puts = []
+        for sku in adds:
+            item = details[sku[:2]]
+            puts.append({
+                "product_id": sku[0], "variant_id": sku[1], "size": sku[2],
+                "name": item["name"], "price": float(item["price"]),
+                "discount_percent": float(item.get("discount_percent") or 0),
+                "quantity": ops[sku].quantity, "image": item.get("image") or "", "stock": levels[sku],
+            })
+        quantities = [(*sku, op.quantity) for sku, op in ops.items() if op.op == 'update']
+        removes = [sku for sku, op in ops.items() if op.op == 'remove']
+
+        CartStore.apply(user_id, puts, quantities, removes)
@@ -0,0 +1,394 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from app.shared.database import get_cursor, transaction
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+from app.modules.inventory.cache import make_sku, sku_id
+from .repository import CartRepository
+
+log = get_logger(__name__)
+
+LOADED_FIELD = "__loaded__"
+
+# Shared by every script below. Recomputes the header-badge aggregate
+# (distinct lines, total quantity, subtotal at discounted prices) from the
+# cart hash into the summary hash, so it is always consistent with the cart.
+# Lines marked unavailable by a repricing are left out, as in CartPricing.
+_SUMMARIZE = """
+local function summarize(cart, summary, ttl)
+    local items, quantity, subtotal = 0, 0, 0
+    local fields = redis.call('HGETALL', cart)
+    for i = 1, #fields, 2 do
+        if fields[i] ~= '__loaded__' then
+            local line = cjson.decode(fields[i + 1])
+            if line['unavailable'] ~= true then
+                local qty = tonumber(line['quantity']) or 0
+                local unit = (tonumber(line['price']) or 0) * (1 - (tonumber(line['discount_percent']) or 0) / 100)
+                items = items + 1
+                quantity = quantity + qty
+                subtotal = subtotal + math.floor(unit * 100 + 0.5) / 100 * qty
+            end
+        end
+    end
+    subtotal = string.format('%.2f', subtotal)
+    redis.call('HSET', summary, 'items', items, 'quantity', quantity, 'subtotal', subtotal)
+    redis.call('EXPIRE', summary, ttl)
+    return {items, quantity, subtotal}
+end
+"""
+
+# KEYS: cart, dirty, summary   ARGV: ttl, field1, line1, field2, line2, ...
+# Installs a cart read from MySQL unless another request already did (and may
+# have mutated it since).
+_LOAD = _SUMMARIZE + """
+if redis.call('HEXISTS', KEYS[1], '__loaded__') == 1 then return 0 end
+redis.call('HSET', KEYS[1], '__loaded__', '1', unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+summarize(KEYS[1], KEYS[3], ARGV[1])
+return 1
+"""
+
+# KEYS: cart, dirty, summary   ARGV: ttl
+# Returns {items, quantity, subtotal}, or -1 when the cart is not loaded yet.
+_SUMMARY = _SUMMARIZE + """
+if redis.call('HEXISTS', KEYS[1], '__loaded__') == 0 then return -1 end
+return summarize(KEYS[1], KEYS[3], ARGV[1])
+"""
+
+# KEYS: cart, dirty, summary   ARGV: user, ttl, mode, field, value
+# mode: put (value = line JSON), inc (put, or add value's quantity to an
+# existing line), qty (value = quantity), price (value = {price,
+# discount_percent, unavailable}; the first repricing keeps the add-time
+# values as added_price/added_discount_percent), del, clear.
+# Returns -1 when the cart is not loaded yet, otherwise 1 if something changed.
+_MUTATE = _SUMMARIZE + """
+if redis.call('HEXISTS', KEYS[1], '__loaded__') == 0 then return -1 end
+local mode = ARGV[3]
+local changed = 1
+if mode == 'put' then
+    redis.call('HSET', KEYS[1], ARGV[4], ARGV[5])
+elseif mode == 'inc' then
+    local raw = redis.call('HGET', KEYS[1], ARGV[4])
+    if raw then
+        local line = cjson.decode(raw)
+        line['quantity'] = line['quantity'] + cjson.decode(ARGV[5])['quantity']
+        redis.call('HSET', KEYS[1], ARGV[4], cjson.encode(line))
+    else
+        redis.call('HSET', KEYS[1], ARGV[4], ARGV[5])
+    end
+elseif mode == 'qty' then
+    local raw = redis.call('HGET', KEYS[1], ARGV[4])
+    if not raw then return 0 end
+    local line = cjson.decode(raw)
+    line['quantity'] = tonumber(ARGV[5])
+    redis.call('HSET', KEYS[1], ARGV[4], cjson.encode(line))
+elseif mode == 'price' then
+    local raw = redis.call('HGET', KEYS[1], ARGV[4])
+    if not raw then return 0 end
+    local line = cjson.decode(raw)
+    local current = cjson.decode(ARGV[5])
+    if line['added_price'] == nil then
+        line['added_price'] = line['price']
+        line['added_discount_percent'] = line['discount_percent']
+    end
+    line['price'] = current['price']
+    line['discount_percent'] = current['discount_percent']
+    line['unavailable'] = current['unavailable']
+    redis.call('HSET', KEYS[1], ARGV[4], cjson.encode(line))
+elseif mode == 'del' then
+    changed = redis.call('HDEL', KEYS[1], ARGV[4])
+elseif mode == 'clear' then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], '__loaded__', '1')
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if changed == 1 then
+    redis.call('SADD', KEYS[2], ARGV[1])
+    summarize(KEYS[1], KEYS[3], ARGV[2])
+end
+return changed
+"""
+
+
+def line_key(product_id, variant_id=None, size=None) -> str:
+    """Field name of a cart line; also returned to clients as cart_id."""
+    return sku_id(make_sku(product_id, variant_id, size))
+
+
+def _to_line(row: Dict) -> Dict:
+    """Normalizes a MySQL row (Decimals, datetimes) into the JSON-safe line shape."""
+    line = dict(row)
+    for col in ("price", "discount_percent"):
+        if isinstance(line.get(col), Decimal):
+            line[col] = float(line[col])
+    if isinstance(line.get("created_at"), datetime):
+        line["created_at"] = line["created_at"].strftime("%Y-%m-%d %H:%M:%S")
+    return line
+
+
+class CartStore:
+    """
+    Carts live in a Redis hash per user (cart:{user_id}, field = line key,
+    value = line JSON) and are written back to the cart table by the
+    flush_dirty_carts job. A cart missing from Redis is reloaded from MySQL
+    on first touch. Every mutation is a single Lua call, so request latency
+    never includes a MySQL commit.
+
+    When Redis is unavailable all operations go straight to MySQL.
+    """
+    KEY = "cart:{user_id}"
+    DIRTY_KEY = "cart:dirty"
+    SUMMARY_KEY = "cart:summary:{user_id}"
+    TTL = 7 * 86400
+
+    _scripts = None
+
+    @staticmethod
+    def _get_redis():
+        try:
+            return RedisClient.get_client()
+        except Exception:
+            return None
+
+    @classmethod
+    def _get_scripts(cls, redis):
+        if cls._scripts is None:
+            cls._scripts = (redis.register_script(_LOAD), redis.register_script(_MUTATE), redis.register_script(_SUMMARY))
+        return cls._scripts
+
+    @classmethod
+    def _keys(cls, user_id) -> List[str]:
+        return [cls.KEY.format(user_id=user_id), cls.DIRTY_KEY, cls.SUMMARY_KEY.format(user_id=user_id)]
+
+    @staticmethod
+    def _load_from_db(user_id) -> List[Dict]:
+        with get_cursor() as cursor:
+            return [_to_line(row) for row in CartRepository.get_lines(cursor, user_id)]
+
+    @classmethod
+    def _install(cls, redis, user_id) -> List[Dict]:
+        lines = cls._load_from_db(user_id)
+        args = [cls.TTL]
+        for line in lines:
+            args.extend([line_key(line["product_id"], line.get("variant_id"), line.get("size")), json.dumps(line)])
+        load, _, _ = cls._get_scripts(redis)
+        load(keys=cls._keys(user_id), args=args)
+        return lines
+
+    @classmethod
+    def _mutate(cls, redis, user_id, mode, field="", value="") -> int:
+        _, mutate, _ = cls._get_scripts(redis)
+        keys = cls._keys(user_id)
+        args = [user_id, cls.TTL, mode, field, value]
+        result = mutate(keys=keys, args=args)
+        if result == -1:
+            cls._install(redis, user_id)
+            result = mutate(keys=keys, args=args)
+        return result
+
+    # --- Reads ---
+
+    @classmethod
+    def get_lines(cls, user_id) -> List[Dict]:
+        """All lines, newest first, each with cart_id set to its line key."""
+        redis = cls._get_redis()
+        lines = None
+        if redis:
+            try:
+                raw = redis.hgetall(cls.KEY.format(user_id=user_id))
+                if LOADED_FIELD in raw:
+                    lines = [json.loads(v) for k, v in raw.items() if k != LOADED_FIELD]
+                else:
+                    lines = cls._install(redis, user_id)
+            except Exception as e:
+                log.error("Cart store read failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        if lines is None:
+            lines = cls._load_from_db(user_id)
+
+        for line in lines:
+            line["cart_id"] = line_key(line["product_id"], line.get("variant_id"), line.get("size"))
+        lines.sort(key=lambda line: line.get("created_at") or "", reverse=True)
+        return lines
+
+    @classmethod
+    def get_line(cls, user_id, product_id, variant_id=None, size=None) -> Optional[Dict]:
+        key = line_key(product_id, variant_id, size)
+        redis = cls._get_redis()
+        if redis:
+            try:
+                raw = redis.hget(cls.KEY.format(user_id=user_id), key)
+                if raw is not None:
+                    return json.loads(raw)
+                if redis.hexists(cls.KEY.format(user_id=user_id), LOADED_FIELD):
+                    return None
+            except Exception as e:
+                log.error("Cart store read failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        return next((line for line in cls.get_lines(user_id) if line["cart_id"] == key), None)
+
+    @classmethod
+    def get_summary(cls, user_id) -> Dict:
+        """{items, quantity, subtotal} for header badges: one HGETALL on the hot path."""
+        redis = cls._get_redis()
+        if redis:
+            try:
+                cached = redis.hgetall(cls.SUMMARY_KEY.format(user_id=user_id))
+                if not cached:
+                    _, _, summary = cls._get_scripts(redis)
+                    result = summary(keys=cls._keys(user_id), args=[cls.TTL])
+                    if result == -1:
+                        cls._install(redis, user_id)
+                        result = summary(keys=cls._keys(user_id), args=[cls.TTL])
+                    cached = dict(zip(("items", "quantity", "subtotal"), result))
+                return {
+                    "items": int(cached["items"]),
+                    "quantity": int(cached["quantity"]),
+                    "subtotal": float(cached["subtotal"]),
+                }
+            except Exception as e:
+                log.error("Cart summary read failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        with get_cursor() as cursor:
+            return CartRepository.get_summary(cursor, user_id)
+
+    # --- Writes ---
+
+    @classmethod
+    def add_line(cls, user_id, line: Dict, increment: bool = False):
+        """
+        Adds a line, replacing an existing one, or with increment=True adding its
+        quantity to the existing one. line carries the LINE_COLUMNS fields; created_at is set here.
+        """
+        line = dict(line, created_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        redis = cls._get_redis()
+        if redis:
+            try:
+                key = line_key(line["product_id"], line.get("variant_id"), line.get("size"))
+                cls._mutate(redis, user_id, "inc" if increment else "put", key, json.dumps(line))
+                return
+            except Exception as e:
+                log.error("Cart store write failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        with transaction() as (conn, cursor):
+            CartRepository.upsert_lines(cursor, user_id, [line], increment)
+
+    @classmethod
+    def set_quantity(cls, user_id, product_id, variant_id, size, quantity: int) -> bool:
+        redis = cls._get_redis()
+        if redis:
+            try:
+                return cls._mutate(redis, user_id, "qty", line_key(product_id, variant_id, size), quantity) == 1
+            except Exception as e:
+                log.error("Cart store write failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        with transaction() as (conn, cursor):
+            return CartRepository.update_quantity(cursor, user_id, product_id, variant_id, size, quantity) > 0
+
+    @classmethod
+    def reprice(cls, user_id, lines: List[Dict]):
+        """
+        Stores the live price, discount and availability CartPricing found
+        for lines, so the summary aggregate is computed from them too. Redis
+        only: without it, get_summary prices from the catalog directly.
+        """
+        redis = cls._get_redis()
+        if not redis or not lines:
+            return
+        try:
+            _, mutate, _ = cls._get_scripts(redis)
+            keys = cls._keys(user_id)
+            pipe = redis.pipeline(transaction=False)
+            for line in lines:
+                value = json.dumps({
+                    "price": line["price"], "discount_percent": line["discount_percent"],
+                    "unavailable": bool(line.get("unavailable")),
+                })
+                mutate(keys=keys, args=[user_id, cls.TTL, "price", line["cart_id"], value], client=pipe)
+            pipe.execute()
+        except Exception as e:
+            log.error("Cart reprice write failed", extra={"user_id": user_id, "error": str(e)})
+
+    @classmethod
+    def remove_line(cls, user_id, product_id, variant_id=None, size=None) -> bool:
+        redis = cls._get_redis()
+        if redis:
+            try:
+                return cls._mutate(redis, user_id, "del", line_key(product_id, variant_id, size)) == 1
+            except Exception as e:
+                log.error("Cart store write failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        with transaction() as (conn, cursor):
+            return CartRepository.delete_line(cursor, user_id, product_id, variant_id, size) > 0
+
+    @classmethod
+    def clear(cls, user_id):
+        redis = cls._get_redis()
+        if redis:
+            try:
+                cls._mutate(redis, user_id, "clear")
+                return
+            except Exception as e:
+                log.error("Cart store write failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        with transaction() as (conn, cursor):
+            CartRepository.delete_cart(cursor, user_id)
+
+    @classmethod
+    def apply(cls, user_id, puts: List[Dict], quantities: List[tuple], removes: List[tuple]):
+        """
+        Applies a batch of changes atomically: one MULTI/EXEC of mutation
+        scripts in Redis, or one MySQL transaction when Redis is unavailable.
+        Arguments as for CartRepository.apply_lines.
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        puts = [dict(line, created_at=now) for line in puts]
+        redis = cls._get_redis()
+        if redis:
+            try:
+                _, mutate, _ = cls._get_scripts(redis)
+                keys = cls._keys(user_id)
+                calls = (
+                    [("del", line_key(*target), "") for target in removes]
+                    + [("put", line_key(line["product_id"], line.get("variant_id"), line.get("size")), json.dumps(line))
+                       for line in puts]
+                    + [("qty", line_key(pid, vid, size), qty) for pid, vid, size, qty in quantities]
+                )
+                for attempt in range(2):
+                    pipe = redis.pipeline(transaction=True)
+                    for mode, field, value in calls:
+                        mutate(keys=keys, args=[user_id, cls.TTL, mode, field, value], client=pipe)
+                    if -1 not in pipe.execute():
+                        return
+                    cls._install(redis, user_id)
+                raise RuntimeError("cart could not be loaded into Redis")
+            except Exception as e:
+                log.error("Cart store batch write failed, using MySQL", extra={"user_id": user_id, "error": str(e)})
+        with transaction() as (conn, cursor):
+            CartRepository.apply_lines(cursor, user_id, puts, quantities, removes)
+
+    # --- Write-behind ---
+
+    @classmethod
+    def flush_dirty(cls, batch_size: int = 200) -> int:
+        """
+        Writes up to batch_size dirty carts to MySQL in one transaction.
+        Users are put back on the dirty set if the write fails.
+        """
+        redis = RedisClient.get_client()
+        user_ids = redis.spop(cls.DIRTY_KEY, batch_size) or []
+        if not user_ids:
+            return 0
+
+        pipe = redis.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hgetall(cls.KEY.format(user_id=user_id))
+        carts = {}
+        for user_id, raw in zip(user_ids, pipe.execute()):
+            if LOADED_FIELD not in raw:
+                continue  # expired from Redis; MySQL already holds the last flushed state
+            carts[user_id] = [json.loads(v) for k, v in raw.items() if k != LOADED_FIELD]
+
+        try:
+            with transaction() as (conn, cursor):
+                CartRepository.replace_carts(cursor, carts)
+        except Exception:
+            redis.sadd(cls.DIRTY_KEY, *user_ids)
+            raise
+        return len(carts)
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from flask import request
+
+from app.shared.database import get_cursor
+from app.shared.http_cache import make_etag
+from app.shared.pubsub import PubSub
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+class ProductCache:
+    """
+    Read-through cache of fully assembled product documents (PDP payloads).
+
+    Documents are keyed by product id *and* a per-product version counter.
+    Writers never delete documents; they bump the counter, which makes every
+    older document unreachable. Stale versions simply age out via DOC_TTL.
+    """
+    VERSION_KEY = "product:ver:{product_id}"
+    DOC_KEY = "product:doc:{product_id}:v{version}"
+    DOC_TTL = 3600  # 1 hour
+
+    @staticmethod
+    def _get_redis():
+        try:
+            return RedisClient.get_client()
+        except Exception:
+            return None
+
+    @staticmethod
+    def get(product_id: int) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns (cached_json, version). cached_json is None on a miss;
+        version is None when Redis is unavailable (caller should not write back).
+        """
+        redis = ProductCache._get_redis()
+        if not redis:
+            return None, None
+        try:
+            version = redis.get(ProductCache.VERSION_KEY.format(product_id=product_id)) or "0"
+            body = redis.get(ProductCache.DOC_KEY.format(product_id=product_id, version=version))
+            return body, version
+        except Exception as e:
+            log.error("Product cache read failed", extra={"product_id": product_id, "error": str(e)})
+            return None, None
+
+    @staticmethod
+    def set(product_id: int, version: str, body: str):
+        redis = ProductCache._get_redis()
+        if not redis or version is None:
+            return
+        try:
+            redis.setex(ProductCache.DOC_KEY.format(product_id=product_id, version=version), ProductCache.DOC_TTL, body)
+        except Exception as e:
+            log.error("Product cache write failed", extra={"product_id": product_id, "error": str(e)})
+
+    @staticmethod
+    def get_many(product_ids: List[int]) -> Tuple[Dict[int, str], Dict[int, Optional[str]]]:
+        """
+        Batched get() in two round trips (versions, then documents).
+        Returns ({product_id: cached_json} for hits, {product_id: version} for all ids).
+        Versions are None when Redis is unavailable.
+        """
+        redis = ProductCache._get_redis()
+        if not redis or not product_ids:
+            return {}, {pid: None for pid in product_ids}
+        try:
+            versions = redis.mget([ProductCache.VERSION_KEY.format(product_id=pid) for pid in product_ids])
+            versions = [v or "0" for v in versions]
+            bodies = redis.mget([
+                ProductCache.DOC_KEY.format(product_id=pid, version=ver) for pid, ver in zip(product_ids, versions)
+            ])
+            hits = {pid: body for pid, body in zip(product_ids, bodies) if body is not None}
+            return hits, dict(zip(product_ids, versions))
+        except Exception as e:
+            log.error("Product cache batch read failed", extra={"error": str(e)})
+            return {}, {pid: None for pid in product_ids}
+
+    @staticmethod
+    def set_many(entries: Dict[int, Tuple[Optional[str], str]]):
+        """entries: {product_id: (version, body)}. Written in one pipeline."""
+        redis = ProductCache._get_redis()
+        if not redis:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for pid, (version, body) in entries.items():
+                if version is not None:
+                    pipe.setex(ProductCache.DOC_KEY.format(product_id=pid, version=version), ProductCache.DOC_TTL, body)
+            pipe.execute()
+        except Exception as e:
+            log.error("Product cache batch write failed", extra={"error": str(e)})
+
+    @staticmethod
+    def get_version(product_id: int) -> Optional[str]:
+        redis = ProductCache._get_redis()
+        if not redis:
+            return None
+        try:
+            return redis.get(ProductCache.VERSION_KEY.format(product_id=product_id)) or "0"
+        except Exception:
+            return None
+
+    @staticmethod
+    def bump_version(product_id: int, redis_client=None) -> Optional[str]:
+        """
+        Invalidates every cached document for the product and bumps the catalog version.
+        Call after the write has been committed, otherwise a concurrent reader
+        can re-cache the old row under the new version.
+        Returns the new catalog version, None when Redis is unavailable.
+        """
+        redis = redis_client or ProductCache._get_redis()
+        if not redis:
+            return None
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.incr(ProductCache.VERSION_KEY.format(product_id=product_id))
+            pipe.incr(CatalogVersion.KEY)
+            return str(pipe.execute()[-1])
+        except Exception as e:
+            log.error("Product cache version bump failed", extra={"product_id": product_id, "error": str(e)})
+            return None
+
+    @staticmethod
+    def bump_versions(product_ids: List[int], redis_client=None) -> Optional[str]:
+        """bump_version for many products in one pipeline, with a single catalog bump."""
+        redis = redis_client or ProductCache._get_redis()
+        if not redis or not product_ids:
+            return None
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for pid in product_ids:
+                pipe.incr(ProductCache.VERSION_KEY.format(product_id=pid))
+            pipe.incr(CatalogVersion.KEY)
+            return str(pipe.execute()[-1])
+        except Exception as e:
+            log.error("Product cache version bump failed", extra={"count": len(product_ids), "error": str(e)})
+            return None
+
+
+class CatalogVersion:
+    """
+    Global counter bumped by every product write (see ProductCache.bump_version).
+    Anything derived from "the catalog as a whole" (listing ETags, search caches) keys on it.
+    """
+    KEY = "catalog:version"
+
+    @staticmethod
+    def get() -> Optional[str]:
+        """Returns the current version, or None when Redis is unavailable."""
+        try:
+            return RedisClient.get_client().get(CatalogVersion.KEY) or "0"
+        except Exception:
+            return None
+
+
+class CategoryCache:
+    """
+    Process-local copy of the categories table.
+
+    Entries live for TTL seconds. Any worker can call invalidate() to make every
+    Gunicorn worker drop its copy immediately via Redis pub/sub; the TTL bounds
+    staleness if a notification is lost.
+    """
+    TTL = 300  # 5 minutes
+    CHANNEL = "catalog:categories:invalidate"
+
+    _rows: Optional[List[Dict]] = None
+    _etag: Optional[str] = None
+    _expires_at = 0.0
+    _generation = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_all(cls) -> List[Dict]:
+        """Returns the category rows (SELECT * FROM categories) as fresh dicts the caller may mutate."""
+        PubSub.subscribe(cls.CHANNEL, cls.clear)
+
+        rows = cls._rows
+        if rows is None or time.monotonic() >= cls._expires_at:
+            rows = cls._load()
+        return [dict(row) for row in rows]
+
+    @classmethod
+    def etag(cls) -> str:
+        """Content hash of the currently cached rows, for conditional GETs."""
+        if cls._rows is None or time.monotonic() >= cls._expires_at:
+            cls._load()
+        return cls._etag or ""
+
+    @classmethod
+    def request_etag(cls) -> Optional[str]:
+        """etag_fn for @conditional on the category list endpoints (storefront and admin)."""
+        version = cls.etag()
+        return make_etag("categories", request.path, version) if version else None
+
+    @classmethod
+    def _load(cls) -> List[Dict]:
+        with cls._lock:
+            if cls._rows is not None and time.monotonic() < cls._expires_at:
+                return cls._rows
+            generation = cls._generation
+
+        with get_cursor() as cursor:
+            cursor.execute("SELECT * FROM categories")
+            rows = cursor.fetchall()
+
+        with cls._lock:
+            # An invalidation that raced with the query wins; serve but don't keep the result.
+            if generation == cls._generation:
+                cls._rows = rows
+                cls._etag = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()
+                cls._expires_at = time.monotonic() + cls.TTL
+        return rows
+
+    @classmethod
+    def clear(cls, _message=None):
+        with cls._lock:
+            cls._rows = None
+            cls._etag = None
+            cls._generation += 1
+
+    @classmethod
+    def invalidate(cls):
+        """Drops the cached categories in this process and, via pub/sub, in every other worker."""
+        cls.clear()
+        PubSub.publish(cls.CHANNEL)
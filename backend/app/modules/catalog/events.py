@@ -0,0 +1,57 @@
+from typing import Callable, List, Optional, Tuple
+
+from app.shared.pubsub import PubSub
+from .cache import ProductCache
+
+
+class CatalogEvents:
+    """
+    Single hook for "a product changed" after an admin write commits.
+
+    Bumps the product/catalog cache versions and broadcasts the product id so
+    every worker can refresh its in-process structures (search index, etc.).
+    Subscribers receive "<product_id>" or "<product_id>:<catalog_version>" as
+    a string, or None when messages may have been missed ("rebuild" after a
+    bulk import) and they should rebuild from MySQL. The version is the
+    catalog version reached once this message is applied; see parse().
+    """
+    CHANNEL = "catalog:products:changed"
+    BULK_THRESHOLD = 50
+
+    @staticmethod
+    def _message(target, version: Optional[str]) -> str:
+        return f"{target}:{version}" if version is not None else str(target)
+
+    @staticmethod
+    def parse(message: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+        """(product_id, catalog_version) of a message; product_id is None for "rebuild" and reconnects."""
+        if message is None:
+            return None, None
+        target, _, version = message.partition(":")
+        return (int(target) if target.isdigit() else None), (version if version.isdigit() else None)
+
+    @staticmethod
+    def product_changed(product_id: int, redis_client=None):
+        version = ProductCache.bump_version(product_id, redis_client)
+        PubSub.publish(CatalogEvents.CHANNEL, CatalogEvents._message(product_id, version))
+
+    @staticmethod
+    def products_changed(product_ids: List[int], redis_client=None):
+        """
+        Bulk form for imports. Past BULK_THRESHOLD ids a single "rebuild"
+        message replaces one refresh per product in every worker.
+        """
+        if not product_ids:
+            return
+        version = ProductCache.bump_versions(product_ids, redis_client)
+        if len(product_ids) > CatalogEvents.BULK_THRESHOLD:
+            PubSub.publish(CatalogEvents.CHANNEL, CatalogEvents._message("rebuild", version))
+            return
+        # Only the last message carries the version: the batch is applied once all of them are.
+        for product_id in product_ids[:-1]:
+            PubSub.publish(CatalogEvents.CHANNEL, str(product_id))
+        PubSub.publish(CatalogEvents.CHANNEL, CatalogEvents._message(product_ids[-1], version))
+
+    @staticmethod
+    def subscribe(handler: Callable[[Optional[str]], None]):
+        PubSub.subscribe(CatalogEvents.CHANNEL, handler)
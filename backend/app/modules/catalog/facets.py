@@ -0,0 +1,271 @@
+import bisect
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.shared.database import get_cursor
+from app.shared.logging_config import get_logger
+from app.shared.pagination import encode_cursor
+from .indexing import InProcessIndex
+
+log = get_logger(__name__)
+
+# (label, lower bound inclusive, upper bound exclusive or None)
+PRICE_BANDS = [("0-499", 0, 500), ("500-999", 500, 1000), ("1000-1999", 1000, 2000),
+               ("2000-4999", 2000, 5000), ("5000+", 5000, None)]
+DISCOUNT_BANDS = [("0-9", 0, 10), ("10-24", 10, 25), ("25-49", 25, 50), ("50+", 50, None)]
+
+FACETS = ("category", "brand", "color", "size", "price", "discount")
+
+
+def _band(value, bands) -> Optional[str]:
+    if value is None:
+        return None
+    value = float(value)
+    for label, lo, hi in bands:
+        if value >= lo and (hi is None or value < hi):
+            return label
+    return None
+
+
+def _norm(value) -> str:
+    return str(value).strip().casefold() if value is not None else ""
+
+
+def _popcount(bits: int) -> int:
+    return bits.bit_count() if hasattr(bits, "bit_count") else bin(bits).count("1")
+
+
+def _sizes_in_stock(raw) -> List[str]:
+    try:
+        size_map = json.loads(raw) if raw else {}
+        return [size for size, qty in size_map.items() if int(qty or 0) > 0]
+    except Exception:
+        return []
+
+
+class FacetIndex:
+    """
+    Posting lists per facet value, stored as int bitmaps over dense ordinals.
+
+    Each active product gets an ordinal the first time it is seen; bit N of a
+    bitmap means "product with ordinal N has this value". Filtering is AND/OR
+    of bitmaps and facet counts are popcounts, so no GROUP BY runs per request.
+    Ordinals are never reused; a removed product just has its bits cleared.
+
+    _order keeps every indexed product's (created_at, id) sorted, so a page is
+    read by walking it backwards from the cursor instead of sorting the matches.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ordinals: Dict[int, int] = {}
+        self._ids: List[int] = []
+        self._all = 0
+        self._postings: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        self._labels: Dict[Tuple[str, str], str] = {}
+        self._doc_values: Dict[int, Dict[str, set]] = {}
+        self._docs: Dict[int, Dict] = {}
+        self._order: List[Tuple[datetime, int]] = []
+
+    def upsert(self, product: Dict, variants: Iterable[Dict]):
+        product_id = product["id"]
+        values: Dict[str, set] = {facet: set() for facet in FACETS}
+
+        def add(facet, raw, label=None):
+            key = _norm(raw)
+            if key:
+                values[facet].add(key)
+                self._labels.setdefault((facet, key), label if label is not None else str(raw).strip())
+
+        with self._lock:
+            add("category", product.get("category_id"))
+            add("brand", product.get("brand"))
+            for sku in [product, *variants]:
+                add("color", sku.get("color_name"))
+                add("price", _band(sku.get("price"), PRICE_BANDS))
+                add("discount", _band(sku.get("discount"), DISCOUNT_BANDS))
+                for size in _sizes_in_stock(sku.get("size_stock")):
+                    add("size", size)
+
+            self._remove_locked(product_id)
+            ordinal = self._ordinals.get(product_id)
+            if ordinal is None:
+                ordinal = self._ordinals[product_id] = len(self._ids)
+                self._ids.append(product_id)
+            bit = 1 << ordinal
+            self._all |= bit
+            for facet, keys in values.items():
+                postings = self._postings[facet]
+                for key in keys:
+                    postings[key] = postings.get(key, 0) | bit
+            self._doc_values[product_id] = values
+            self._docs[product_id] = {
+                "id": product_id,
+                "name": product["name"],
+                "price": product["price"],
+                "mrp": product["mrp"],
+                "discount": product["discount"],
+                "created_at": product["created_at"],
+                "image_path": product.get("image_path"),
+            }
+            bisect.insort(self._order, (product["created_at"], product_id))
+
+    def remove(self, product_id: int):
+        with self._lock:
+            self._remove_locked(product_id)
+
+    def _remove_locked(self, product_id: int):
+        values = self._doc_values.pop(product_id, None)
+        doc = self._docs.pop(product_id, None)
+        if doc is not None:
+            position = bisect.bisect_left(self._order, (doc["created_at"], product_id))
+            if position < len(self._order) and self._order[position][1] == product_id:
+                del self._order[position]
+        ordinal = self._ordinals.get(product_id)
+        if values is None or ordinal is None:
+            return
+        mask = ~(1 << ordinal)
+        self._all &= mask
+        for facet, keys in values.items():
+            postings = self._postings[facet]
+            for key in keys:
+                remaining = postings.get(key, 0) & mask
+                if remaining:
+                    postings[key] = remaining
+                else:
+                    postings.pop(key, None)
+
+    def _members(self, bits: int) -> List[int]:
+        digits = bin(bits)[:1:-1]  # little-endian: digits[n] is bit n
+        return [self._ids[n] for n, digit in enumerate(digits) if digit == "1"]
+
+    def query(self, filters: Dict[str, List[str]], limit: int,
+              after: Optional[Tuple[datetime, int]] = None) -> Dict:
+        """
+        filters: {facet: [value, ...]} - values within a facet are OR'd, facets AND'd.
+        Returns {"items", "next_cursor", "facets"}; counts for each facet are
+        computed against the other facets' filters (standard disjunctive faceting).
+        """
+        with self._lock:
+            masks = {}
+            for facet, selected in filters.items():
+                if facet in self._postings and selected:
+                    mask = 0
+                    for value in selected:
+                        mask |= self._postings[facet].get(_norm(value), 0)
+                    masks[facet] = mask
+
+            matched = self._all
+            for mask in masks.values():
+                matched &= mask
+
+            facets = {}
+            for facet, postings in self._postings.items():
+                others = self._all
+                for other, mask in masks.items():
+                    if other != facet:
+                        others &= mask
+                counts = []
+                for key, bits in postings.items():
+                    count = _popcount(others & bits)
+                    if count:
+                        counts.append({"value": key, "label": self._labels.get((facet, key), key), "count": count})
+                counts.sort(key=lambda c: (-c["count"], c["value"]))
+                facets[facet] = counts
+
+            # Newest first, starting below the cursor; stop once limit + 1 matches are found.
+            wanted = None if matched == self._all else set(self._members(matched))
+            end = bisect.bisect_left(self._order, after) if after else len(self._order)
+            page = []
+            for position in range(end - 1, -1, -1):
+                product_id = self._order[position][1]
+                if wanted is None or product_id in wanted:
+                    page.append(dict(self._docs[product_id]))
+                    if len(page) > limit:
+                        break
+
+        has_more = len(page) > limit
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1]["created_at"], page[-1]["id"]) if has_more else None
+        for item in page:
+            if item.get("image_path") and not item["image_path"].startswith("/"):
+                item["image_path"] = "/" + item["image_path"]
+        return {"items": page, "next_cursor": next_cursor, "facets": facets}
+
+
+class FacetRepository:
+
+    _PRODUCT_COLUMNS = """
+        p.id, p.name, p.brand, p.price, p.mrp, p.discount, p.created_at,
+        p.primary_image_path AS image_path, p.color_name, p.size_stock, p.category_id
+    """
+
+    @staticmethod
+    def load(product_ids: Optional[List[int]] = None) -> Tuple[List[Dict], Dict[int, List[Dict]]]:
+        """Active products (all, or the given ids) and their active variants, in two queries."""
+        where, params = "p.status = 1", ()
+        if product_ids is not None:
+            where += f" AND p.id IN ({', '.join(['%s'] * len(product_ids))})"
+            params = tuple(product_ids)
+
+        with get_cursor() as cursor:
+            # Oldest first, so the build appends to FacetIndex._order instead of inserting mid-list.
+            cursor.execute(
+                f"SELECT {FacetRepository._PRODUCT_COLUMNS} FROM products p WHERE {where} ORDER BY p.created_at, p.id",
+                params,
+            )
+            products = cursor.fetchall()
+            cursor.execute(
+                f"""
+                SELECT v.product_id, v.color_name, v.price, v.discount, v.size_stock
+                FROM product_variants v JOIN products p ON p.id = v.product_id
+                WHERE v.status = 1 AND {where}
+                """,
+                params,
+            )
+            variants: Dict[int, List[Dict]] = {}
+            for row in cursor.fetchall():
+                variants.setdefault(row["product_id"], []).append(row)
+        return products, variants
+
+
+class FacetService(InProcessIndex):
+    """Keeps a per-process FacetIndex current from CatalogEvents."""
+
+    _lock = threading.Lock()
+    _building_pid: Optional[int] = None
+    _retry_at = 0.0
+    _applied_version: Optional[str] = None
+    _index: Optional[FacetIndex] = None
+
+    @classmethod
+    def _rebuild(cls):
+        products, variants = FacetRepository.load()
+        index = FacetIndex()
+        for product in products:
+            index.upsert(product, variants.get(product["id"], []))
+        cls._index = index
+        log.info("Facet index built", extra={"products": len(products)})
+
+    @classmethod
+    def refresh_product(cls, product_id: int):
+        index = cls._index
+        if index is None:
+            return
+        products, variants = FacetRepository.load([product_id])
+        if products:
+            index.upsert(products[0], variants.get(product_id, []))
+        else:
+            index.remove(product_id)
+
+    @classmethod
+    def query(cls, filters: Dict[str, List[str]], limit: int,
+              after: Optional[Tuple[datetime, int]] = None) -> Optional[Dict]:
+        """Returns None while the index is still building."""
+        index = cls._index
+        if index is None:
+            cls.warm_up()
+            return None
+        return index.query(filters, limit, after)
@@ -0,0 +1,233 @@
+import csv
+import io
+import json
+import uuid
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from app.shared.database import transaction
+from app.shared.logging_config import get_logger
+from .events import CatalogEvents
+from .repository import ProductRepository
+from .schema import ImportProductSchema
+
+log = get_logger(__name__)
+
+FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 1000
+
+PRODUCT_COLUMNS = (
+    "name", "category_id", "brand", "description", "enable_variants",
+    "price", "mrp", "discount", "stock", "sizes", "size_stock",
+    "length", "breadth", "height", "weight",
+    "delivery_type", "delivery_charge", "cod_available",
+    "return_policy", "tags", "dispatch_time",
+    "color_name", "color_code", "import_ref",
+)
+
+VARIANT_COLUMNS = (
+    "product_id", "category_id", "name", "color_name", "color_code", "sizes",
+    "mrp", "discount", "price", "image_path", "stock", "size_stock",
+    "length", "breadth", "height", "weight",
+    "brand", "description",
+    "delivery_type", "delivery_charge", "cod_available",
+    "return_policy", "status",
+)
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def detect_format(filename: str) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return None
+
+
+def iter_rows(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Yields (line_number, row, parse_error) one row at a time, so memory stays
+    flat whatever the file size. Empty CSV cells are dropped so schema
+    defaults apply.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}, None
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, "Each line must be a JSON object"
+            continue
+        yield line_no, row, None
+
+
+def _sizes(schema) -> str:
+    return ",".join(size.strip() for size in schema.sizes if size and size.strip())
+
+
+def _size_stock(schema) -> Optional[str]:
+    return json.dumps(schema.size_stock) if schema.size_stock else None
+
+
+class ProductImporter:
+    """
+    Bulk product import from CSV or JSONL.
+
+    Rows are streamed and validated against ImportProductSchema one by one;
+    every chunk_size valid rows are written in one transaction with executemany
+    (products, product images, variants, variant images), then its cache
+    and index notifications go out in bulk. A failing row is reported and
+    skipped; a failing chunk is rolled back and all its rows are reported.
+    Rows carry an import_ref (their "ref", or one derived from the import id
+    and line number), so re-running a file skips rows already imported.
+    """
+
+    def __init__(self, chunk_size: int = 500, dry_run: bool = False, import_id: str = None):
+        self.chunk_size = max(1, chunk_size)
+        self.dry_run = dry_run
+        self.import_id = import_id or uuid.uuid4().hex[:12]
+        self.report = {"import_id": self.import_id, "rows": 0, "imported": 0, "failed": 0, "errors": []}
+        self._seen_refs = set()
+
+    def _error(self, line_no: int, message: str):
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"row": line_no, "error": message})
+
+    def run(self, stream: BinaryIO, fmt: str) -> Dict:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+
+        chunk: List[Tuple[int, ImportProductSchema]] = []
+        for line_no, row, parse_error in iter_rows(stream, fmt):
+            self.report["rows"] += 1
+            if parse_error:
+                self._error(line_no, parse_error)
+                continue
+            try:
+                product = ImportProductSchema(**row)
+            except Exception as e:
+                self._error(line_no, str(e))
+                continue
+
+            product.ref = product.ref or f"{self.import_id}:{line_no}"
+            if product.ref in self._seen_refs:
+                self._error(line_no, f"Duplicate ref '{product.ref}' in file")
+                continue
+            self._seen_refs.add(product.ref)
+
+            chunk.append((line_no, product))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+
+        self.report["errors_truncated"] = self.report["failed"] > len(self.report["errors"])
+        log.info("Product import finished", extra={k: v for k, v in self.report.items() if k != "errors"})
+        return self.report
+
+    def _flush(self, chunk: List[Tuple[int, ImportProductSchema]]):
+        if self.dry_run:
+            self.report["imported"] += len(chunk)
+            return
+        try:
+            with transaction() as (conn, cursor):
+                product_ids, skipped = self._insert_chunk(cursor, chunk)
+        except Exception as e:
+            log.error("Product import chunk failed", extra={"import_id": self.import_id, "error": str(e)})
+            for line_no, _ in chunk:
+                self._error(line_no, f"Database error, chunk rolled back: {e}")
+            return
+
+        for line_no, ref in skipped:
+            self._error(line_no, f"Already imported (ref '{ref}')")
+        self.report["imported"] += len(product_ids)
+        # New products have no cached documents or stock keys; only the catalog
+        # version and in-process indexes need to move.
+        CatalogEvents.products_changed(product_ids)
+
+    def _insert_chunk(self, cursor, chunk: List[Tuple[int, ImportProductSchema]]) -> Tuple[List[int], List[Tuple[int, str]]]:
+        """Returns (new product ids, (line, ref) of rows skipped as already imported)."""
+        refs = [product.ref for _, product in chunk]
+        cursor.execute(f"SELECT import_ref FROM products WHERE import_ref IN ({_placeholders(refs)})", tuple(refs))
+        existing = {row["import_ref"] for row in cursor.fetchall()}
+        rows = [product for _, product in chunk if product.ref not in existing]
+        skipped = [(line_no, product.ref) for line_no, product in chunk if product.ref in existing]
+        if not rows:
+            return [], skipped
+
+        cursor.executemany(
+            f"INSERT INTO products ({', '.join(PRODUCT_COLUMNS)}) VALUES ({_placeholders(PRODUCT_COLUMNS)})",
+            [
+                (
+                    p.name, p.category_id, p.brand, p.description, int(bool(p.variants)),
+                    p.price, p.mrp, p.discount, p.total_stock, None if p.variants else _sizes(p), _size_stock(p),
+                    p.length or 0, p.breadth or 0, p.height or 0, p.weight or 0,
+                    p.delivery_type, p.delivery_charge if p.delivery_type == "custom" else 0, int(p.cod_available),
+                    p.return_policy, p.tags, p.dispatch_time,
+                    p.color_name or "", p.color_code, p.ref,
+                )
+                for p in rows
+            ],
+        )
+        # executemany may split into several statements, so lastrowid cannot be trusted; resolve by ref.
+        cursor.execute(
+            f"SELECT id, import_ref FROM products WHERE import_ref IN ({_placeholders(rows)})",
+            tuple(p.ref for p in rows),
+        )
+        ids = {row["import_ref"]: row["id"] for row in cursor.fetchall()}
+
+        images = [(ids[p.ref], path) for p in rows for path in p.images]
+        if images:
+            cursor.executemany("INSERT INTO product_images (product_id, image_path) VALUES (%s, %s)", images)
+            ProductRepository.refresh_primary_images(cursor, [ids[p.ref] for p in rows if p.images])
+
+        variants = [(ids[p.ref], p, v) for p in rows for v in p.variants]
+        if variants:
+            cursor.executemany(
+                f"INSERT INTO product_variants ({', '.join(VARIANT_COLUMNS)}) VALUES ({_placeholders(VARIANT_COLUMNS)})",
+                [
+                    (
+                        product_id, p.category_id, v.name, v.color_name or "", v.color_code, _sizes(v),
+                        v.mrp, v.discount, v.price, v.images[0] if v.images else None, v.total_stock, _size_stock(v),
+                        v.length or p.length or 0, v.breadth or p.breadth or 0, v.height or p.height or 0, v.weight or p.weight or 0,
+                        p.brand, p.description,
+                        p.delivery_type, p.delivery_charge if p.delivery_type == "custom" else 0, int(p.cod_available),
+                        p.return_policy, 1,
+                    )
+                    for product_id, p, v in variants
+                ],
+            )
+            # The products are new and uncommitted, so their variants are exactly the rows
+            # just inserted, in insertion (id) order.
+            product_ids = list(dict.fromkeys(product_id for product_id, _, _ in variants))
+            cursor.execute(
+                f"SELECT id, product_id FROM product_variants WHERE product_id IN ({_placeholders(product_ids)}) ORDER BY id",
+                tuple(product_ids),
+            )
+            variant_ids: Dict[int, List[int]] = {}
+            for row in cursor.fetchall():
+                variant_ids.setdefault(row["product_id"], []).append(row["id"])
+
+            variant_images = []
+            for p in rows:
+                for variant_id, v in zip(variant_ids.get(ids[p.ref], []), p.variants):
+                    variant_images.extend((variant_id, path) for path in v.images)
+            if variant_images:
+                cursor.executemany("INSERT INTO variant_images (variant_id, image_path) VALUES (%s, %s)", variant_images)
+
+        return [ids[p.ref] for p in rows], skipped
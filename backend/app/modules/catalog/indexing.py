@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.shared.logging_config import get_logger
+from .cache import CatalogVersion
+from .events import CatalogEvents
+
+log = get_logger(__name__)
+
+
+class InProcessIndex(ABC):
+    """
+    Lifecycle shared by the per-process catalog indexes.
+
+    The structure is built in a background thread (at startup via warm_up(),
+    or lazily on first use in a freshly forked worker) and kept current by
+    CatalogEvents: a product id refreshes one product, None (possible missed
+    messages) triggers a full rebuild.
+
+    CatalogVersion moves as soon as a write commits, before this process has
+    applied it. Anything derived from the structure (result caches, ETags)
+    keys on applied_version() instead: the catalog version read before the
+    last build, advanced by each versioned event once its refresh has run.
+    """
+    RETRY_DELAY = 30  # seconds between build attempts after a failure
+
+    _lock = threading.Lock()
+    _building_pid: Optional[int] = None
+    _retry_at = 0.0
+    _applied_version: Optional[str] = None
+
+    @classmethod
+    def applied_version(cls) -> Optional[str]:
+        """None until built, or when Redis was unavailable for the build."""
+        return cls._applied_version
+
+    @classmethod
+    def warm_up(cls):
+        """Starts building in the background. Safe to call repeatedly."""
+        CatalogEvents.subscribe(cls._on_product_changed)
+        with cls._lock:
+            if cls._building_pid == os.getpid() or time.monotonic() < cls._retry_at:
+                return
+            cls._building_pid = os.getpid()
+        threading.Thread(target=cls._build, name=f"{cls.__name__}-build", daemon=True).start()
+
+    @classmethod
+    def _build(cls):
+        try:
+            version = CatalogVersion.get()
+            cls._rebuild()
+            cls._applied_version = version
+        except Exception as e:
+            cls._retry_at = time.monotonic() + cls.RETRY_DELAY
+            log.error("In-process index build failed", extra={"index": cls.__name__, "error": str(e)})
+        finally:
+            with cls._lock:
+                cls._building_pid = None
+
+    @classmethod
+    def _on_product_changed(cls, message: Optional[str]):
+        product_id, version = CatalogEvents.parse(message)
+        if product_id is None:
+            cls.warm_up()
+            return
+        try:
+            cls.refresh_product(product_id)
+        except Exception as e:
+            log.error("In-process index refresh failed", extra={"index": cls.__name__, "product_id": product_id, "error": str(e)})
+            return
+        applied = cls._applied_version
+        if version is not None and applied is not None and int(version) > int(applied):
+            cls._applied_version = version
+
+    @classmethod
+    @abstractmethod
+    def _rebuild(cls):
+        """Builds the structure from MySQL and swaps it in."""
+
+    @classmethod
+    @abstractmethod
+    def refresh_product(cls, product_id: int):
+        """Re-reads one product (or drops it if it no longer exists)."""
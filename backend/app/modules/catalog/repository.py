@@ -0,0 +1,191 @@
+from typing import Dict, Iterable, List
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+class ProductRepository:
+    """
+    Batched catalog loaders.
+
+    Methods take an open DictCursor so they can join whatever connection or
+    transaction the caller (storefront route, admin route, service) already holds.
+    """
+
+    @staticmethod
+    def get_active_products(cursor, product_ids: Iterable[int]) -> Dict[int, Dict]:
+        """PDP columns for the active products among product_ids, keyed by id."""
+        ids = list(dict.fromkeys(product_ids))
+        if not ids:
+            return {}
+        cursor.execute(
+            f"""
+            SELECT 
+                p.id, p.name, p.description, p.brand, 
+                p.price, p.mrp, p.discount, p.stock, p.size_stock,
+                p.delivery_type, p.delivery_charge, p.dispatch_time,
+                p.return_policy, p.cod_available,
+                p.color_name, p.color_code, p.category_id
+            FROM products p
+            WHERE p.id IN ({_placeholders(ids)}) AND p.status = 1
+            """,
+            tuple(ids),
+        )
+        return {row["id"]: row for row in cursor.fetchall()}
+
+    @staticmethod
+    def get_product_images(cursor, product_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """Returns {product_id: [image_path, ...]} (in upload order) with every requested id present."""
+        ids = list(dict.fromkeys(product_ids))
+        grouped = {pid: [] for pid in ids}
+        if not ids:
+            return grouped
+
+        cursor.execute(
+            f"SELECT product_id, image_path FROM product_images WHERE product_id IN ({_placeholders(ids)}) ORDER BY product_id, id",
+            tuple(ids),
+        )
+        for row in cursor.fetchall():
+            grouped[row["product_id"]].append(row["image_path"])
+        return grouped
+
+    @staticmethod
+    def get_active_variants(cursor, product_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+        """Returns {product_id: [variant row, ...]} for active variants, every requested id present."""
+        ids = list(dict.fromkeys(product_ids))
+        grouped = {pid: [] for pid in ids}
+        if not ids:
+            return grouped
+
+        cursor.execute(
+            f"""
+            SELECT 
+                id, product_id, name, color_name, color_code,
+                size_stock, price, mrp, discount, stock,
+                image_path, brand, description,
+                dispatch_time, delivery_type, delivery_charge,
+                cod_available, return_policy
+            FROM product_variants
+            WHERE product_id IN ({_placeholders(ids)}) AND status = 1
+            ORDER BY product_id, id
+            """,
+            tuple(ids),
+        )
+        for row in cursor.fetchall():
+            grouped[row["product_id"]].append(row)
+        return grouped
+
+    @staticmethod
+    def get_variant_summaries(cursor, product_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+        """Admin listing columns for every variant (any status), as {product_id: [row, ...]}."""
+        ids = list(dict.fromkeys(product_ids))
+        grouped = {pid: [] for pid in ids}
+        if not ids:
+            return grouped
+
+        cursor.execute(
+            f"""
+            SELECT id, product_id, name, price, mrp, discount, stock, image_path, status
+            FROM product_variants
+            WHERE product_id IN ({_placeholders(ids)})
+            ORDER BY product_id, id
+            """,
+            tuple(ids),
+        )
+        for row in cursor.fetchall():
+            grouped[row["product_id"]].append(row)
+        return grouped
+
+    @staticmethod
+    def get_variant_images(cursor, variant_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """
+        Fetches images for many variants in one query.
+        Returns {variant_id: [image_path, ...]} with every requested id present.
+        """
+        ids = list(dict.fromkeys(variant_ids))
+        grouped = {vid: [] for vid in ids}
+        if not ids:
+            return grouped
+
+        cursor.execute(
+            f"SELECT variant_id, image_path FROM variant_images WHERE variant_id IN ({_placeholders(ids)}) ORDER BY variant_id, id",
+            tuple(ids),
+        )
+        for row in cursor.fetchall():
+            grouped[row["variant_id"]].append(row["image_path"])
+        return grouped
+
+    @staticmethod
+    def get_variant_images_for_products(cursor, product_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """
+        Same as get_variant_images, but scoped by parent product.
+        Returns {variant_id: [image_path, ...]} for every variant that has images.
+        """
+        ids = list(dict.fromkeys(product_ids))
+        grouped: Dict[int, List[str]] = {}
+        if not ids:
+            return grouped
+
+        cursor.execute(
+            f"""
+            SELECT vi.variant_id, vi.image_path
+            FROM variant_images vi
+            JOIN product_variants v ON v.id = vi.variant_id
+            WHERE v.product_id IN ({_placeholders(ids)})
+            ORDER BY vi.variant_id, vi.id
+            """,
+            tuple(ids),
+        )
+        for row in cursor.fetchall():
+            grouped.setdefault(row["variant_id"], []).append(row["image_path"])
+        return grouped
+
+    @staticmethod
+    def refresh_primary_image(cursor, product_id: int):
+        """
+        Re-derives products.primary_image_path (first image by id) after product_images changed.
+        Must run on the same cursor/transaction as the image insert or delete.
+        """
+        cursor.execute(
+            """
+            UPDATE products
+            SET primary_image_path = (
+                SELECT image_path FROM product_images WHERE product_id = %s ORDER BY id ASC LIMIT 1
+            )
+            WHERE id = %s
+            """,
+            (product_id, product_id),
+        )
+
+    @staticmethod
+    def refresh_primary_images(cursor, product_ids: Iterable[int]):
+        """refresh_primary_image for many products in one statement (bulk import)."""
+        ids = list(dict.fromkeys(product_ids))
+        if not ids:
+            return
+        cursor.execute(
+            f"""
+            UPDATE products p
+            SET p.primary_image_path = (
+                SELECT pi.image_path FROM product_images pi WHERE pi.product_id = p.id ORDER BY pi.id ASC LIMIT 1
+            )
+            WHERE p.id IN ({_placeholders(ids)})
+            """,
+            tuple(ids),
+        )
+
+    @staticmethod
+    def backfill_primary_images(cursor, first_id: int, last_id: int) -> int:
+        """Populates primary_image_path for products with first_id <= id <= last_id."""
+        cursor.execute(
+            """
+            UPDATE products p
+            SET p.primary_image_path = (
+                SELECT pi.image_path FROM product_images pi WHERE pi.product_id = p.id ORDER BY pi.id ASC LIMIT 1
+            )
+            WHERE p.id BETWEEN %s AND %s
+            """,
+            (first_id, last_id),
+        )
+        return cursor.rowcount
@@ -0,0 +1,88 @@
+import json
+from pydantic import BaseModel, Field, validator
+from typing import Dict, List, Optional
+
+
+def _as_list(v):
+    """CSV cells carry lists as JSON or as "a|b|c"."""
+    if v is None or isinstance(v, list):
+        return v
+    v = str(v).strip()
+    if v.startswith("["):
+        return json.loads(v)
+    return [item.strip() for item in v.split("|") if item.strip()]
+
+
+def _as_json(v):
+    """CSV cells carry objects (size_stock, variants) as JSON strings."""
+    if isinstance(v, str):
+        return json.loads(v) if v.strip() else None
+    return v
+
+
+# Shared by products and variants; mirrors the fields of the admin add form
+class BaseImportSchema(BaseModel):
+    color_name: Optional[str] = Field(None, max_length=100)
+    color_code: str = Field("#000000", max_length=20)
+    sizes: List[str] = Field(default_factory=list)
+    mrp: float = Field(..., ge=0)
+    discount: float = Field(0, ge=0, le=100)
+    stock: int = Field(0, ge=0)
+    size_stock: Dict[str, int] = Field(default_factory=dict)
+    length: Optional[float] = Field(None, ge=0)
+    breadth: Optional[float] = Field(None, ge=0)
+    height: Optional[float] = Field(None, ge=0)
+    weight: Optional[float] = Field(None, ge=0)
+    images: List[str] = Field(default_factory=list, max_items=20)
+
+    @validator('sizes', 'images', pre=True)
+    def parse_list(cls, v):
+        return _as_list(v) or []
+
+    @validator('size_stock', pre=True)
+    def parse_size_stock(cls, v):
+        return _as_json(v) or {}
+
+    @validator('size_stock')
+    def validate_size_stock(cls, v):
+        if any(qty < 0 for qty in v.values()):
+            raise ValueError("size_stock quantities must be >= 0")
+        return v
+
+    @property
+    def price(self) -> float:
+        return round(self.mrp - (self.mrp * self.discount / 100), 2) if self.mrp else 0.0
+
+    @property
+    def total_stock(self) -> int:
+        return sum(self.size_stock.values()) if self.size_stock else self.stock
+
+
+class ImportVariantSchema(BaseImportSchema):
+    name: str = Field(..., min_length=1, max_length=255)
+
+
+class ImportProductSchema(BaseImportSchema):
+    ref: Optional[str] = Field(None, max_length=64, description="Stable row id (e.g. seller SKU); re-imports skip it")
+    name: str = Field(..., min_length=1, max_length=255)
+    category_id: int = Field(..., gt=0)
+    brand: str = Field("", max_length=255)
+    description: str = ""
+    delivery_type: str = "free"
+    delivery_charge: float = Field(0, ge=0)
+    cod_available: bool = False
+    return_policy: str = ""
+    tags: str = ""
+    dispatch_time: str = ""
+    variants: List[ImportVariantSchema] = Field(default_factory=list, max_items=50)
+
+    @validator('variants', pre=True)
+    def parse_variants(cls, v):
+        return _as_json(v) or []
+
+    @validator('delivery_type')
+    def validate_delivery_type(cls, v):
+        v = (v or "free").lower()
+        if v not in ('free', 'custom'):
+            raise ValueError("delivery_type must be 'free' or 'custom'")
+        return v
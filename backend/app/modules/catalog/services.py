@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional
+
+import pymysql
+from flask import current_app
+
+from app.shared.database import get_db_connection
+from .cache import ProductCache
+from .repository import ProductRepository
+
+
+def _normalize_path(path):
+    if path and not path.startswith("/"):
+        return "/" + path
+    return path
+
+
+class ProductDetailService:
+
+    @staticmethod
+    def load(product_id: int) -> Optional[Dict]:
+        """Assembles the PDP document (product, images, active variants) from MySQL."""
+        return ProductDetailService.load_many([product_id]).get(product_id)
+
+    @staticmethod
+    def load_many(product_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Assembles PDP documents for many products in a constant number of queries
+        (products, images, variants, variant images). Inactive or missing ids are absent.
+        """
+        with get_db_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                products = ProductRepository.get_active_products(cursor, product_ids)
+                if not products:
+                    return {}
+                ids = list(products)
+                images = ProductRepository.get_product_images(cursor, ids)
+                variants = ProductRepository.get_active_variants(cursor, ids)
+                variant_images = ProductRepository.get_variant_images(
+                    cursor, [v["id"] for rows in variants.values() for v in rows]
+                )
+
+        for product_id, product in products.items():
+            # Normalize size_stock
+            product['size_stock'] = product.get('size_stock') or '{}'
+            product['images'] = [{"image_path": _normalize_path(path)} for path in images[product_id]]
+
+            for variant in variants[product_id]:
+                variant["image_path"] = _normalize_path(variant.get("image_path"))
+                variant["size_stock"] = variant.get("size_stock") or '{}'
+                variant["variant_images"] = [_normalize_path(path) for path in variant_images[variant["id"]]]
+            product['variants'] = variants[product_id]
+
+        return products
+
+    @staticmethod
+    def get_json(product_id: int) -> Optional[str]:
+        """
+        Returns the serialized PDP document, served from the versioned cache when possible.
+        None means the product does not exist or is inactive.
+        """
+        body, version = ProductCache.get(product_id)
+        if body is not None:
+            return body
+
+        product = ProductDetailService.load(product_id)
+        if product is None:
+            return None
+
+        body = current_app.json.dumps(product)
+        ProductCache.set(product_id, version, body)
+        return body
+
+    @staticmethod
+    def get_json_many(product_ids: List[int]) -> str:
+        """
+        Serialized JSON array of PDP documents in the requested order, skipping
+        missing/inactive ids. Cached documents are spliced in as-is; misses are
+        loaded together and written back in one pipeline.
+        """
+        hits, versions = ProductCache.get_many(product_ids)
+        misses = [pid for pid in product_ids if pid not in hits]
+
+        if misses:
+            fresh = {}
+            for pid, product in ProductDetailService.load_many(misses).items():
+                hits[pid] = current_app.json.dumps(product)
+                fresh[pid] = (versions.get(pid), hits[pid])
+            ProductCache.set_many(fresh)
+
+        return "[" + ",".join(hits[pid] for pid in product_ids if pid in hits) + "]"
@@ -0,0 +1,151 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.shared.database import get_cursor
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+from .repository import StockRepository
+
+log = get_logger(__name__)
+
+# (product_id, variant_id or None, size or None)
+Sku = Tuple[int, Optional[int], Optional[str]]
+
+
+def make_sku(product_id, variant_id=None, size=None) -> Sku:
+    return int(product_id), (int(variant_id) if variant_id else None), (size or None)
+
+
+def sku_id(sku: Sku) -> str:
+    """String form used inside Redis keys: {product_id}:{variant_id|null}:{size|all}."""
+    product_id, variant_id, size = sku
+    return f"{product_id}:{variant_id if variant_id else 'null'}:{size or 'all'}"
+
+
+def parse_sku_id(value: str) -> Sku:
+    product_id, variant_id, size = value.split(":", 2)
+    return make_sku(product_id, None if variant_id == "null" else variant_id, None if size == "all" else size)
+
+
+class StockCache:
+    """
+    Per-SKU stock snapshot: stock:{product_id}:{variant_id|null}:{size|all} -> qty.
+
+    Read-through from MySQL; readers populate with SET NX so they can never
+    overwrite a fresher value. Admin writes call refresh() after commit, which
+    overwrites every key for the product, so the snapshot stays exact.
+    """
+    TTL = 1800  # safety net only; refresh() keeps keys exact
+
+    @staticmethod
+    def _get_redis():
+        try:
+            return RedisClient.get_client()
+        except Exception:
+            return None
+
+    @staticmethod
+    def key(product_id, variant_id=None, size=None) -> str:
+        return "stock:" + sku_id((product_id, variant_id, size))
+
+    @staticmethod
+    def _owner_entries(product_id, variant_id, levels) -> Dict[str, int]:
+        """Every key for one product/variant: the total plus each size."""
+        stock, sizes = levels
+        entries = {StockCache.key(product_id, variant_id): max(0, stock)}
+        for size, qty in sizes.items():
+            entries[StockCache.key(product_id, variant_id, size)] = max(0, qty)
+        return entries
+
+    @staticmethod
+    def _load(skus) -> Dict[str, int]:
+        """All keys for the products/variants behind skus; unknown SKUs resolve to 0."""
+        with get_cursor() as cursor:
+            products = StockRepository.get_product_levels(cursor, [pid for pid, vid, _ in skus if not vid])
+            variants = StockRepository.get_variant_levels(cursor, [vid for _, vid, _ in skus if vid])
+
+        entries: Dict[str, int] = {}
+        for pid, levels in products.items():
+            entries.update(StockCache._owner_entries(pid, None, levels))
+        for vid, levels in variants.items():
+            # Variant keys still carry the product id; take it from the requested SKUs.
+            for pid, sku_vid, _ in skus:
+                if sku_vid == vid:
+                    entries.update(StockCache._owner_entries(pid, vid, levels))
+                    break
+        for sku in skus:
+            entries.setdefault(StockCache.key(*sku), 0)
+        return entries
+
+    @staticmethod
+    def get_many(skus: Iterable[Sku]) -> Dict[Sku, int]:
+        """Stock for each SKU in one MGET; misses are loaded from MySQL in two queries and cached."""
+        skus = list(dict.fromkeys(skus))
+        if not skus:
+            return {}
+
+        keys = [StockCache.key(*sku) for sku in skus]
+        redis = StockCache._get_redis()
+        cached = [None] * len(keys)
+        if redis:
+            try:
+                cached = redis.mget(keys)
+            except Exception as e:
+                log.error("Stock cache read failed", extra={"error": str(e)})
+                redis = None
+
+        result = {sku: int(value) for sku, value in zip(skus, cached) if value is not None}
+        misses = [sku for sku in skus if sku not in result]
+        if not misses:
+            return result
+
+        entries = StockCache._load(misses)
+        for sku in misses:
+            result[sku] = entries[StockCache.key(*sku)]
+
+        if redis:
+            try:
+                pipe = redis.pipeline(transaction=False)
+                for key, qty in entries.items():
+                    pipe.set(key, qty, ex=StockCache.TTL, nx=True)
+                pipe.execute()
+            except Exception as e:
+                log.error("Stock cache populate failed", extra={"error": str(e)})
+        return result
+
+    @staticmethod
+    def get(product_id, variant_id=None, size=None) -> int:
+        sku = make_sku(product_id, variant_id, size)
+        return StockCache.get_many([sku])[sku]
+
+    @staticmethod
+    def refresh(product_id: int, redis_client=None):
+        """
+        Rewrites every stock key of a product and its variants from MySQL.
+        Call after the write has committed.
+        """
+        redis = redis_client or StockCache._get_redis()
+        if not redis:
+            return
+        try:
+            with get_cursor() as cursor:
+                product = StockRepository.get_product_levels(cursor, [product_id]).get(product_id)
+                variants = StockRepository.get_variant_levels(cursor, product_id=product_id)
+
+            entries: Dict[str, int] = {}
+            if product:
+                entries.update(StockCache._owner_entries(product_id, None, product))
+            for vid, levels in variants.items():
+                entries.update(StockCache._owner_entries(product_id, vid, levels))
+
+            # Sizes or variants may have been removed; drop whatever is not rewritten.
+            stale = [key for key in redis.scan_iter(match=f"stock:{product_id}:*", count=100) if key not in entries]
+            # Reservation counters (StockReservations) re-seed from the new levels on next use.
+            stale.extend(redis.scan_iter(match=f"avail:{product_id}:*", count=100))
+            pipe = redis.pipeline()
+            if stale:
+                pipe.delete(*stale)
+            for key, qty in entries.items():
+                pipe.set(key, qty, ex=StockCache.TTL)
+            pipe.execute()
+        except Exception as e:
+            log.error("Stock cache refresh failed", extra={"product_id": product_id, "error": str(e)})
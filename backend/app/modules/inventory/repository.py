@@ -0,0 +1,49 @@
+import json
+from typing import Dict, Iterable, Optional
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def parse_size_stock(raw) -> Dict[str, int]:
+    """size_stock is stored as a JSON object {size: qty}; tolerate NULL and bad JSON."""
+    if not raw:
+        return {}
+    try:
+        return {str(size): int(qty or 0) for size, qty in json.loads(raw).items()}
+    except (ValueError, TypeError, AttributeError):
+        return {}
+
+
+class StockRepository:
+    """
+    Stock levels straight from MySQL, the source of truth for StockCache.
+    Results are {id: (stock, {size: qty})}.
+    """
+
+    @staticmethod
+    def get_product_levels(cursor, product_ids: Iterable[int]) -> Dict[int, tuple]:
+        ids = list(dict.fromkeys(product_ids))
+        if not ids:
+            return {}
+        cursor.execute(
+            f"SELECT id, stock, size_stock FROM products WHERE id IN ({_placeholders(ids)})",
+            tuple(ids),
+        )
+        return {row["id"]: (int(row["stock"] or 0), parse_size_stock(row["size_stock"])) for row in cursor.fetchall()}
+
+    @staticmethod
+    def get_variant_levels(cursor, variant_ids: Iterable[int] = (), product_id: Optional[int] = None) -> Dict[int, tuple]:
+        """By variant ids, or every variant of product_id."""
+        if product_id is not None:
+            cursor.execute("SELECT id, stock, size_stock FROM product_variants WHERE product_id = %s", (product_id,))
+        else:
+            ids = list(dict.fromkeys(variant_ids))
+            if not ids:
+                return {}
+            cursor.execute(
+                f"SELECT id, stock, size_stock FROM product_variants WHERE id IN ({_placeholders(ids)})",
+                tuple(ids),
+            )
+        return {row["id"]: (int(row["stock"] or 0), parse_size_stock(row["size_stock"])) for row in cursor.fetchall()}
@@ -0,0 +1,310 @@
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from app.shared.config import settings
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+from .cache import Sku, StockCache, parse_sku_id, sku_id
+
+log = get_logger(__name__)
+
+# KEYS: avail, holds, expiry   ARGV: user, qty, expires_at, member
+# Sets the user's hold on the SKU to qty, moving only the difference against
+# availability. Returns remaining availability, -1 if the counter is not
+# seeded yet, -2 if there is not enough stock, -3 if qty is negative (it
+# would hand units back that were never held).
+_RESERVE = """
+local want = tonumber(ARGV[2])
+if want < 0 then return -3 end
+local avail = redis.call('GET', KEYS[1])
+if not avail then return -1 end
+avail = tonumber(avail)
+local delta = want - tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+if delta > 0 and delta > avail then return -2 end
+if delta ~= 0 then redis.call('DECRBY', KEYS[1], delta) end
+if want > 0 then
+    redis.call('HSET', KEYS[2], ARGV[1], want)
+    redis.call('ZADD', KEYS[3], ARGV[3], ARGV[4])
+else
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('ZREM', KEYS[3], ARGV[4])
+end
+return avail - delta
+"""
+
+# KEYS: avail, holds, expiry   ARGV: user, qty, floor, expires_at, member
+# Adds qty to the user's hold, counting from at least floor (the cart line's
+# quantity, in case its hold lapsed). Concurrent calls each add their own qty.
+# Returns {remaining, new hold}, {-1} if the counter is not seeded yet, {-2}
+# if there is not enough stock.
+_EXTEND = """
+local avail = redis.call('GET', KEYS[1])
+if not avail then return {-1} end
+avail = tonumber(avail)
+local held = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+local want = math.max(held, tonumber(ARGV[3])) + tonumber(ARGV[2])
+if want < 0 then want = 0 end
+local delta = want - held
+if delta > 0 and delta > avail then return {-2} end
+if delta ~= 0 then redis.call('DECRBY', KEYS[1], delta) end
+if want > 0 then
+    redis.call('HSET', KEYS[2], ARGV[1], want)
+    redis.call('ZADD', KEYS[3], ARGV[4], ARGV[5])
+else
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('ZREM', KEYS[3], ARGV[5])
+end
+return {avail - delta, want}
+"""
+
+# KEYS: expiry, avail1, holds1, avail2, holds2, ...
+# ARGV: user, expires_at, qty1, member1, qty2, member2, ...
+# All-or-nothing version of _RESERVE. Returns {0} on success, {-3, i...} for
+# negative quantities, {-1, i...} for SKUs whose counters need seeding,
+# {-2, i...} for SKUs short of stock.
+_RESERVE_MANY = """
+local n = (#KEYS - 1) / 2
+local invalid, unseeded, short, deltas = {}, {}, {}, {}
+for i = 1, n do
+    if tonumber(ARGV[1 + 2 * i]) < 0 then table.insert(invalid, i) end
+end
+if #invalid > 0 then return {-3, unpack(invalid)} end
+for i = 1, n do
+    local avail = redis.call('GET', KEYS[2 * i])
+    if not avail then
+        table.insert(unseeded, i)
+    else
+        local delta = tonumber(ARGV[1 + 2 * i]) - tonumber(redis.call('HGET', KEYS[2 * i + 1], ARGV[1]) or '0')
+        deltas[i] = delta
+        if delta > 0 and delta > tonumber(avail) then table.insert(short, i) end
+    end
+end
+if #unseeded > 0 then return {-1, unpack(unseeded)} end
+if #short > 0 then return {-2, unpack(short)} end
+for i = 1, n do
+    local want = tonumber(ARGV[1 + 2 * i])
+    if deltas[i] ~= 0 then redis.call('DECRBY', KEYS[2 * i], deltas[i]) end
+    if want > 0 then
+        redis.call('HSET', KEYS[2 * i + 1], ARGV[1], want)
+        redis.call('ZADD', KEYS[1], ARGV[2], ARGV[2 + 2 * i])
+    else
+        redis.call('HDEL', KEYS[2 * i + 1], ARGV[1])
+        redis.call('ZREM', KEYS[1], ARGV[2 + 2 * i])
+    end
+end
+return {0}
+"""
+
+# KEYS: avail, holds   ARGV: stock, ttl
+# Availability is on-hand stock minus everything currently held.
+_SEED = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+local held = 0
+for _, qty in ipairs(redis.call('HVALS', KEYS[2])) do held = held + tonumber(qty) end
+redis.call('SET', KEYS[1], tonumber(ARGV[1]) - held, 'EX', ARGV[2])
+return 1
+"""
+
+# KEYS: avail, holds, expiry   ARGV: user, member, mode, now
+# mode: 'release' gives the units back, 'consume' drops the hold because the
+# units were sold (MySQL stock already went down), 'expire' is 'release' but
+# only if the hold is still past its deadline. Returns the quantity dropped.
+_RELEASE = """
+if ARGV[3] == 'expire' then
+    local deadline = redis.call('ZSCORE', KEYS[3], ARGV[2])
+    if deadline and tonumber(deadline) > tonumber(ARGV[4]) then return 0 end
+end
+local held = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[2])
+if held > 0 and ARGV[3] ~= 'consume' and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('INCRBY', KEYS[1], held)
+end
+return held
+"""
+
+
+class StockReservations:
+    """
+    Cart-time stock holds, enforced atomically in Redis.
+
+    avail:{sku}   units still free to reserve (stock minus active holds)
+    holds:{sku}   hash user_id -> units held
+    holds:expiry  zset "{sku}|{user_id}" -> unix deadline
+
+    Each operation is one Lua script, so concurrent add-to-carts cannot
+    oversell. Counters are seeded lazily from StockCache, and dropped by
+    StockCache.refresh() whenever stock changes in MySQL. Holds lapse after
+    STOCK_HOLD_TTL_SEC; the reconcile job releases them and mirrors active
+    holds into the stock_reservations table.
+    """
+    AVAIL_KEY = "avail:{sku}"
+    HOLDS_KEY = "holds:{sku}"
+    EXPIRY_KEY = "holds:expiry"
+    AVAIL_TTL = 86400
+
+    _scripts = None
+
+    @classmethod
+    def _get_scripts(cls):
+        redis = RedisClient.get_client()
+        if cls._scripts is None:
+            cls._scripts = (
+                redis.register_script(_RESERVE),
+                redis.register_script(_SEED),
+                redis.register_script(_RELEASE),
+                redis.register_script(_RESERVE_MANY),
+                redis.register_script(_EXTEND),
+            )
+        return cls._scripts
+
+    @staticmethod
+    def _keys(sku: Sku) -> List[str]:
+        sid = sku_id(sku)
+        return [
+            StockReservations.AVAIL_KEY.format(sku=sid),
+            StockReservations.HOLDS_KEY.format(sku=sid),
+            StockReservations.EXPIRY_KEY,
+        ]
+
+    @staticmethod
+    def _member(sku: Sku, user_id) -> str:
+        return f"{sku_id(sku)}|{user_id}"
+
+    @classmethod
+    def reserve(cls, user_id, sku: Sku, quantity: int) -> Optional[int]:
+        """
+        Sets the user's hold on sku to quantity (0 drops it) and returns the
+        units still available to others, or None if there is not enough stock
+        or quantity is negative.
+        Falls back to a plain (non-atomic) stock check when Redis is down.
+        """
+        try:
+            reserve, seed, _, _, _ = cls._get_scripts()
+            keys = cls._keys(sku)
+            args = [user_id, quantity, int(time.time()) + settings.STOCK_HOLD_TTL_SEC, cls._member(sku, user_id)]
+
+            result = reserve(keys=keys, args=args)
+            if result == -1:
+                seed(keys=keys[:2], args=[StockCache.get(*sku), cls.AVAIL_TTL])
+                result = reserve(keys=keys, args=args)
+            return result if result >= 0 else None
+        except Exception as e:
+            log.error("Stock reservation failed, falling back to stock check", extra={"sku": sku_id(sku), "error": str(e)})
+            stock = StockCache.get(*sku)
+            return stock - quantity if 0 <= quantity <= stock else None
+
+    @classmethod
+    def extend(cls, user_id, sku: Sku, quantity: int, floor: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Adds quantity to the user's hold on sku (negative gives units back),
+        starting from at least floor. Unlike reserve() this is additive, so
+        concurrent increments of one cart line each get their units held.
+        Returns (units still available, new hold), or None if there is not enough stock.
+        """
+        try:
+            _, seed, _, _, extend = cls._get_scripts()
+            keys = cls._keys(sku)
+            args = [user_id, quantity, floor, int(time.time()) + settings.STOCK_HOLD_TTL_SEC, cls._member(sku, user_id)]
+
+            result = extend(keys=keys, args=args)
+            if result[0] == -1:
+                seed(keys=keys[:2], args=[StockCache.get(*sku), cls.AVAIL_TTL])
+                result = extend(keys=keys, args=args)
+            return (result[0], result[1]) if result[0] >= 0 else None
+        except Exception as e:
+            log.error("Stock reservation failed, falling back to stock check", extra={"sku": sku_id(sku), "error": str(e)})
+            stock, held = StockCache.get(*sku), floor + quantity
+            return (stock - held, held) if held <= stock else None
+
+    @classmethod
+    def reserve_many(cls, user_id, holds: List[Tuple[Sku, int]]) -> List[Sku]:
+        """
+        Sets several holds at once (quantity 0 drops one), all or nothing.
+        Returns the SKUs that are short of stock (or given a negative quantity);
+        empty means every hold was applied.
+        """
+        holds = list(dict(holds).items())
+        if not holds:
+            return []
+        try:
+            _, seed, _, reserve_many, _ = cls._get_scripts()
+            keys = [cls.EXPIRY_KEY]
+            args = [user_id, int(time.time()) + settings.STOCK_HOLD_TTL_SEC]
+            for sku, quantity in holds:
+                keys.extend(cls._keys(sku)[:2])
+                args.extend([quantity, cls._member(sku, user_id)])
+
+            result = reserve_many(keys=keys, args=args)
+            if result[0] == -1:
+                unseeded = [holds[i - 1][0] for i in result[1:]]
+                levels = StockCache.get_many(unseeded)
+                pipe = RedisClient.get_client().pipeline(transaction=False)
+                for sku in unseeded:
+                    seed(keys=cls._keys(sku)[:2], args=[levels[sku], cls.AVAIL_TTL], client=pipe)
+                pipe.execute()
+                result = reserve_many(keys=keys, args=args)
+            # Anything but {0} (short of stock, negative, or a counter dropped again mid-seed) rejects the batch.
+            return [holds[i - 1][0] for i in result[1:]]
+        except Exception as e:
+            log.error("Batch stock reservation failed, falling back to stock check", extra={"error": str(e)})
+            levels = StockCache.get_many([sku for sku, _ in holds])
+            return [sku for sku, quantity in holds if quantity < 0 or quantity > levels[sku]]
+
+    @classmethod
+    def _drop(cls, user_id, sku: Sku, mode: str) -> int:
+        try:
+            _, _, release, _, _ = cls._get_scripts()
+            return release(keys=cls._keys(sku), args=[user_id, cls._member(sku, user_id), mode, int(time.time())])
+        except Exception as e:
+            log.error("Stock hold release failed", extra={"sku": sku_id(sku), "mode": mode, "error": str(e)})
+            return 0
+
+    @classmethod
+    def release(cls, user_id, sku: Sku) -> int:
+        """Gives the user's held units back (item removed from cart)."""
+        return cls._drop(user_id, sku, "release")
+
+    @classmethod
+    def consume(cls, user_id, sku: Sku) -> int:
+        """Drops the hold without returning units: they were sold and MySQL stock was decremented."""
+        return cls._drop(user_id, sku, "consume")
+
+    @classmethod
+    def release_expired(cls, limit: int = 5000) -> int:
+        """Releases up to limit holds past their deadline. Returns how many were released."""
+        redis = RedisClient.get_client()
+        members = redis.zrangebyscore(cls.EXPIRY_KEY, "-inf", int(time.time()), start=0, num=limit)
+        released = 0
+        for member in members:
+            sid, user_id = member.rsplit("|", 1)
+            if cls._drop(user_id, parse_sku_id(sid), "expire"):
+                released += 1
+        return released
+
+    @classmethod
+    def active_holds(cls, batch_size: int = 500) -> Iterator[List[Tuple[int, Sku, int, int]]]:
+        """Yields batches of (user_id, sku, quantity, expires_at) for every live hold."""
+        redis = RedisClient.get_client()
+        batch = []
+        for entry in redis.zscan_iter(cls.EXPIRY_KEY, count=batch_size):
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                yield cls._resolve(redis, batch)
+                batch = []
+        if batch:
+            yield cls._resolve(redis, batch)
+
+    @classmethod
+    def _resolve(cls, redis, entries) -> List[Tuple[int, Sku, int, int]]:
+        pipe = redis.pipeline(transaction=False)
+        parsed = []
+        for member, deadline in entries:
+            sid, user_id = member.rsplit("|", 1)
+            parsed.append((user_id, sid, deadline))
+            pipe.hget(cls.HOLDS_KEY.format(sku=sid), user_id)
+        return [
+            (int(user_id), parse_sku_id(sid), int(qty), int(deadline))
+            for (user_id, sid, deadline), qty in zip(parsed, pipe.execute())
+            if qty
+        ]
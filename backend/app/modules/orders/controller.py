@@ -0,0 +1,55 @@
+import hashlib
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from .services import OrderService
+from .webhooks import PaymentEvents, verify_signature
+from app.shared.response import success_response, error_response
+from app.shared.exceptions import AppError
+from app.shared.idempotency import idempotent
+from app.shared.config import settings
+
+orders_bp = Blueprint('orders', __name__)
+
+@orders_bp.route('', methods=['POST'])
+@jwt_required()
+@idempotent
+def place_order():
+    try:
+        user_id = int(get_jwt_identity())
+        order, complete = OrderService.place_order(user_id, request.get_json(silent=True))
+        if not complete:
+            # Order and stock are committed; poll GET /api/orders/<id> for the payment details.
+            return success_response("Order placed, payment is being prepared", order, 202)
+        return success_response("Order placed", order, 201)
+    except AppError as e:
+        return error_response(e.message, status_code=e.status_code, details=e.details)
+    except Exception as e:
+        return error_response(str(e), status_code=500)
+
+@orders_bp.route('/<int:order_id>', methods=['GET'])
+@jwt_required()
+def get_order(order_id):
+    try:
+        user_id = int(get_jwt_identity())
+        order = OrderService.get_order(user_id, order_id)
+        return success_response("Order fetched", order)
+    except AppError as e:
+        return error_response(e.message, status_code=e.status_code)
+    except Exception as e:
+        return error_response(str(e), status_code=500)
+
+@orders_bp.route('/webhooks/razorpay', methods=['POST'])
+def razorpay_webhook():
+    # Verify and enqueue only; app.jobs.payments applies the event.
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        return error_response("Webhook not configured", status_code=503)
+    body = request.get_data(cache=False)
+    if not verify_signature(body, request.headers.get('X-Razorpay-Signature')):
+        return error_response("Invalid signature", error_code="INVALID_SIGNATURE", status_code=400)
+    event_id = request.headers.get('X-Razorpay-Event-Id') or hashlib.sha1(body).hexdigest()
+    try:
+        PaymentEvents.append(event_id, body)
+    except Exception as e:
+        # Non-2xx makes Razorpay redeliver later.
+        return error_response(str(e), status_code=500)
+    return success_response("Event accepted")
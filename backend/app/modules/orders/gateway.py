@@ -0,0 +1,74 @@
+import threading
+import uuid
+from typing import Dict, Optional
+
+import requests
+
+from app.shared.config import settings
+from app.shared.http_client import make_session
+from app.shared.logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+class GatewayError(Exception):
+    """The gateway rejected the call or could not be reached within the budget."""
+
+
+class RazorpayGateway:
+    """
+    Minimal Razorpay Orders API client over a pooled keep-alive session.
+    RAZORPAY_API_URL can point at a local stub server in tests.
+    """
+    _session: Optional[requests.Session] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    session = make_session(pool_size=20)
+                    session.auth = (settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+                    cls._session = session
+        return cls._session
+
+    @classmethod
+    def create_order(cls, amount_paise: int, receipt: str, notes: Dict = None, timeout: float = None) -> Dict:
+        try:
+            resp = cls._get_session().post(
+                f"{settings.RAZORPAY_API_URL}/orders",
+                json={"amount": amount_paise, "currency": "INR", "receipt": receipt, "notes": notes or {}},
+                timeout=timeout or settings.RAZORPAY_TIMEOUT_SEC,
+            )
+        except requests.RequestException as e:
+            raise GatewayError(f"Razorpay unreachable: {e}")
+        if resp.status_code >= 400:
+            raise GatewayError(f"Razorpay error {resp.status_code}: {resp.text[:200]}")
+        return resp.json()
+
+
+class StubGateway:
+    """Fake gateway orders for local development; only used with RAZORPAY_USE_STUB."""
+
+    @staticmethod
+    def create_order(amount_paise: int, receipt: str, notes: Dict = None, timeout: float = None) -> Dict:
+        return {
+            "id": f"order_stub_{uuid.uuid4().hex[:14]}",
+            "amount": amount_paise,
+            "currency": "INR",
+            "receipt": receipt,
+            "status": "created",
+        }
+
+
+def get_gateway():
+    """
+    The configured gateway, or None when Razorpay keys are missing. The stub is
+    never a silent fallback: a misconfigured deploy must not hand out fake orders.
+    """
+    if settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET:
+        return RazorpayGateway
+    if settings.RAZORPAY_USE_STUB:
+        return StubGateway
+    return None
@@ -0,0 +1,250 @@
+import json
+from typing import Dict, Iterable, List, Optional
+
+from app.modules.inventory.repository import parse_size_stock
+
+ITEM_COLUMNS = (
+    "product_id", "variant_id", "size", "name", "image", "price",
+    "discount_percent", "unit_price", "quantity", "line_total",
+)
+
+ORDER_COLUMNS = (
+    "id", "user_id", "status", "payment_method", "currency", "subtotal", "savings",
+    "total", "shipping_address", "gateway_order_id", "gateway_payment_id", "created_at", "updated_at",
+)
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+class OrderRepository:
+    """Orders and their items; every method runs on the caller's cursor/transaction."""
+
+    @staticmethod
+    def lock_user(cursor, user_id):
+        """Serialises checkouts per user: SELECT ... FOR UPDATE on the users row until commit."""
+        cursor.execute("SELECT id FROM users WHERE id = %s FOR UPDATE", (user_id,))
+        cursor.fetchone()
+
+    @staticmethod
+    def get_address(cursor, user_id, address_id) -> Optional[Dict]:
+        cursor.execute(
+            """
+            SELECT fullname, phone, alternate_phone, pincode, state, city, house, road, landmark, type, country
+            FROM addresses WHERE id = %s AND user_id = %s
+            """,
+            (address_id, user_id),
+        )
+        return cursor.fetchone()
+
+    @staticmethod
+    def lock_stock(cursor, product_ids: Iterable[int], variant_ids: Iterable[int]) -> Dict[tuple, Dict]:
+        """
+        Locks the stock rows behind an order (SELECT ... FOR UPDATE) and returns
+        {("product", id) | ("variant", id): {"stock": int, "sizes": {size: qty}}}.
+        Rows are locked in id order so concurrent checkouts cannot deadlock.
+        """
+        levels = {}
+        for kind, table, ids in (("product", "products", product_ids), ("variant", "product_variants", variant_ids)):
+            ids = sorted(set(ids))
+            if not ids:
+                continue
+            cursor.execute(
+                f"SELECT id, stock, size_stock FROM {table} WHERE id IN ({_placeholders(ids)}) ORDER BY id FOR UPDATE",
+                tuple(ids),
+            )
+            for row in cursor.fetchall():
+                levels[(kind, row["id"])] = {"stock": int(row["stock"] or 0), "sizes": parse_size_stock(row["size_stock"])}
+        return levels
+
+    @staticmethod
+    def save_stock(cursor, levels: Dict[tuple, Dict]):
+        """Writes back levels from lock_stock: one executemany per table."""
+        for kind, table in (("product", "products"), ("variant", "product_variants")):
+            rows = [
+                (level["stock"], json.dumps(level["sizes"]) if level["sizes"] else None, owner_id)
+                for (owner_kind, owner_id), level in levels.items()
+                if owner_kind == kind
+            ]
+            if rows:
+                cursor.executemany(f"UPDATE {table} SET stock = %s, size_stock = %s WHERE id = %s", rows)
+
+    @staticmethod
+    def create(cursor, user_id, status: str, payment_method: str, totals: Dict, address: Dict) -> int:
+        cursor.execute(
+            """
+            INSERT INTO orders (user_id, status, payment_method, subtotal, savings, total, shipping_address)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            (user_id, status, payment_method, totals["subtotal"], totals["savings"], totals["total"],
+             json.dumps(address, default=str)),
+        )
+        return cursor.lastrowid
+
+    @staticmethod
+    def add_items(cursor, order_id: int, items: List[Dict]):
+        cursor.executemany(
+            f"INSERT INTO order_items (order_id, {', '.join(ITEM_COLUMNS)}) VALUES (%s, {_placeholders(ITEM_COLUMNS)})",
+            [(order_id, *(item.get(col) for col in ITEM_COLUMNS)) for item in items],
+        )
+
+    @staticmethod
+    def get(cursor, order_id: int, user_id=None) -> Optional[Dict]:
+        """The order with its items; user_id restricts it to its owner."""
+        sql = f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders WHERE id = %s"
+        params = [order_id]
+        if user_id is not None:
+            sql += " AND user_id = %s"
+            params.append(user_id)
+        cursor.execute(sql, tuple(params))
+        order = cursor.fetchone()
+        if not order:
+            return None
+        cursor.execute(f"SELECT {', '.join(ITEM_COLUMNS)} FROM order_items WHERE order_id = %s ORDER BY id", (order_id,))
+        order["items"] = cursor.fetchall()
+        if isinstance(order.get("shipping_address"), str):
+            order["shipping_address"] = json.loads(order["shipping_address"])
+        return order
+
+    @staticmethod
+    def set_gateway_order(cursor, order_id: int, gateway_order_id: str) -> bool:
+        """Records the gateway order once; a second caller (task retry, race) is a no-op."""
+        cursor.execute(
+            "UPDATE orders SET gateway_order_id = %s WHERE id = %s AND gateway_order_id IS NULL",
+            (gateway_order_id, order_id),
+        )
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def set_status(cursor, order_id: int, status: str, from_statuses: Iterable[str]) -> bool:
+        """Moves an order to status only from one of from_statuses."""
+        from_statuses = list(from_statuses)
+        cursor.execute(
+            f"UPDATE orders SET status = %s WHERE id = %s AND status IN ({_placeholders(from_statuses)})",
+            (status, order_id, *from_statuses),
+        )
+        return cursor.rowcount > 0
+
+    # --- Unpaid order expiry (app.jobs.orders) ---
+
+    @staticmethod
+    def find_stale(cursor, statuses: Iterable[str], max_age_sec: int, limit: int) -> List[int]:
+        """Ids of orders in statuses created more than max_age_sec ago, oldest first."""
+        statuses = list(statuses)
+        cursor.execute(
+            f"""
+            SELECT id FROM orders
+            WHERE status IN ({_placeholders(statuses)}) AND created_at < NOW() - INTERVAL %s SECOND
+            ORDER BY created_at, id LIMIT %s
+            """,
+            (*statuses, max_age_sec, limit),
+        )
+        return [row["id"] for row in cursor.fetchall()]
+
+    @staticmethod
+    def lock_orders(cursor, order_ids: List[int], statuses: Iterable[str]) -> List[int]:
+        """Locks the orders (by primary key only, no gap locks) that are still in statuses."""
+        if not order_ids:
+            return []
+        statuses = list(statuses)
+        cursor.execute(
+            f"""
+            SELECT id FROM orders WHERE id IN ({_placeholders(order_ids)}) AND status IN ({_placeholders(statuses)})
+            ORDER BY id FOR UPDATE
+            """,
+            (*order_ids, *statuses),
+        )
+        return [row["id"] for row in cursor.fetchall()]
+
+    @staticmethod
+    def get_items_of(cursor, order_ids: List[int]) -> List[Dict]:
+        if not order_ids:
+            return []
+        cursor.execute(
+            f"SELECT order_id, product_id, variant_id, size, quantity FROM order_items WHERE order_id IN ({_placeholders(order_ids)})",
+            tuple(order_ids),
+        )
+        return cursor.fetchall()
+
+    @staticmethod
+    def set_statuses(cursor, order_ids: List[int], status: str, from_statuses: Iterable[str]) -> int:
+        """set_status for many orders in one UPDATE."""
+        if not order_ids:
+            return 0
+        from_statuses = list(from_statuses)
+        cursor.execute(
+            f"""
+            UPDATE orders SET status = %s
+            WHERE id IN ({_placeholders(order_ids)}) AND status IN ({_placeholders(from_statuses)})
+            """,
+            (status, *order_ids, *from_statuses),
+        )
+        return cursor.rowcount
+
+    # --- Payment webhooks (app.jobs.payments) ---
+
+    @staticmethod
+    def seen_events(cursor, event_ids: List[str]) -> set:
+        if not event_ids:
+            return set()
+        cursor.execute(
+            f"SELECT event_id FROM payment_events WHERE event_id IN ({_placeholders(event_ids)})",
+            tuple(event_ids),
+        )
+        return {row["event_id"] for row in cursor.fetchall()}
+
+    @staticmethod
+    def record_events(cursor, events: List[tuple]):
+        """events: (event_id, event, gateway_order_id) rows."""
+        if events:
+            cursor.executemany(
+                "INSERT IGNORE INTO payment_events (event_id, event, gateway_order_id) VALUES (%s, %s, %s)",
+                events,
+            )
+
+    @staticmethod
+    def mark_paid(cursor, payments: Dict[str, str], from_statuses: Iterable[str]) -> int:
+        """payments: gateway_order_id -> payment id. One UPDATE for the whole batch."""
+        if not payments:
+            return 0
+        from_statuses = list(from_statuses)
+        order_ids = list(payments)
+        cases = " ".join(["WHEN %s THEN %s"] * len(order_ids))
+        cursor.execute(
+            f"""
+            UPDATE orders SET status = 'paid', gateway_payment_id = CASE gateway_order_id {cases} END
+            WHERE gateway_order_id IN ({_placeholders(order_ids)}) AND status IN ({_placeholders(from_statuses)})
+            """,
+            (*(v for item in payments.items() for v in item), *order_ids, *from_statuses),
+        )
+        return cursor.rowcount
+
+    @staticmethod
+    def with_status(cursor, gateway_order_ids: List[str], statuses: Iterable[str]) -> List[str]:
+        """The gateway order ids among gateway_order_ids whose order is in one of statuses."""
+        if not gateway_order_ids:
+            return []
+        statuses = list(statuses)
+        cursor.execute(
+            f"""
+            SELECT gateway_order_id FROM orders
+            WHERE gateway_order_id IN ({_placeholders(gateway_order_ids)}) AND status IN ({_placeholders(statuses)})
+            """,
+            (*gateway_order_ids, *statuses),
+        )
+        return [row["gateway_order_id"] for row in cursor.fetchall()]
+
+    @staticmethod
+    def mark_failed(cursor, gateway_order_ids: List[str], from_statuses: Iterable[str]) -> int:
+        if not gateway_order_ids:
+            return 0
+        from_statuses = list(from_statuses)
+        cursor.execute(
+            f"""
+            UPDATE orders SET status = 'payment_failed'
+            WHERE gateway_order_id IN ({_placeholders(gateway_order_ids)}) AND status IN ({_placeholders(from_statuses)})
+            """,
+            (*gateway_order_ids, *from_statuses),
+        )
+        return cursor.rowcount
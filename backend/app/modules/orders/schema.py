@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field, validator
+
+
+class PlaceOrderSchema(BaseModel):
+    address_id: int = Field(..., gt=0)
+    payment_method: str = Field("razorpay", description="razorpay | cod")
+
+    @validator('payment_method')
+    def validate_payment_method(cls, v):
+        v = (v or "").lower()
+        if v not in ('razorpay', 'cod'):
+            raise ValueError("payment_method must be 'razorpay' or 'cod'")
+        return v
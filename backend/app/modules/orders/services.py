@@ -0,0 +1,218 @@
+from typing import Dict, List, Tuple
+
+from app.shared.config import settings
+from app.shared.database import get_cursor, transaction
+from app.shared.exceptions import AppError, ValidationError, NotFoundError
+from app.shared.logging_config import get_logger
+from app.modules.cart.pricing import CartPricing
+from app.modules.cart.store import CartStore
+from app.modules.catalog.events import CatalogEvents
+from app.modules.inventory.cache import StockCache, make_sku
+from app.modules.inventory.reservations import StockReservations
+from .gateway import GatewayError, get_gateway
+from .repository import OrderRepository
+from .schema import PlaceOrderSchema
+
+log = get_logger(__name__)
+
+PENDING_PAYMENT = "pending_payment"
+CONFIRMED = "confirmed"
+PAID = "paid"
+PAYMENT_FAILED = "payment_failed"
+CANCELLED = "cancelled"
+UNPAID_STATUSES = (PENDING_PAYMENT, PAYMENT_FAILED)
+
+
+def _take_stock(levels: Dict[tuple, Dict], lines: List[Dict]) -> List[str]:
+    """
+    Decrements the locked levels in place for every line. A sized line draws
+    from its size bucket and the owner's total. Returns the SKUs short of stock.
+    """
+    short = []
+    for line in lines:
+        owner = ("variant", int(line["variant_id"])) if line.get("variant_id") else ("product", int(line["product_id"]))
+        level = levels.get(owner)
+        qty = int(line["quantity"])
+        size = line.get("size")
+        if level is None or level["stock"] < qty or (size in level["sizes"] and level["sizes"][size] < qty):
+            short.append(line["cart_id"])
+            continue
+        level["stock"] -= qty
+        if size in level["sizes"]:
+            level["sizes"][size] -= qty
+    return short
+
+
+def _order_items(lines: List[Dict]) -> List[Dict]:
+    """order_items rows for priced cart lines (see CartPricing.price)."""
+    return [
+        {
+            "product_id": line["product_id"], "variant_id": line.get("variant_id"), "size": line.get("size"),
+            "name": line["name"], "image": line.get("image"), "price": line["price"],
+            "discount_percent": line["discount_percent"], "unit_price": line["final_price"],
+            "quantity": line["quantity"], "line_total": line["line_total"],
+        }
+        for line in lines
+    ]
+
+
+def _return_stock(levels: Dict[tuple, Dict], items: List[Dict]):
+    """Inverse of _take_stock for the items of cancelled orders. Owners that no longer exist are skipped."""
+    for item in items:
+        owner = ("variant", int(item["variant_id"])) if item.get("variant_id") else ("product", int(item["product_id"]))
+        level = levels.get(owner)
+        if level is None:
+            continue
+        qty = int(item["quantity"])
+        level["stock"] += qty
+        size = item.get("size")
+        if size in level["sizes"]:
+            level["sizes"][size] += qty
+
+
+class OrderService:
+
+    @staticmethod
+    def place_order(user_id, data: dict) -> Tuple[Dict, bool]:
+        """
+        Turns the user's cart into an order. The user's row is locked first, so
+        concurrent checkouts for one user run one after the other. Stock rows
+        are locked, checked and decremented in the same transaction that writes
+        the order, at current catalog prices. For Razorpay the gateway order is
+        then created within RAZORPAY_TIMEOUT_SEC; if the gateway is slower or
+        failing, creation is handed to a Celery task and the order is returned
+        without it.
+        Returns (order, complete), complete False when the gateway order is still pending.
+        """
+        try:
+            req = PlaceOrderSchema(**(data or {}))
+        except Exception as e:
+            raise ValidationError(str(e))
+        gateway = get_gateway() if req.payment_method == "razorpay" else None
+        if req.payment_method == "razorpay" and gateway is None:
+            # Refuse before any stock is taken.
+            raise AppError("Online payment is not available right now", status_code=503)
+
+        status = PENDING_PAYMENT if req.payment_method == "razorpay" else CONFIRMED
+        emptied = None
+        try:
+            with transaction() as (conn, cursor):
+                # One checkout per user at a time. A double-submitted POST waits
+                # here and then reads the cart the first one emptied.
+                OrderRepository.lock_user(cursor, user_id)
+                lines = CartStore.get_lines(user_id)
+                if not lines:
+                    raise ValidationError("Cart is empty")
+                snapshot = [dict(line) for line in lines]
+                totals = CartPricing.price(lines)
+                unavailable = [line["cart_id"] for line in lines if line["unavailable"]]
+                if unavailable:
+                    raise ValidationError("Some items are no longer available", details={"items": unavailable})
+
+                address = OrderRepository.get_address(cursor, user_id, req.address_id)
+                if not address:
+                    raise NotFoundError("Address not found")
+
+                levels = OrderRepository.lock_stock(
+                    cursor,
+                    [line["product_id"] for line in lines if not line.get("variant_id")],
+                    [line["variant_id"] for line in lines if line.get("variant_id")],
+                )
+                short = _take_stock(levels, lines)
+                if short:
+                    raise ValidationError("Not enough stock", details={"items": short})
+                OrderRepository.save_stock(cursor, levels)
+
+                order_totals = {"subtotal": totals["subtotal"], "savings": totals["savings"], "total": totals["subtotal"]}
+                order_id = OrderRepository.create(cursor, user_id, status, req.payment_method, order_totals, address)
+                OrderRepository.add_items(cursor, order_id, _order_items(lines))
+
+                # Emptied before the commit releases the user lock; restored below if the commit fails.
+                CartStore.clear(user_id)
+                emptied = snapshot
+        except Exception:
+            if emptied:
+                CartStore.apply(user_id, emptied, [], [])
+            raise
+
+        # Committed: the units are sold, so drop the holds without returning them.
+        for line in lines:
+            StockReservations.consume(user_id, make_sku(line["product_id"], line.get("variant_id"), line.get("size")))
+        for product_id in {int(line["product_id"]) for line in lines}:
+            CatalogEvents.product_changed(product_id)
+            StockCache.refresh(product_id)
+
+        order = {"order_id": order_id, "status": status, "payment_method": req.payment_method, **order_totals}
+        if req.payment_method != "razorpay":
+            return order, True
+
+        amount_paise = int(round(order_totals["total"] * 100))
+        try:
+            gateway_order = gateway.create_order(
+                amount_paise, receipt=f"order_{order_id}", notes={"order_id": order_id, "user_id": user_id}
+            )
+        except GatewayError as e:
+            # Imported here: app.jobs.orders imports this package, and is also loaded first by Celery.
+            from app.jobs.orders import create_gateway_order
+
+            log.warning("Gateway order deferred to worker", extra={"order_id": order_id, "error": str(e)})
+            create_gateway_order.delay(order_id)
+            return order, False
+
+        with get_cursor(commit=True) as cursor:
+            OrderRepository.set_gateway_order(cursor, order_id, gateway_order["id"])
+        order.update(OrderService._payment_fields(gateway_order["id"], amount_paise))
+        return order, True
+
+    @staticmethod
+    def expire_unpaid(max_age_sec: int, batch_size: int = 200) -> int:
+        """
+        Cancels up to batch_size orders that are still pending_payment or
+        payment_failed max_age_sec after checkout, and returns their units to
+        stock in the same transaction. Returns how many orders were cancelled.
+        """
+        with get_cursor() as cursor:
+            candidates = OrderRepository.find_stale(cursor, UNPAID_STATUSES, max_age_sec, batch_size)
+        if not candidates:
+            return 0
+
+        with transaction() as (conn, cursor):
+            # Re-checked under the row lock: a payment may have landed since.
+            order_ids = OrderRepository.lock_orders(cursor, candidates, UNPAID_STATUSES)
+            if not order_ids:
+                return 0
+            items = OrderRepository.get_items_of(cursor, order_ids)
+            levels = OrderRepository.lock_stock(
+                cursor,
+                [item["product_id"] for item in items if not item.get("variant_id")],
+                [item["variant_id"] for item in items if item.get("variant_id")],
+            )
+            _return_stock(levels, items)
+            OrderRepository.save_stock(cursor, levels)
+            OrderRepository.set_statuses(cursor, order_ids, CANCELLED, UNPAID_STATUSES)
+
+        for product_id in {int(item["product_id"]) for item in items}:
+            CatalogEvents.product_changed(product_id)
+            StockCache.refresh(product_id)
+        log.info("Expired unpaid orders", extra={"count": len(order_ids)})
+        return len(order_ids)
+
+    @staticmethod
+    def _payment_fields(gateway_order_id, amount_paise: int) -> Dict:
+        """What the frontend needs to open Razorpay Checkout."""
+        return {
+            "razorpay_order_id": gateway_order_id,
+            "razorpay_key_id": settings.RAZORPAY_KEY_ID,
+            "amount_paise": amount_paise,
+            "currency": "INR",
+        }
+
+    @staticmethod
+    def get_order(user_id, order_id: int) -> Dict:
+        with get_cursor() as cursor:
+            order = OrderRepository.get(cursor, order_id, user_id)
+        if not order:
+            raise NotFoundError("Order not found")
+        if order["status"] == PENDING_PAYMENT and order["gateway_order_id"]:
+            order.update(OrderService._payment_fields(order["gateway_order_id"], int(round(float(order["total"]) * 100))))
+        return order
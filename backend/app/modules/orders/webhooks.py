@@ -0,0 +1,135 @@
+import hashlib
+import hmac
+import json
+import os
+import socket
+from typing import Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+
+from app.shared.config import settings
+from app.shared.database import transaction
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+from .repository import OrderRepository
+from .services import CANCELLED, PAYMENT_FAILED, PENDING_PAYMENT
+
+log = get_logger(__name__)
+
+PAID_EVENTS = ("payment.captured", "order.paid")
+FAILED_EVENTS = ("payment.failed",)
+
+
+def verify_signature(body: bytes, signature: Optional[str]) -> bool:
+    """X-Razorpay-Signature is the hex HMAC-SHA256 of the raw body with the webhook secret."""
+    if not settings.RAZORPAY_WEBHOOK_SECRET or not signature:
+        return False
+    expected = hmac.new(settings.RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def _parse(event_id: str, body: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """(event, gateway_order_id, payment_id) for a raw webhook body, None if unusable."""
+    try:
+        payload = json.loads(body)
+        entity = payload.get("payload", {}).get("payment", {}).get("entity", {})
+        order_id = entity.get("order_id") or payload.get("payload", {}).get("order", {}).get("entity", {}).get("id")
+        return payload.get("event", ""), order_id, entity.get("id")
+    except (ValueError, AttributeError) as e:
+        log.error("Unparseable payment event", extra={"event_id": event_id, "error": str(e)})
+        return None
+
+
+class PaymentEvents:
+    """
+    Razorpay webhook queue: razorpay:events, a Redis stream read by the
+    payment-workers consumer group.
+
+    The webhook view only verifies the signature and XADDs the raw body, so
+    its latency does not depend on MySQL. process_batch() (app.jobs.payments)
+    drains the stream: events are deduped against payment_events and applied
+    with one UPDATE per transition, in the same transaction that records
+    them. Entries are acked only after commit; entries left pending by a
+    crashed worker are reclaimed after CLAIM_IDLE_MS.
+    """
+    STREAM = "razorpay:events"
+    GROUP = "payment-workers"
+    MAXLEN = 100000
+    CLAIM_IDLE_MS = 60000
+
+    _group_ready = False
+
+    @classmethod
+    def append(cls, event_id: str, body: bytes) -> str:
+        """Raises on Redis errors so the webhook answers 5xx and Razorpay redelivers."""
+        return RedisClient.get_client().xadd(
+            cls.STREAM, {"event_id": event_id, "body": body.decode()}, maxlen=cls.MAXLEN, approximate=True
+        )
+
+    @classmethod
+    def _ensure_group(cls, redis):
+        if cls._group_ready:
+            return
+        try:
+            redis.xgroup_create(cls.STREAM, cls.GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        cls._group_ready = True
+
+    @staticmethod
+    def consumer_name() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def _read(cls, redis, consumer: str, count: int) -> List[Tuple[str, Dict]]:
+        """Stale pending entries first, then new ones."""
+        claimed = redis.xautoclaim(cls.STREAM, cls.GROUP, consumer, cls.CLAIM_IDLE_MS, "0-0", count=count)[1]
+        entries = [(entry_id, fields) for entry_id, fields in claimed if fields]
+        if len(entries) < count:
+            for _, stream_entries in redis.xreadgroup(cls.GROUP, consumer, {cls.STREAM: ">"}, count=count - len(entries)) or []:
+                entries.extend(stream_entries)
+        return entries
+
+    @classmethod
+    def process_batch(cls, consumer: str, batch_size: int = 500) -> int:
+        """Applies up to batch_size events. Returns how many stream entries were consumed."""
+        redis = RedisClient.get_client()
+        cls._ensure_group(redis)
+        entries = cls._read(redis, consumer, batch_size)
+        if not entries:
+            return 0
+
+        events = {}
+        for _, fields in entries:
+            parsed = _parse(fields.get("event_id", ""), fields.get("body", ""))
+            if parsed:
+                events.setdefault(fields.get("event_id"), parsed)
+
+        with transaction() as (conn, cursor):
+            seen = OrderRepository.seen_events(cursor, list(events))
+            fresh = {event_id: parsed for event_id, parsed in events.items() if event_id not in seen}
+
+            paid, failed = {}, []
+            for event, order_id, payment_id in fresh.values():
+                if not order_id:
+                    continue
+                if event in PAID_EVENTS:
+                    paid[order_id] = payment_id
+                elif event in FAILED_EVENTS:
+                    failed.append(order_id)
+            # A retry that succeeded wins over an earlier failed attempt in the same batch.
+            failed = [order_id for order_id in dict.fromkeys(failed) if order_id not in paid]
+
+            OrderRepository.mark_failed(cursor, failed, [PENDING_PAYMENT])
+            if OrderRepository.mark_paid(cursor, paid, [PENDING_PAYMENT, PAYMENT_FAILED]) < len(paid):
+                # Captured after expire_unpaid_orders cancelled the order and restocked it: needs a refund.
+                late = OrderRepository.with_status(cursor, list(paid), [CANCELLED])
+                if late:
+                    log.error("Payment captured for a cancelled order", extra={"gateway_order_ids": late})
+            OrderRepository.record_events(cursor, [(event_id, event, order_id) for event_id, (event, order_id, _) in fresh.items()])
+
+        redis.xack(cls.STREAM, cls.GROUP, *[entry_id for entry_id, _ in entries])
+        if seen:
+            log.info("Skipped duplicate payment events", extra={"count": len(seen)})
+        return len(entries)
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Hashable, List, Optional, Tuple
+
+Hits = List[Tuple[int, float]]
+
+
+class LFUCache:
+    """
+    Bounded least-frequently-used cache with O(1) get/put.
+
+    Entries are bucketed by hit count; eviction takes the oldest entry of the
+    lowest bucket, so a head-heavy query mix keeps its popular keys resident
+    while one-off queries churn through the bottom bucket.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._values = {}
+        self._freq = {}
+        self._buckets = defaultdict(OrderedDict)
+        self._min_freq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def _touch(self, key):
+        freq = self._freq[key]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        self._freq[key] = freq + 1
+        self._buckets[freq + 1][key] = None
+
+    def get(self, key: Hashable):
+        with self._lock:
+            if key not in self._values:
+                return None
+            self._touch(key)
+            return self._values[key]
+
+    def put(self, key: Hashable, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if key in self._values:
+                self._values[key] = value
+                self._touch(key)
+                return
+            if len(self._values) >= self.maxsize:
+                evicted, _ = self._buckets[self._min_freq].popitem(last=False)
+                if not self._buckets[self._min_freq]:
+                    del self._buckets[self._min_freq]
+                del self._values[evicted]
+                del self._freq[evicted]
+            self._values[key] = value
+            self._freq[key] = 1
+            self._buckets[1][key] = None
+            self._min_freq = 1
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._freq.clear()
+            self._buckets.clear()
+            self._min_freq = 0
+
+
+class SearchResultCache:
+    """
+    Per-process cache of ranked search hits, [(product_id, relevance)], keyed
+    by normalized query. Rows are hydrated separately, so cached entries stay small.
+
+    Entries belong to a catalog version (the index's applied_version(), or
+    CatalogVersion for the MySQL fallback); the first lookup under another
+    version drops everything.
+    """
+    MAX_ENTRIES = 5000
+
+    _cache = LFUCache(MAX_ENTRIES)
+    _version: Optional[str] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _sync_version(cls, version: Optional[str]) -> bool:
+        if version is None:
+            return False
+        if version != cls._version:
+            with cls._lock:
+                if version != cls._version:
+                    cls._cache.clear()
+                    cls._version = version
+        return True
+
+    @classmethod
+    def get(cls, version: Optional[str], key: Hashable) -> Optional[Hits]:
+        if not cls._sync_version(version):
+            return None
+        return cls._cache.get(key)
+
+    @classmethod
+    def put(cls, version: Optional[str], key: Hashable, hits: Hits):
+        if cls._sync_version(version):
+            cls._cache.put(key, hits)
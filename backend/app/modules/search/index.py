@@ -0,0 +1,178 @@
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """NFKC + casefold + collapsed whitespace. Shared by indexing and querying."""
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    In-memory inverted index with BM25 ranking.
+
+    Fields are weighted (name > brand/tags > description) by counting a term
+    occurrence FIELD_WEIGHTS[field] times, a cheap BM25F approximation.
+    Query terms that are not in the vocabulary are expanded by prefix
+    (sorted vocabulary + bisect) and then by trigram similarity, which gives
+    typo tolerance without touching MySQL.
+
+    All public methods are thread-safe; writes (admin edits) are rare and
+    reads hold the lock only while scoring.
+    """
+    FIELD_WEIGHTS = {"name": 3, "brand": 2, "tags": 2, "description": 1}
+    K1 = 1.2
+    B = 0.75
+
+    MIN_PREFIX_LEN = 2
+    MAX_EXPANSIONS = 10
+    MIN_TRIGRAM_SIMILARITY = 0.4
+    PREFIX_PENALTY = 0.8
+    FUZZY_PENALTY = 0.6
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Set[str]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+        self._vocab: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    # ---------------- writes ----------------
+
+    def add(self, doc_id: int, fields: Dict[str, Optional[str]]):
+        """Indexes (or re-indexes) a document."""
+        tf: Dict[str, int] = defaultdict(int)
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                tf[term] += weight
+
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, freq in tf.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._vocab, term)
+                    for gram in trigrams(term):
+                        self._trigrams[gram].add(term)
+                postings[doc_id] = freq
+            length = sum(tf.values())
+            self._doc_terms[doc_id] = set(tf)
+            self._doc_len[doc_id] = length
+            self._total_len += length
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                idx = bisect_left(self._vocab, term)
+                if idx < len(self._vocab) and self._vocab[idx] == term:
+                    self._vocab.pop(idx)
+                for gram in trigrams(term):
+                    bucket = self._trigrams.get(gram)
+                    if bucket:
+                        bucket.discard(term)
+                        if not bucket:
+                            del self._trigrams[gram]
+
+    # ---------------- reads ----------------
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        out = []
+        idx = bisect_left(self._vocab, prefix)
+        while idx < len(self._vocab) and self._vocab[idx].startswith(prefix) and len(out) < self.MAX_EXPANSIONS:
+            out.append(self._vocab[idx])
+            idx += 1
+        return out
+
+    def _fuzzy_terms(self, term: str) -> List[Tuple[str, float]]:
+        grams = trigrams(term)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                overlap[candidate] += 1
+        scored = []
+        for candidate, shared in overlap.items():
+            similarity = shared / (len(grams) + len(trigrams(candidate)) - shared)
+            if similarity >= self.MIN_TRIGRAM_SIMILARITY:
+                scored.append((candidate, similarity))
+        scored.sort(key=lambda x: -x[1])
+        return scored[:self.MAX_EXPANSIONS]
+
+    def _expand(self, token: str) -> Iterable[Tuple[str, float]]:
+        """Maps a query token to (index_term, weight) pairs."""
+        expansions = {}
+        if token in self._postings:
+            expansions[token] = 1.0
+        if len(token) >= self.MIN_PREFIX_LEN:
+            for term in self._prefix_terms(token):
+                expansions.setdefault(term, self.PREFIX_PENALTY)
+        if not expansions:
+            for term, similarity in self._fuzzy_terms(token):
+                expansions[term] = self.FUZZY_PENALTY * similarity
+        return expansions.items()
+
+    def search(self, query: str, limit: int = 100) -> List[Tuple[int, float]]:
+        """Returns [(doc_id, score)] ordered by descending BM25 score."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs:
+                return []
+            avg_len = self._total_len / n_docs
+            scores: Dict[int, float] = defaultdict(float)
+
+            for token in tokens:
+                # A document scores each query token once, via its best-matching expansion.
+                best: Dict[int, float] = {}
+                for term, weight in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, freq in postings.items():
+                        norm = self.K1 * (1 - self.B + self.B * self._doc_len[doc_id] / avg_len)
+                        score = weight * idf * freq * (self.K1 + 1) / (freq + norm)
+                        if score > best.get(doc_id, 0.0):
+                            best[doc_id] = score
+                for doc_id, score in best.items():
+                    scores[doc_id] += score
+
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], -x[0]))
+        return ranked[:limit]
@@ -0,0 +1,47 @@
+from typing import Dict, Iterable, List, Optional
+
+from app.shared.database import get_cursor
+
+_DOCUMENT_COLUMNS = """
+    p.id, p.name, p.brand, p.description, p.tags, p.category_id,
+    p.price, p.discount, p.stock,
+    COALESCE(p.primary_image_path, '') AS image_path
+"""
+
+
+class SearchRepository:
+
+    @staticmethod
+    def get_documents(product_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Rows needed to index and display products (all products when ids is None)."""
+        with get_cursor() as cursor:
+            if product_ids is None:
+                cursor.execute(f"SELECT {_DOCUMENT_COLUMNS} FROM products p")
+            else:
+                ids = list(product_ids)
+                if not ids:
+                    return []
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(f"SELECT {_DOCUMENT_COLUMNS} FROM products p WHERE p.id IN ({placeholders})", tuple(ids))
+            return cursor.fetchall()
+
+    @staticmethod
+    def fulltext_search(q: str, limit: int = 100) -> List[Dict]:
+        with get_cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    p.id, p.name, p.price, p.discount AS discount, p.stock,
+                    COALESCE(p.primary_image_path, '') AS image_path,
+                    MATCH(p.name, p.description) AGAINST (%s IN NATURAL LANGUAGE MODE) AS relevance
+                FROM products p
+                WHERE MATCH(p.name, p.description) AGAINST (%s IN NATURAL LANGUAGE MODE)
+                ORDER BY relevance DESC LIMIT %s
+            """, (q, q, limit))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_popularity() -> Dict[int, int]:
+        """Number of carts currently holding each product."""
+        with get_cursor() as cursor:
+            cursor.execute("SELECT product_id, COUNT(*) AS n FROM cart GROUP BY product_id")
+            return {row["product_id"]: row["n"] for row in cursor.fetchall()}
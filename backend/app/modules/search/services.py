@@ -0,0 +1,225 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.modules.catalog.cache import CategoryCache, CatalogVersion
+from app.modules.catalog.indexing import InProcessIndex
+from app.shared.logging_config import get_logger
+from app.shared.pubsub import PubSub
+from .cache import SearchResultCache
+from .index import SearchIndex, normalize_text
+from .repository import SearchRepository
+from .trie import PrefixTrie
+
+log = get_logger(__name__)
+
+
+class SearchService(InProcessIndex):
+    """
+    Serves /api/products/search from a per-process SearchIndex.
+    Until the index is ready, queries go to MySQL FULLTEXT.
+    """
+    MAX_RESULTS = 100
+
+    _lock = threading.Lock()
+    _building_pid: Optional[int] = None
+    _retry_at = 0.0
+    _applied_version: Optional[str] = None
+    _index: Optional[SearchIndex] = None
+    _docs: Dict[int, Dict] = {}
+
+    @classmethod
+    def _rebuild(cls):
+        rows = SearchRepository.get_documents()
+        index = SearchIndex()
+        docs = {}
+        for row in rows:
+            index.add(row["id"], row)
+            docs[row["id"]] = cls._display_fields(row)
+        cls._index, cls._docs = index, docs
+        log.info("Search index built", extra={"documents": len(docs)})
+
+    @classmethod
+    def refresh_product(cls, product_id: int):
+        index = cls._index
+        if index is None:
+            return
+        rows = SearchRepository.get_documents([product_id])
+        if rows:
+            index.add(product_id, rows[0])
+            cls._docs[product_id] = cls._display_fields(rows[0])
+        else:
+            index.remove(product_id)
+            cls._docs.pop(product_id, None)
+
+    @staticmethod
+    def _display_fields(row: Dict) -> Dict:
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "price": row["price"],
+            "discount": row["discount"],
+            "stock": row["stock"],
+            "image_path": row.get("image_path") or "",
+        }
+
+    @classmethod
+    def search(cls, q: str) -> List[Dict]:
+        source = "index" if cls._index is not None else "fulltext"
+        key = (source, normalize_text(q))
+        # Index hits are only as fresh as the refreshes this process has applied.
+        version = cls.applied_version() if source == "index" else CatalogVersion.get()
+
+        hits = SearchResultCache.get(version, key)
+        if hits is None:
+            hits = cls._rank(q)
+            SearchResultCache.put(version, key, hits)
+        return cls._hydrate(hits)
+
+    @classmethod
+    def _rank(cls, q: str) -> List[Tuple[int, float]]:
+        index = cls._index
+        if index is None:
+            cls.warm_up()
+            rows = SearchRepository.fulltext_search(q, cls.MAX_RESULTS)
+            return [(row["id"], float(row["relevance"])) for row in rows]
+        return [(doc_id, round(score, 4)) for doc_id, score in index.search(q, cls.MAX_RESULTS)]
+
+    @classmethod
+    def _hydrate(cls, hits: List[Tuple[int, float]]) -> List[Dict]:
+        docs = cls._docs
+        missing = [doc_id for doc_id, _ in hits if doc_id not in docs]
+        if missing:
+            docs = {**docs, **{row["id"]: cls._display_fields(row) for row in SearchRepository.get_documents(missing)}}
+
+        results = []
+        for doc_id, relevance in hits:
+            doc = docs.get(doc_id)
+            if doc is not None:
+                results.append({**doc, "relevance": relevance})
+        return results
+
+
+class SuggestService(InProcessIndex):
+    """
+    Typeahead over product names, brands and categories, served from a PrefixTrie.
+
+    Weights come from popularity (number of carts holding the product, plus one);
+    brands and categories weigh the sum of their products.
+    """
+    DEFAULT_LIMIT = 8
+
+    _lock = threading.Lock()
+    _building_pid: Optional[int] = None
+    _retry_at = 0.0
+    _applied_version: Optional[str] = None
+    _trie: Optional[PrefixTrie] = None
+    _popularity: Dict[int, int] = {}
+    _products: Dict[int, Dict] = {}  # product_id -> {"brand": norm, "category_id": id, "weight": w}
+    _brand_labels: Dict[str, str] = {}
+    _category_names: Dict[int, str] = {}
+
+    @classmethod
+    def warm_up(cls):
+        PubSub.subscribe(CategoryCache.CHANNEL, cls._on_categories_changed)
+        super().warm_up()
+
+    @classmethod
+    def _on_categories_changed(cls, _message: Optional[str]):
+        # This handler can run before CategoryCache's own one on the same message;
+        # drop the cached rows first so the reload reads the new names.
+        CategoryCache.clear()
+        cls._reload_categories()
+
+    @classmethod
+    def _rebuild(cls):
+        trie = PrefixTrie()
+        popularity = SearchRepository.get_popularity()
+        products, brand_labels = {}, {}
+        for row in SearchRepository.get_documents():
+            products[row["id"]] = cls._upsert_product(trie, row, popularity)
+            if products[row["id"]]["brand"]:
+                brand_labels.setdefault(products[row["id"]]["brand"], row["brand"].strip())
+
+        category_names = {c["id"]: c["name"] for c in CategoryCache.get_all()}
+        brand_weights: Dict[str, int] = {}
+        category_weights: Dict[int, int] = {}
+        for product in products.values():
+            if product["brand"]:
+                brand_weights[product["brand"]] = brand_weights.get(product["brand"], 0) + product["weight"]
+            category_weights[product["category_id"]] = category_weights.get(product["category_id"], 0) + product["weight"]
+
+        for brand, weight in brand_weights.items():
+            label = brand_labels[brand]
+            trie.upsert(("brand", brand), label, weight, {"type": "brand", "text": label})
+        for category_id, name in category_names.items():
+            trie.upsert(("category", category_id), name or "", category_weights.get(category_id, 0),
+                        {"type": "category", "id": category_id, "text": name})
+
+        cls._trie, cls._popularity, cls._products = trie, popularity, products
+        cls._brand_labels, cls._category_names = brand_labels, category_names
+        log.info("Suggest trie built", extra={"entries": len(trie)})
+
+    @staticmethod
+    def _upsert_product(trie: PrefixTrie, row: Dict, popularity: Dict[int, int]) -> Dict:
+        weight = 1 + popularity.get(row["id"], 0)
+        trie.upsert(("product", row["id"]), row["name"] or "", weight,
+                    {"type": "product", "id": row["id"], "text": row["name"]})
+        return {"brand": normalize_text(row.get("brand")), "category_id": row.get("category_id"), "weight": weight}
+
+    @classmethod
+    def _refresh_brand(cls, brand: str):
+        members = [p["weight"] for p in cls._products.values() if p["brand"] == brand]
+        if not members:
+            cls._trie.remove(("brand", brand))
+            cls._brand_labels.pop(brand, None)
+            return
+        label = cls._brand_labels[brand]
+        cls._trie.upsert(("brand", brand), label, sum(members), {"type": "brand", "text": label})
+
+    @classmethod
+    def _refresh_category(cls, category_id: int):
+        name = cls._category_names.get(category_id)
+        weight = sum(p["weight"] for p in cls._products.values() if p["category_id"] == category_id)
+        if not name:
+            cls._trie.remove(("category", category_id))
+            return
+        cls._trie.upsert(("category", category_id), name, weight,
+                         {"type": "category", "id": category_id, "text": name})
+
+    @classmethod
+    def _reload_categories(cls):
+        if cls._trie is None:
+            return
+        old_ids = set(cls._category_names)
+        cls._category_names = {c["id"]: c["name"] for c in CategoryCache.get_all()}
+        for category_id in old_ids | set(cls._category_names):
+            cls._refresh_category(category_id)
+
+    @classmethod
+    def refresh_product(cls, product_id: int):
+        if cls._trie is None:
+            return
+        previous = cls._products.pop(product_id, None)
+        rows = SearchRepository.get_documents([product_id])
+        if rows:
+            current = cls._products[product_id] = cls._upsert_product(cls._trie, rows[0], cls._popularity)
+            if current["brand"]:
+                cls._brand_labels.setdefault(current["brand"], rows[0]["brand"].strip())
+        else:
+            current = None
+            cls._trie.remove(("product", product_id))
+
+        # Names, brands or categories may have moved: re-weigh whatever this product touched.
+        for snapshot in filter(None, (previous, current)):
+            if snapshot["brand"]:
+                cls._refresh_brand(snapshot["brand"])
+            if snapshot["category_id"] is not None:
+                cls._refresh_category(snapshot["category_id"])
+
+    @classmethod
+    def suggest(cls, q: str, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        trie = cls._trie
+        if trie is None:
+            cls.warm_up()
+            return []
+        return trie.suggest(q, limit)
@@ -0,0 +1,139 @@
+import threading
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from .index import tokenize
+
+
+class _Node:
+    __slots__ = ("children", "entries", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: Set[Hashable] = set()
+        self.top: Optional[List[Hashable]] = None  # cached best entries in this subtree
+
+
+class PrefixTrie:
+    """
+    Weighted prefix trie for typeahead.
+
+    Each distinct word of an entry is inserted once, so memory grows with the
+    vocabulary rather than with name length squared. A query matches entries
+    that have, for every query word, some word starting with it: "lip" and
+    "matte lip" both find "Red Matte Lipstick". Each node lazily caches the
+    TOP_K heaviest entries of its subtree; writes only clear the caches along
+    the touched paths, so a one-word lookup is a walk of len(prefix) nodes
+    plus a cached list.
+    """
+    TOP_K = 10
+
+    def __init__(self):
+        self._root = _Node()
+        self._lock = threading.RLock()
+        self._weights: Dict[Hashable, float] = {}
+        self._payloads: Dict[Hashable, dict] = {}
+        self._words: Dict[Hashable, List[str]] = {}
+
+    def __len__(self):
+        return len(self._weights)
+
+    def upsert(self, key: Hashable, text: str, weight: float, payload: dict):
+        words = sorted(set(tokenize(text)))
+        with self._lock:
+            self._remove_locked(key)
+            if not words:
+                return
+            self._weights[key] = weight
+            self._payloads[key] = payload
+            self._words[key] = words
+            for word in words:
+                node = self._root
+                node.top = None
+                for ch in word:
+                    node = node.children.setdefault(ch, _Node())
+                    node.top = None
+                node.entries.add(key)
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._remove_locked(key)
+
+    def get_payload(self, key: Hashable) -> Optional[dict]:
+        return self._payloads.get(key)
+
+    def _remove_locked(self, key: Hashable):
+        words = self._words.pop(key, None)
+        if words is None:
+            return
+        self._weights.pop(key, None)
+        self._payloads.pop(key, None)
+        for word in words:
+            trail: List[Tuple[_Node, str]] = []
+            node = self._root
+            node.top = None
+            for ch in word:
+                child = node.children.get(ch)
+                if child is None:
+                    break
+                trail.append((node, ch))
+                node = child
+                node.top = None
+            else:
+                node.entries.discard(key)
+            # Prune now-empty branches
+            for parent, ch in reversed(trail):
+                child = parent.children[ch]
+                if child.entries or child.children:
+                    break
+                del parent.children[ch]
+
+    def _find(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _collect_top(self, node: _Node) -> List[Hashable]:
+        if node.top is None:
+            candidates = set(node.entries)
+            for child in node.children.values():
+                candidates.update(self._collect_top(child))
+            node.top = sorted(candidates, key=lambda k: -self._weights.get(k, 0.0))[:self.TOP_K]
+        return node.top
+
+    @staticmethod
+    def _collect_all(node: _Node) -> Set[Hashable]:
+        found: Set[Hashable] = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            found.update(node.entries)
+            stack.extend(node.children.values())
+        return found
+
+    def _matches(self, key: Hashable, prefixes: List[str]) -> bool:
+        words = self._words.get(key, ())
+        return all(any(word.startswith(prefix) for word in words) for prefix in prefixes)
+
+    def suggest(self, prefix: str, limit: int = TOP_K) -> List[dict]:
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+        # Walk the most selective (longest) word; check the others against each candidate's words.
+        anchor = max(range(len(tokens)), key=lambda i: len(tokens[i]))
+        others = tokens[:anchor] + tokens[anchor + 1:]
+        with self._lock:
+            node = self._find(tokens[anchor])
+            if node is None:
+                return []
+            top = self._collect_top(node)
+            keys = [k for k in top if self._matches(k, others)]
+            if len(keys) < limit and others and len(top) == self.TOP_K:
+                # The cached top list ran out before enough matches; rank the whole subtree.
+                keys = sorted(
+                    (k for k in self._collect_all(node) if self._matches(k, others)),
+                    key=lambda k: -self._weights.get(k, 0.0),
+                )
+            return [self._payloads[k] for k in keys[:limit]]
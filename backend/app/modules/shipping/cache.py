@@ -0,0 +1,64 @@
+import json
+from typing import Dict, Iterable, Optional
+
+from app.shared.config import settings
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+
+log = get_logger(__name__)
+
+BUCKET_GRAMS = 500
+
+
+def weight_bucket(weight_grams) -> int:
+    """Rounds up to the next 500 g slab, the granularity Delhivery bills in."""
+    weight = max(1, int(weight_grams or 0))
+    return -(-weight // BUCKET_GRAMS) * BUCKET_GRAMS
+
+
+class ShippingQuoteCache:
+    """
+    ship:{origin}:{pincode}:{weight_bucket} -> quote JSON (serviceability + rate).
+
+    Entries expire after SHIPPING_QUOTE_TTL_SEC; prefetch_shipping_quotes
+    rewrites the common ones before that, so checkout rarely calls Delhivery.
+    Redis errors degrade to misses.
+    """
+
+    @staticmethod
+    def _get_redis():
+        try:
+            return RedisClient.get_client()
+        except Exception:
+            return None
+
+    @staticmethod
+    def key(origin: str, pincode: str, bucket: int) -> str:
+        return f"ship:{origin}:{pincode}:{bucket}"
+
+    @staticmethod
+    def get_many(origin: str, pincodes: Iterable[str], bucket: int) -> Dict[str, Optional[Dict]]:
+        pincodes = list(dict.fromkeys(pincodes))
+        redis = ShippingQuoteCache._get_redis()
+        if not redis or not pincodes:
+            return {pin: None for pin in pincodes}
+        try:
+            values = redis.mget([ShippingQuoteCache.key(origin, pin, bucket) for pin in pincodes])
+        except Exception as e:
+            log.error("Shipping quote cache read failed", extra={"error": str(e)})
+            values = [None] * len(pincodes)
+        return {pin: (json.loads(v) if v else None) for pin, v in zip(pincodes, values)}
+
+    @staticmethod
+    def set_many(quotes: Iterable[Dict]):
+        redis = ShippingQuoteCache._get_redis()
+        if not redis:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for quote in quotes:
+                key = ShippingQuoteCache.key(quote["origin"], quote["pincode"], quote["weight_bucket"])
+                pipe.set(key, json.dumps(quote), ex=settings.SHIPPING_QUOTE_TTL_SEC)
+            pipe.execute()
+        except Exception as e:
+            log.error("Shipping quote cache write failed", extra={"error": str(e)})
@@ -0,0 +1,84 @@
+import threading
+from typing import Dict, Iterable, Optional
+
+import requests
+
+from app.shared.config import settings
+from app.shared.http_client import make_session
+
+
+class CourierError(Exception):
+    """Delhivery rejected the call or could not be reached within the timeout."""
+
+
+class DelhiveryClient:
+    """
+    Thin client for the two Delhivery endpoints checkout needs, over a pooled
+    keep-alive session. DELHIVERY_API_URL can point at a local stub server.
+    """
+    PINCODES_PATH = "/c/api/pin-codes/json/"
+    CHARGES_PATH = "/api/kinko/v1/invoice/charges/.json"
+    MAX_PINCODES = 100  # filter_codes per serviceability call
+
+    _session: Optional[requests.Session] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    # GETs only, so transient 5xx/connection errors are retried once.
+                    cls._session = make_session(
+                        pool_size=20, retries=1, headers={"Authorization": f"Token {settings.DELHIVERY_API_KEY}"}
+                    )
+        return cls._session
+
+    @classmethod
+    def _get(cls, path: str, params: Dict, timeout: float = None):
+        if not settings.DELHIVERY_API_KEY:
+            raise CourierError("Delhivery is not configured")
+        try:
+            resp = cls._get_session().get(
+                f"{settings.DELHIVERY_API_URL}{path}", params=params, timeout=timeout or settings.DELHIVERY_TIMEOUT_SEC
+            )
+        except requests.RequestException as e:
+            raise CourierError(f"Delhivery unreachable: {e}")
+        if resp.status_code >= 400:
+            raise CourierError(f"Delhivery error {resp.status_code}: {resp.text[:200]}")
+        try:
+            return resp.json()
+        except ValueError:
+            raise CourierError("Delhivery returned invalid JSON")
+
+    @classmethod
+    def serviceability(cls, pincodes: Iterable[str], timeout: float = None) -> Dict[str, Dict]:
+        """
+        {pincode: {"serviceable", "prepaid", "cod"}} for up to MAX_PINCODES
+        pincodes in one call. Pincodes Delhivery does not know are not serviceable.
+        """
+        pincodes = list(dict.fromkeys(str(p) for p in pincodes))[:cls.MAX_PINCODES]
+        data = cls._get(cls.PINCODES_PATH, {"filter_codes": ",".join(pincodes)}, timeout)
+
+        result = {pin: {"serviceable": False, "prepaid": False, "cod": False} for pin in pincodes}
+        for entry in data.get("delivery_codes") or []:
+            code = entry.get("postal_code") or {}
+            pin = str(code.get("pin", ""))
+            if pin in result:
+                prepaid = code.get("pre_paid") == "Y"
+                cod = code.get("cod") == "Y"
+                result[pin] = {"serviceable": prepaid or cod, "prepaid": prepaid, "cod": cod}
+        return result
+
+    @classmethod
+    def rate(cls, origin: str, destination: str, weight_grams: int, payment_type: str = "Pre-paid", timeout: float = None) -> float:
+        """Surface shipping charge in rupees for one parcel."""
+        data = cls._get(cls.CHARGES_PATH, {
+            "md": "S", "ss": "Delivered", "o_pin": origin, "d_pin": destination,
+            "cgm": weight_grams, "pt": payment_type,
+        }, timeout)
+        charges = data[0] if isinstance(data, list) and data else data
+        try:
+            return round(float(charges["total_amount"]), 2)
+        except (KeyError, TypeError, ValueError):
+            raise CourierError("Delhivery returned no total_amount")
@@ -0,0 +1,17 @@
+from flask import Blueprint, request
+from .services import ShippingService
+from app.shared.response import success_response, error_response
+from app.shared.exceptions import AppError
+
+shipping_bp = Blueprint('shipping', __name__)
+
+@shipping_bp.route('/quote', methods=['GET'])
+def get_quote():
+    try:
+        weight = request.args.get('weight', default=500, type=int)
+        quote = ShippingService.get_quote(request.args.get('pincode'), weight)
+        return success_response("Shipping quote fetched", quote)
+    except AppError as e:
+        return error_response(e.message, status_code=e.status_code)
+    except Exception as e:
+        return error_response(str(e), status_code=500)
@@ -0,0 +1,16 @@
+from typing import List
+
+
+class ShippingRepository:
+
+    @staticmethod
+    def get_address_pincodes(cursor, limit: int = 5000) -> List[str]:
+        """Distinct customer pincodes, most recently used first: the prefetch working set."""
+        cursor.execute(
+            """
+            SELECT pincode FROM addresses
+            GROUP BY pincode ORDER BY MAX(updated_at) DESC LIMIT %s
+            """,
+            (limit,),
+        )
+        return [row["pincode"] for row in cursor.fetchall()]
@@ -0,0 +1,99 @@
+import re
+import time
+from typing import Dict, Iterable, List
+
+from app.shared.config import settings
+from app.shared.exceptions import AppError, ValidationError
+from app.shared.logging_config import get_logger
+from .cache import ShippingQuoteCache, weight_bucket
+from .client import CourierError, DelhiveryClient
+
+log = get_logger(__name__)
+
+PINCODE_RE = re.compile(r'^\d{6}$')
+MAX_QUOTE_WEIGHT_GRAMS = 10000  # heavier parcels are quoted at this slab; keeps /quote to 20 cacheable buckets
+
+
+class ShippingService:
+
+    @staticmethod
+    def fetch_quotes(pincodes: Iterable[str], buckets: Iterable[int], timeout: float = None,
+                     deadline: float = None) -> List[Dict]:
+        """
+        Quotes straight from Delhivery: one serviceability call per 100
+        pincodes, then one rate call per serviceable (pincode, bucket).
+        A pincode whose rate call fails is left out rather than failing the batch.
+        Past deadline (a time.monotonic() value) no more rate calls are made and
+        the quotes gathered so far are returned.
+        """
+        origin = settings.DELHIVERY_ORIGIN_PINCODE
+        pincodes = list(dict.fromkeys(pincodes))
+        buckets = list(dict.fromkeys(buckets))
+        quotes = []
+        for start in range(0, len(pincodes), DelhiveryClient.MAX_PINCODES):
+            chunk = pincodes[start:start + DelhiveryClient.MAX_PINCODES]
+            for pin, service in DelhiveryClient.serviceability(chunk, timeout).items():
+                for bucket in buckets:
+                    quote = {"origin": origin, "pincode": pin, "weight_bucket": bucket, **service, "rate": None}
+                    if service["serviceable"]:
+                        if deadline is not None and time.monotonic() >= deadline:
+                            return quotes
+                        try:
+                            quote["rate"] = DelhiveryClient.rate(origin, pin, bucket, timeout=timeout)
+                        except CourierError as e:
+                            log.warning("Delhivery rate lookup failed", extra={"pincode": pin, "error": str(e)})
+                            continue
+                    quotes.append(quote)
+        return quotes
+
+    @staticmethod
+    def get_quote(pincode: str, weight_grams: int) -> Dict:
+        """
+        Serviceability and rate for a parcel to pincode, from cache when possible.
+        weight_grams is clamped to MAX_QUOTE_WEIGHT_GRAMS, since every distinct
+        bucket is a separate cache entry and upstream call.
+        """
+        pincode = (pincode or "").strip()
+        if not PINCODE_RE.match(pincode):
+            raise ValidationError("Pincode must be exactly 6 digits")
+        bucket = weight_bucket(min(weight_grams or 0, MAX_QUOTE_WEIGHT_GRAMS))
+
+        quote = ShippingQuoteCache.get_many(settings.DELHIVERY_ORIGIN_PINCODE, [pincode], bucket)[pincode]
+        if quote:
+            return quote
+        try:
+            quotes = ShippingService.fetch_quotes([pincode], [bucket])
+        except CourierError as e:
+            log.error("Delhivery quote failed", extra={"pincode": pincode, "error": str(e)})
+            raise AppError("Shipping quotes are temporarily unavailable", 503)
+        if not quotes:
+            raise AppError("Shipping quotes are temporarily unavailable", 503)
+        ShippingQuoteCache.set_many(quotes)
+        return quotes[0]
+
+    @staticmethod
+    def prefetch(pincodes: Iterable[str], buckets: Iterable[int], budget_sec: float = None, timeout: float = 10) -> int:
+        """
+        Refreshes the cache for every (pincode, bucket), stopping once budget_sec
+        has passed. A chunk whose serviceability call fails is skipped; its
+        entries stay cached until they expire and are fetched live after that.
+        Returns how many quotes were stored.
+        """
+        pincodes = list(dict.fromkeys(pin for pin in (str(p).strip() for p in pincodes) if PINCODE_RE.match(pin)))
+        buckets = [weight_bucket(b) for b in buckets]
+        deadline = time.monotonic() + budget_sec if budget_sec is not None else None
+        stored = 0
+        # Written chunk by chunk so a long run keeps the cache warm as it goes.
+        for start in range(0, len(pincodes), DelhiveryClient.MAX_PINCODES):
+            if deadline is not None and time.monotonic() >= deadline:
+                log.warning("Shipping prefetch ran out of time", extra={"skipped": len(pincodes) - start})
+                break
+            chunk = pincodes[start:start + DelhiveryClient.MAX_PINCODES]
+            try:
+                quotes = ShippingService.fetch_quotes(chunk, buckets, timeout=timeout, deadline=deadline)
+            except CourierError as e:
+                log.warning("Delhivery serviceability lookup failed", extra={"pincodes": len(chunk), "error": str(e)})
+                continue
+            ShippingQuoteCache.set_many(quotes)
+            stored += len(quotes)
+        return stored
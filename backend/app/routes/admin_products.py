@@ -13,6 +13,16 @@ from app.shared.database import get_db_connection
 from app.modules.admin.auth.middleware import require_admin_auth
 from app.shared.redis_client import RedisClient
 from app.shared.logging_config import get_logger
+from app.modules.catalog.cache import CategoryCache
+from app.modules.catalog.events import CatalogEvents
+from app.modules.catalog.repository import ProductRepository
+from app.modules.inventory.cache import StockCache
+from app.shared.http_cache import conditional
+from app.shared.streaming import json_array_response, stream_rows
+from app.shared.idempotency import idempotent
+from app.shared.config import settings
+from app.modules.catalog.importer import ProductImporter, detect_format, FORMATS as IMPORT_FORMATS
+from app.jobs.catalog_import import import_products_file
 
 # Blueprint
 admin_products = Blueprint("admin_products", __name__)
@@ -42,29 +52,10 @@ def safe_int(value, default=0):
         return default
 
 
-def invalidate_stock_cache(redis_client, product_id, variant_id=None):
-    """
-    Delete redis keys matching stock:{product_id}:{variant_id or 'null'}:*
-    Uses scan_iter to safely delete pattern matches (supports Redis clusters / large keyspaces).
-    """
-    if not redis_client:
-        return
-
-    pattern = f"stock:{product_id}:{variant_id if variant_id is not None else 'null'}:*"
-    try:
-        # scan_iter is preferable for production (non-blocking)
-        for key in redis_client.scan_iter(match=pattern, count=100):
-            try:
-                redis_client.delete(key)
-            except Exception as e:
-                log.error("Failed to delete redis key during cache invalidation", extra={"key": key, "error": str(e)})
-    except Exception as e:
-        log.error("Redis cache invalidation failed", extra={"pattern": pattern, "error": str(e)})
-
-
 # ------------------ Add product ------------------
 @admin_products.route("/api/admin/products/add", methods=["POST"])
 @require_admin_auth
+@idempotent
 def add_product():
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -175,6 +166,7 @@ def add_product():
                     "INSERT INTO product_images (product_id, image_path) VALUES (%s, %s)",
                     (product_id, rel_path)
                 )
+        ProductRepository.refresh_primary_image(cursor, product_id)
 
         # --- Variants ---
         if enable_variants:
@@ -253,14 +245,9 @@ def add_product():
                         (variant_id, path)
                     )
 
-        # --- Invalidate cache ---
-        invalidate_stock_cache(redis_client, product_id)
-        if enable_variants:
-            cursor.execute("SELECT id FROM product_variants WHERE product_id = %s", (product_id,))
-            for row in cursor.fetchall():
-                invalidate_stock_cache(redis_client, product_id, row["id"])
-
         conn.commit()
+        CatalogEvents.product_changed(product_id, redis_client)
+        StockCache.refresh(product_id, redis_client)
         log.info("✅ Product and variants added successfully", extra={"product_id": product_id, "admin_id": admin_id})
         return jsonify({"message": "Product added successfully", "product_id": product_id}), 201
 
@@ -275,16 +262,16 @@ def add_product():
 
 
 
-# ------------------ categories (unchanged) ------------------
+# ------------------ categories ------------------
 @admin_products.route("/api/categories", methods=["GET"])
+@conditional(CategoryCache.request_etag)
 def get_categories():
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT id, name, image FROM categories")
-                rows = cursor.fetchall()
-                categories = [dict(row) for row in rows]  # ensure plain dicts
-                return jsonify(categories)
+        categories = [
+            {"id": row["id"], "name": row["name"], "image": row.get("image")}
+            for row in CategoryCache.get_all()
+        ]
+        return jsonify(categories)
     except Exception as e:
         log.error("Error fetching categories", extra={"error": str(e)})
         return jsonify({"error": str(e)}), 500
@@ -294,53 +281,85 @@ def get_categories():
 @admin_products.route("/api/admin/products", methods=["GET"])
 @require_admin_auth
 def get_products():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     query = """
         SELECT 
             p.id, p.name, p.price, p.mrp, p.stock, p.created_at, 
             p.category_id, p.enable_variants, c.name AS category,
-            COALESCE(i.image_path, '') AS image_path
+            COALESCE(p.primary_image_path, '') AS image_path
         FROM products p
         LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN (
-            SELECT product_id, MIN(image_path) AS image_path 
-            FROM product_images 
-            GROUP BY product_id
-        ) i ON p.id = i.product_id
         ORDER BY p.created_at DESC
     """
-    try:
-        cursor.execute(query)
-        products = cursor.fetchall()
-
-        result = []
-        for row in products:
-            result.append({
-                "id": row["id"],
-                "name": row["name"],
-                "price": float(row["price"]) if row["price"] is not None else 0,
-                "mrp": float(row["mrp"]) if row["mrp"] is not None else 0,
-                "stock": row["stock"] or 0,
-                "status": True,
-                "category": row["category"] or "Uncategorized",
-                "created_at": row["created_at"].strftime("%Y-%m-%d %I:%M %p") if isinstance(row["created_at"], datetime) else row["created_at"],
-                "image": f"{request.url_root.rstrip('/')}/{row['image_path']}" if row["image_path"] else ""
-            })
+    url_root = request.url_root.rstrip('/')
+
+    def serialize(row):
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "price": float(row["price"]) if row["price"] is not None else 0,
+            "mrp": float(row["mrp"]) if row["mrp"] is not None else 0,
+            "stock": row["stock"] or 0,
+            "status": True,
+            "category": row["category"] or "Uncategorized",
+            "created_at": row["created_at"].strftime("%Y-%m-%d %I:%M %p") if isinstance(row["created_at"], datetime) else row["created_at"],
+            "image": f"{url_root}/{row['image_path']}" if row["image_path"] else ""
+        }
 
-        return jsonify(result)
+    try:
+        return json_array_response(stream_rows(query), serialize)
     except Exception as e:
         log.error("Failed to list products", extra={"admin_id": g.admin.get("admin_id"), "error": str(e)})
         return jsonify({"error": "Server error", "detail": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+
+# ------------------ bulk import (CSV / JSONL) ------------------
+@admin_products.route("/api/admin/products/import", methods=["POST"])
+@require_admin_auth
+@idempotent
+def import_products():
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        return jsonify({"error": "file is required"}), 400
+    fmt = (request.form.get("format") or detect_format(upload.filename) or "").lower()
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+    dry_run = str(request.form.get("dry_run", "false")).lower() == "true"
+    admin_id = g.admin.get("admin_id")
+
+    try:
+        if (request.content_length or 0) <= settings.IMPORT_SYNC_MAX_BYTES:
+            report = ProductImporter(chunk_size=settings.IMPORT_CHUNK_SIZE, dry_run=dry_run).run(upload.stream, fmt)
+            log.info("Product import finished", extra={"admin_id": admin_id, "imported": report["imported"], "failed": report["failed"]})
+            return jsonify(report), 200
+
+        import_dir = os.path.join(settings.UPLOAD_FOLDER, "imports")
+        os.makedirs(import_dir, exist_ok=True)
+        path = os.path.join(import_dir, f"{uuid.uuid4().hex}.{fmt}")
+        upload.save(path)
+        task = import_products_file.delay(path, fmt, admin_id, dry_run)
+        log.info("Product import queued", extra={"admin_id": admin_id, "task_id": task.id})
+        return jsonify({"message": "Import queued", "task_id": task.id}), 202
+    except Exception as e:
+        log.error("Product import error", extra={"admin_id": admin_id, "error": str(e)})
+        return jsonify({"error": "Server error", "detail": str(e)}), 500
+
+
+@admin_products.route("/api/admin/products/import/<task_id>", methods=["GET"])
+@require_admin_auth
+def get_import_status(task_id):
+    result = import_products_file.AsyncResult(task_id)
+    if result.successful():
+        return jsonify({"status": "done", "report": result.result}), 200
+    if result.failed():
+        return jsonify({"status": "failed", "error": str(result.result)}), 200
+    # Unknown ids also read as PENDING in Celery
+    return jsonify({"status": result.state.lower()}), 200
 
 
 # ------------------ toggle product/variant status ------------------
 @admin_products.route("/api/admin/products/<int:product_id>/status", methods=["PUT"])
 @require_admin_auth
+@idempotent
 def toggle_product_status(product_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -350,12 +369,13 @@ def toggle_product_status(product_id):
 
     try:
         if is_variant:
-            cursor.execute("SELECT status FROM product_variants WHERE id = %s", (product_id,))
+            cursor.execute("SELECT status, product_id FROM product_variants WHERE id = %s", (product_id,))
             result = cursor.fetchone()
             if not result:
                 return jsonify({"error": "Variant not found"}), 404
             new_status = 0 if result["status"] else 1
             cursor.execute("UPDATE product_variants SET status = %s WHERE id = %s", (new_status, product_id))
+            parent_id = result["product_id"]
         else:
             cursor.execute("SELECT status FROM products WHERE id = %s", (product_id,))
             result = cursor.fetchone()
@@ -363,8 +383,10 @@ def toggle_product_status(product_id):
                 return jsonify({"error": "Product not found"}), 404
             new_status = 0 if result["status"] else 1
             cursor.execute("UPDATE products SET status = %s WHERE id = %s", (new_status, product_id))
+            parent_id = product_id
 
         conn.commit()
+        CatalogEvents.product_changed(parent_id)
         log.info("Toggled product/variant status", extra={"admin_id": admin_id, "product_id": product_id, "is_variant": is_variant, "new_status": new_status})
         return jsonify({"success": True, "new_status": new_status})
     except Exception as e:
@@ -379,6 +401,7 @@ def toggle_product_status(product_id):
 # ------------------ delete product / variant ------------------
 @admin_products.route("/api/admin/products/<int:product_id>", methods=["DELETE"])
 @require_admin_auth
+@idempotent
 def delete_product(product_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -403,7 +426,7 @@ def delete_product(product_id):
                         log.error("Failed to delete variant image file", extra={"path": path, "error": str(e)})
             cursor.execute("DELETE FROM variant_images WHERE variant_id = %s", (product_id,))
             cursor.execute("DELETE FROM product_variants WHERE id = %s", (product_id,))
-            invalidate_stock_cache(RedisClient.get_client(), row["product_id"], product_id)
+            parent_id = row["product_id"]
         else:
             # delete product images
             cursor.execute("SELECT image_path FROM product_images WHERE product_id = %s", (product_id,))
@@ -417,25 +440,26 @@ def delete_product(product_id):
             cursor.execute("DELETE FROM product_images WHERE product_id = %s", (product_id,))
 
             # delete variant images & variants
-            cursor.execute("SELECT id FROM product_variants WHERE product_id = %s", (product_id,))
-            variant_rows = cursor.fetchall()
-            for v in variant_rows:
-                vid = v["id"]
-                cursor.execute("SELECT image_path FROM variant_images WHERE variant_id = %s", (vid,))
-                for img in cursor.fetchall():
-                    path = img.get("image_path")
+            variant_images = ProductRepository.get_variant_images_for_products(cursor, [product_id])
+            for paths in variant_images.values():
+                for path in paths:
                     if path and os.path.exists(path):
                         try:
                             os.remove(path)
                         except Exception as e:
                             log.error("Failed to delete variant image file", extra={"path": path, "error": str(e)})
-                cursor.execute("DELETE FROM variant_images WHERE variant_id = %s", (vid,))
+            cursor.execute(
+                "DELETE vi FROM variant_images vi JOIN product_variants v ON v.id = vi.variant_id WHERE v.product_id = %s",
+                (product_id,)
+            )
             cursor.execute("DELETE FROM product_variants WHERE product_id = %s", (product_id,))
             cursor.execute("DELETE FROM products WHERE id = %s", (product_id,))
 
-            invalidate_stock_cache(RedisClient.get_client(), product_id, None)
+            parent_id = product_id
 
         conn.commit()
+        CatalogEvents.product_changed(parent_id)
+        StockCache.refresh(parent_id)
         log.info("Deleted product/variant", extra={"admin_id": admin_id, "product_id": product_id, "is_variant": is_variant})
         return jsonify({"success": True, "message": "Deleted successfully"})
     except Exception as e:
@@ -515,6 +539,7 @@ def get_product_by_id(product_id):
 # ------------------ update product ------------------
 @admin_products.route("/api/admin/products/<int:product_id>", methods=["PUT"])
 @require_admin_auth
+@idempotent
 def update_product(product_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -631,12 +656,13 @@ def update_product(product_id):
                 
                 cursor.execute("INSERT INTO product_images (product_id, image_path) VALUES (%s, %s)", (product_id, rel_path))
 
-        # 6. Cache invalidation
-        invalidate_stock_cache(redis_client, product_id, None)
+        ProductRepository.refresh_primary_image(cursor, product_id)
 
-        # 7. Audit & commit
+        # 6. Audit & commit, then refresh caches from the committed rows
         log.info("Product updated", extra={"admin_id": admin_id, "product_id": product_id, "stock": stock})
         conn.commit()
+        CatalogEvents.product_changed(product_id, redis_client)
+        StockCache.refresh(product_id, redis_client)
         return jsonify({"message": "Product updated successfully"}), 200
 
     except Exception as e:
@@ -652,74 +678,68 @@ def update_product(product_id):
 @admin_products.route("/api/admin/products/list-with-variants", methods=["GET"])
 @require_admin_auth
 def get_products_with_variants():
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    query = """
+        SELECT p.*, c.name AS category_name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        ORDER BY p.created_at DESC
+    """
+    url_root = request.url_root.rstrip('/')
 
-    try:
-        cursor.execute(
-            """
-            SELECT p.*, c.name AS category_name
-            FROM products p
-            LEFT JOIN categories c ON p.category_id = c.id
-            ORDER BY p.created_at DESC
-            """
-        )
-        products = cursor.fetchall()
-        result = []
-        for product in products:
-            pid = product["id"]
-            cursor.execute("SELECT image_path FROM product_images WHERE product_id = %s", (pid,))
-            images = cursor.fetchall()
-            image_urls = [f"{request.url_root.rstrip('/')}/{img['image_path']}" for img in images]
-            main_image = image_urls[0] if image_urls else None
-
-            variants = []
-            if product.get("enable_variants"):
-                cursor.execute(
-                    "SELECT id, name, price, mrp, discount, stock, image_path, status FROM product_variants WHERE product_id = %s",
-                    (pid,),
-                )
-                variant_rows = cursor.fetchall()
-                for v in variant_rows:
-                    variants.append({
-                        "id": v["id"],
-                        "name": v["name"],
-                        "price": float(v["price"] or 0),
-                        "mrp": float(v["mrp"] or 0),
-                        "discount": float(v["discount"] or 0),
-                        "stock": v["stock"] or 0,
-                        "status": bool(v["status"]),
-                        "image": f"{request.url_root.rstrip('/')}/{v['image_path']}" if v.get("image_path") else None
-                    })
-
-            result.append({
-                "id": product["id"],
-                "name": product["name"],
-                "price": float(product["price"]) if product["price"] is not None else 0,
-                "mrp": float(product["mrp"]) if product["mrp"] is not None else 0,
-                "discount": float(product["discount"]) if product["discount"] is not None else 0,
-                "stock": product["stock"],
-                "status": bool(product.get("status", 1)),
-                "category_name": product.get("category_name") or "Uncategorized",
-                "created_at": product.get("created_at"),
-                "thumbnail": main_image,
-                "images": image_urls,
-                "variants": variants if product.get("enable_variants") else [],
-                "enable_variants": bool(product.get("enable_variants"))
-            })
+    def chunks():
+        # The product rows stream over their own connection; images and variants are
+        # batch-loaded per chunk over a second one.
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                for products in stream_rows(query):
+                    ids = [p["id"] for p in products]
+                    images = ProductRepository.get_product_images(cursor, ids)
+                    variants = ProductRepository.get_variant_summaries(
+                        cursor, [p["id"] for p in products if p.get("enable_variants")]
+                    )
+                    yield [_with_variants(p, images[p["id"]], variants.get(p["id"], []), url_root) for p in products]
 
-        return jsonify(result)
+    try:
+        return json_array_response(chunks())
     except Exception as e:
         log.error("Failed to fetch products with variants", extra={"error": str(e)})
         return jsonify({"error": "Server error", "detail": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+
+def _with_variants(product, images, variant_rows, url_root):
+    image_urls = [f"{url_root}/{path}" for path in images]
+    variants = [{
+        "id": v["id"],
+        "name": v["name"],
+        "price": float(v["price"] or 0),
+        "mrp": float(v["mrp"] or 0),
+        "discount": float(v["discount"] or 0),
+        "stock": v["stock"] or 0,
+        "status": bool(v["status"]),
+        "image": f"{url_root}/{v['image_path']}" if v.get("image_path") else None
+    } for v in variant_rows]
+
+    return {
+        "id": product["id"],
+        "name": product["name"],
+        "price": float(product["price"]) if product["price"] is not None else 0,
+        "mrp": float(product["mrp"]) if product["mrp"] is not None else 0,
+        "discount": float(product["discount"]) if product["discount"] is not None else 0,
+        "stock": product["stock"],
+        "status": bool(product.get("status", 1)),
+        "category_name": product.get("category_name") or "Uncategorized",
+        "created_at": product.get("created_at"),
+        "thumbnail": image_urls[0] if image_urls else None,
+        "images": image_urls,
+        "variants": variants if product.get("enable_variants") else [],
+        "enable_variants": bool(product.get("enable_variants"))
+    }
 
 
 # ------------------ variant update ------------------
 @admin_products.route("/api/admin/variants/<int:variant_id>", methods=["PUT"])
 @require_admin_auth
+@idempotent
 def update_variant(variant_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -817,10 +837,9 @@ def update_variant(variant_id):
             except Exception as e:
                 log.error("Failed to remove images list", extra={"error": str(e)})
 
-        # Invalidate cache for variant
-        invalidate_stock_cache(redis_client, variant["product_id"], variant_id)
-
         conn.commit()
+        CatalogEvents.product_changed(variant["product_id"], redis_client)
+        StockCache.refresh(variant["product_id"], redis_client)
         log.info("Variant updated", extra={"variant_id": variant_id, "product_id": variant["product_id"], "stock": stock})
         return jsonify({"message": "Variant updated successfully"}), 200
 
@@ -891,6 +910,7 @@ def get_variant_by_id(variant_id):
 # ------------------ delete product image ------------------
 @admin_products.route("/api/admin/products/image/<int:image_id>", methods=["DELETE"])
 @require_admin_auth
+@idempotent
 def delete_product_image(image_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -912,10 +932,9 @@ def delete_product_image(image_id):
                 log.error("Failed to delete product image file", extra={"path": image.get("image_path"), "error": str(e)})
 
         cursor.execute("DELETE FROM product_images WHERE id = %s", (image_id,))
+        ProductRepository.refresh_primary_image(cursor, image["product_id"])
         conn.commit()
-
-        # Invalidate product cache
-        invalidate_stock_cache(RedisClient.get_client(), image["product_id"], None)
+        CatalogEvents.product_changed(image["product_id"])
 
         return jsonify({"message": "Image deleted successfully"}), 200
     except Exception as e:
@@ -1,18 +1,41 @@
 from flask import Blueprint, request, jsonify, send_from_directory, current_app
 from app.shared.database import get_db_connection
+from app.shared.exceptions import ValidationError
+from app.shared.pagination import parse_limit, decode_cursor, keyset_page, MAX_PAGE_SIZE
+from app.modules.catalog.services import ProductDetailService
+from app.modules.catalog.cache import CategoryCache, CatalogVersion, ProductCache
+from app.modules.catalog.facets import FacetService, FACETS
+from app.shared.http_cache import conditional, make_etag
+from app.shared.streaming import json_array_response, stream_rows
+from app.modules.search.services import SearchService, SuggestService
+from app.modules.search.trie import PrefixTrie
 import pymysql
 
 products_bp = Blueprint("products", __name__, url_prefix="/api/products")
 
+# ---------------- ETags ----------------
+
+def _listing_etag(**_):
+    if _is_faceted():
+        # Served from this worker's FacetIndex, which trails catalog:version until its refresh lands.
+        version = FacetService.applied_version()
+        return make_etag("facets", request.full_path, version) if version is not None else None
+    version = CatalogVersion.get()
+    return make_etag("listing", request.full_path, version) if version is not None else None
+
+
+def _product_etag(product_id):
+    version = ProductCache.get_version(product_id)
+    return make_etag("product", product_id, version) if version is not None else None
+
+
 # ---------------- API Routes ----------------
 
 @products_bp.route('/categories', methods=['GET'])
+@conditional(CategoryCache.request_etag, compress=True)
 def get_categories():
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                cursor.execute("SELECT * FROM categories")
-                categories = cursor.fetchall()
+        categories = CategoryCache.get_all()
 
         # Normalize image paths
         for cat in categories:
@@ -24,129 +47,155 @@ def get_categories():
         return jsonify({'error': str(e)}), 500
 
 
+def _normalize_listing(products):
+    for product in products:
+        if product.get("image_path") and not product["image_path"].startswith("/"):
+            product["image_path"] = "/" + product["image_path"]
+    return products
+
+
+def _listing_page(cursor, base_query, params, limit, after):
+    """
+    Keyset page over an (created_at DESC, id DESC) listing.
+    Fetches one extra row to know whether a next page exists.
+    """
+    query = base_query
+    if after:
+        query += " AND (p.created_at < %s OR (p.created_at = %s AND p.id < %s))"
+        params = params + (after[0], after[0], after[1])
+    query += " ORDER BY p.created_at DESC, p.id DESC LIMIT %s"
+    cursor.execute(query, params + (limit + 1,))
+    return keyset_page(cursor.fetchall(), limit)
+
+
+def _is_paginated():
+    return "limit" in request.args or "cursor" in request.args
+
+
+def _is_faceted():
+    return "facets" in request.args or any(facet in request.args for facet in FACETS)
+
+
+def _multi_arg(name):
+    """Accepts both ?brand=a&brand=b and ?brand=a,b."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v for v in raw.split(",") if v.strip())
+    return values
+
+
 @products_bp.route('/category/<int:category_id>', methods=['GET'])
+@conditional(_listing_etag, compress=True)
 def get_products_by_category(category_id):
     try:
+        base_query = """
+            SELECT 
+                p.id, p.name, p.price, p.mrp, p.discount, p.stock, p.category_id, p.created_at,
+                p.primary_image_path AS image_path
+            FROM products p
+            WHERE p.category_id = %s
+        """
         with get_db_connection() as conn:
             with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                cursor.execute("""
-                    SELECT 
-                        p.id, p.name, p.price, p.mrp, p.discount, p.stock, p.category_id, p.created_at,
-                        (SELECT image_path FROM product_images WHERE product_id = p.id ORDER BY id ASC LIMIT 1) AS image_path
-                    FROM products p
-                    WHERE p.category_id = %s
-                    ORDER BY p.created_at DESC
-                """, (category_id,))
-                products = cursor.fetchall()
+                if _is_paginated():
+                    limit = parse_limit(request.args.get("limit"))
+                    after = decode_cursor(request.args.get("cursor"))
+                    products, next_cursor = _listing_page(cursor, base_query, (category_id,), limit, after)
+                    return jsonify({"items": _normalize_listing(products), "next_cursor": next_cursor})
 
-        # Normalize paths
-        for product in products:
-            if product.get("image_path") and not product["image_path"].startswith("/"):
-                product["image_path"] = "/" + product["image_path"]
+                cursor.execute(base_query + " ORDER BY p.created_at DESC", (category_id,))
+                products = cursor.fetchall()
 
-        return jsonify(products)
+        return jsonify(_normalize_listing(products))
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status_code
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @products_bp.route('/', methods=['GET'])
+@conditional(_listing_etag, compress=True)
 def get_products():
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                query = """
-                    SELECT 
-                        p.id, p.name, p.price, p.mrp, p.discount,
-                        (SELECT image_path FROM product_images WHERE product_id = p.id ORDER BY id ASC LIMIT 1) AS image_path
-                    FROM products p
-                    WHERE p.status = 1
-                    ORDER BY p.created_at DESC
-                """
-                cursor.execute(query)
-                products = cursor.fetchall()
-
-        # Normalize image paths
-        for product in products:
-            if product.get("image_path") and not product["image_path"].startswith("/"):
-                product["image_path"] = "/" + product["image_path"]
-
-        return jsonify(products)
-
+        base_query = """
+            SELECT 
+                p.id, p.name, p.price, p.mrp, p.discount, p.created_at,
+                p.primary_image_path AS image_path
+            FROM products p
+            WHERE p.status = 1
+        """
+        if _is_faceted():
+            filters = {facet: _multi_arg(facet) for facet in FACETS}
+            result = FacetService.query(filters, parse_limit(request.args.get("limit")),
+                                        decode_cursor(request.args.get("cursor")))
+            if result is None:
+                return jsonify({"error": "Filters are warming up, retry shortly"}), 503, {"Retry-After": "5"}
+            return jsonify(result)
+
+        if _is_paginated():
+            with get_db_connection() as conn:
+                with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                    limit = parse_limit(request.args.get("limit"))
+                    after = decode_cursor(request.args.get("cursor"))
+                    products, next_cursor = _listing_page(cursor, base_query, (), limit, after)
+            return jsonify({"items": _normalize_listing(products), "next_cursor": next_cursor})
+
+        # Unpaginated clients get the whole catalog; stream it instead of materializing it.
+        return json_array_response(
+            _normalize_listing(rows) for rows in stream_rows(base_query + " ORDER BY p.created_at DESC")
+        )
+
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status_code
     except Exception as e:
         print("🔥 Error in /api/products:", e)
         return jsonify({"error": str(e)}), 500
 
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@conditional(_product_etag, compress=True)
 def get_product_detail(product_id):
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                # Check if product exists and is active
-                cursor.execute("""
-                    SELECT 
-                        p.id, p.name, p.description, p.brand, 
-                        p.price, p.mrp, p.discount, p.stock, p.size_stock,
-                        p.delivery_type, p.delivery_charge, p.dispatch_time,
-                        p.return_policy, p.cod_available,
-                        p.color_name, p.color_code, p.category_id
-                    FROM products p
-                    WHERE p.id = %s AND p.status = 1
-                """, (product_id,))
-                product = cursor.fetchone()
-
-                if not product:
-                    return jsonify({'error': 'Product not found'}), 404
-
-                # Normalize size_stock
-                product['size_stock'] = product.get('size_stock') or '{}'
-
-                # Fetch images
-                cursor.execute("SELECT image_path FROM product_images WHERE product_id = %s", (product_id,))
-                images = cursor.fetchall()
-                for img in images:
-                    if img["image_path"] and not img["image_path"].startswith("/"):
-                        img["image_path"] = "/" + img["image_path"]
-                product['images'] = images
-
-                # Fetch variants
-                cursor.execute("""
-                    SELECT 
-                        id, product_id, name, color_name, color_code,
-                        size_stock, price, mrp, discount, stock,
-                        image_path, brand, description,
-                        dispatch_time, delivery_type, delivery_charge,
-                        cod_available, return_policy
-                    FROM product_variants
-                    WHERE product_id = %s AND status = 1
-                """, (product_id,))
-                variants = cursor.fetchall()
-
-                for variant in variants:
-                    if variant.get("image_path") and not variant["image_path"].startswith("/"):
-                        variant["image_path"] = "/" + variant["image_path"]
-                    variant["size_stock"] = variant.get("size_stock") or '{}'
-
-                    # Variant images
-                    cursor.execute("SELECT image_path FROM variant_images WHERE variant_id = %s", (variant["id"],))
-                    variant_imgs = cursor.fetchall()
-                    normalized_variant_imgs = []
-                    for img in variant_imgs:
-                        path = img["image_path"]
-                        if path and not path.startswith("/"):
-                            path = "/" + path
-                        normalized_variant_imgs.append(path)
-                    variant["variant_images"] = normalized_variant_imgs
-
-                product['variants'] = variants
-
-        return jsonify(product)
+        body = ProductDetailService.get_json(product_id)
+        if body is None:
+            return jsonify({'error': 'Product not found'}), 404
+
+        return current_app.response_class(body, mimetype="application/json")
 
     except Exception as e:
         print(f"❌ Error fetching product: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+def _parse_ids(raw):
+    """Parses ?ids=1,2,3 into a de-duplicated list that keeps the caller's order."""
+    try:
+        ids = [int(v) for v in (raw or "").split(",") if v.strip()]
+    except ValueError:
+        raise ValidationError("ids must be a comma-separated list of integers")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError("ids is required")
+    if len(ids) > MAX_PAGE_SIZE:
+        raise ValidationError(f"At most {MAX_PAGE_SIZE} ids per request")
+    return ids
+
+
+@products_bp.route('/batch', methods=['GET'])
+def get_products_batch():
+    """
+    PDP documents for many products at once (cart, wishlist, recently viewed).
+    Returned in the requested order; missing or inactive ids are skipped.
+    """
+    try:
+        ids = _parse_ids(request.args.get("ids"))
+        return current_app.response_class(ProductDetailService.get_json_many(ids), mimetype="application/json")
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @products_bp.route('/uploads/<filename>')
 def uploaded_file(filename):
     return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
@@ -159,34 +208,22 @@ def search_products():
         return jsonify([])
 
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(pymysql.cursors.DictCursor) as cur:
-                # FULLTEXT search
-                cur.execute("""
-                    SELECT
-                        p.id, p.name, p.price, p.discount AS discount, p.stock,
-                        COALESCE((SELECT image_path FROM product_images pi WHERE pi.product_id = p.id LIMIT 1), '') AS image_path,
-                        MATCH(p.name, p.description) AGAINST (%s IN NATURAL LANGUAGE MODE) AS relevance
-                    FROM products p
-                    WHERE MATCH(p.name, p.description) AGAINST (%s IN NATURAL LANGUAGE MODE)
-                    ORDER BY relevance DESC LIMIT 100
-                """, (q, q))
-                rows = cur.fetchall()
-
-                if not rows:
-                    # Fallback LIKE search
-                    wildcard = f"%{q}%"
-                    cur.execute("""
-                        SELECT
-                            p.id, p.name, p.price, p.discount AS discount, p.stock,
-                            COALESCE((SELECT image_path FROM product_images pi WHERE pi.product_id = p.id LIMIT 1), '') AS image_path,
-                            0 AS relevance
-                        FROM products p
-                        WHERE p.name LIKE %s OR p.description LIKE %s
-                        ORDER BY p.name LIMIT 100
-                    """, (wildcard, wildcard))
-                    rows = cur.fetchall()
-        return jsonify(rows)
+        return jsonify(SearchService.search(q))
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+@products_bp.route('/suggest', methods=['GET'])
+def suggest_products():
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify([])
+
+    try:
+        limit = parse_limit(request.args.get('limit'), default=SuggestService.DEFAULT_LIMIT, maximum=PrefixTrie.TOP_K)
+        return jsonify(SuggestService.suggest(q, limit))
+    except ValidationError as e:
+        return jsonify({'error': e.message}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
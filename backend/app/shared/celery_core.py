@@ -11,7 +11,7 @@ def make_celery(app: Flask) -> Celery:
         broker=settings.REDIS_URL,
         backend=settings.REDIS_URL,
         # Enterprise: Explicitly include task modules so workers find them
-        include=['app.jobs.maintenance', 'app.jobs.email_tasks'] 
+        include=['app.jobs.maintenance', 'app.jobs.email_tasks', 'app.jobs.inventory', 'app.jobs.cart', 'app.jobs.orders', 'app.jobs.payments', 'app.jobs.shipping', 'app.jobs.catalog_import'] 
     )
 
     # 1. Apply Standard Config
@@ -44,6 +44,26 @@ def make_celery(app: Flask) -> Celery:
         "cleanup-login-attempts-daily": {
             "task": "app.jobs.maintenance.cleanup_login_attempts",
             "schedule": 86400.0, # 24 hours
+        },
+        "reconcile-stock-holds": {
+            "task": "app.jobs.inventory.reconcile_stock_holds",
+            "schedule": 60.0, # 1 minute
+        },
+        "flush-dirty-carts": {
+            "task": "app.jobs.cart.flush_dirty_carts",
+            "schedule": 5.0, # write-behind delay for Redis carts
+        },
+        "expire-unpaid-orders": {
+            "task": "app.jobs.orders.expire_unpaid_orders",
+            "schedule": 300.0, # 5 minutes; orders expire after ORDER_PAYMENT_TTL_SEC
+        },
+        "process-payment-events": {
+            "task": "app.jobs.payments.process_payment_events",
+            "schedule": 2.0, # drains the Razorpay webhook stream
+        },
+        "prefetch-shipping-quotes": {
+            "task": "app.jobs.shipping.prefetch_shipping_quotes",
+            "schedule": 14400.0, # 4 hours, inside SHIPPING_QUOTE_TTL_SEC
         }
     }
 
@@ -42,10 +42,16 @@ class Settings(BaseSettings):
     RAZORPAY_KEY_ID: Optional[str] = None
     RAZORPAY_KEY_SECRET: Optional[str] = None
     RAZORPAY_WEBHOOK_SECRET: Optional[str] = None
+    RAZORPAY_API_URL: str = "https://api.razorpay.com/v1"
+    RAZORPAY_TIMEOUT_SEC: float = 2.0  # budget on the request thread; slower calls finish in Celery
+    RAZORPAY_USE_STUB: bool = False  # fake gateway orders when keys are unset; local development only
     
     # Delhivery
     DELHIVERY_API_KEY: Optional[str] = None
     DELHIVERY_API_URL: str = "https://api.delhivery.com"
+    DELHIVERY_ORIGIN_PINCODE: str = "110001"  # warehouse pincode rates are quoted from
+    DELHIVERY_TIMEOUT_SEC: float = 3.0
+    SHIPPING_QUOTE_TTL_SEC: int = 21600  # serviceability and rates change rarely; refreshed by prefetch
 
     # --- Email Settings (SendGrid) ---
     SMTP_HOST: str = "smtp.sendgrid.net"
@@ -60,6 +66,23 @@ class Settings(BaseSettings):
 
     # --- Business Logic Constants ---
     IDEMPOTENCY_TTL_SEC: int = 86400  # 24 hours
+    STOCK_HOLD_TTL_SEC: int = 900  # cart reservations lapse after 15 minutes without activity
+    ORDER_PAYMENT_TTL_SEC: int = 3600  # unpaid razorpay orders are cancelled and restocked after 1 hour
+
+    # --- In-process Catalog Indexes ---
+    # Build the search index, typeahead trie and facet index when the app starts (web workers).
+    # Celery workers disable this; they never serve search.
+    SEARCH_INDEX_WARMUP: bool = True
+
+    # --- HTTP Response Cache ---
+    # Per-process budget for encoded (and compressed) catalog responses, keyed by ETag.
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # 32 MB
+
+    # --- Bulk Product Import ---
+    # Uploads up to this size are imported inside the request; larger ones are
+    # saved under UPLOAD_FOLDER/imports (must be shared with Celery workers) and queued.
+    IMPORT_SYNC_MAX_BYTES: int = 1024 * 1024  # 1 MB
+    IMPORT_CHUNK_SIZE: int = 500  # rows per transaction
 
     @validator("CELERY_BROKER_URL", pre=True, always=True)
     def set_celery_broker(cls, v, values):
@@ -69,4 +69,39 @@ def get_cursor(commit=False):
         raise DatabaseError(f"Database Transaction Error: {str(e)}")
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+@contextmanager
+def transaction():
+    """
+    Yields (conn, cursor) for multi-statement work (CLI, jobs).
+    Commits when the block completes, rolls back on error.
+    """
+    conn = Database.get_connection()
+    cursor = conn.cursor()
+    try:
+        yield conn, cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+# --- One-shot helpers ---
+
+def fetch_one(sql, params=None):
+    with get_cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+def fetch_all(sql, params=None):
+    with get_cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+def execute(sql, params=None) -> int:
+    with get_cursor(commit=True) as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
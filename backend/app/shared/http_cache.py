@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+from flask import request, make_response, current_app
+
+from app.shared.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024  # below this, compression costs more than it saves
+
+
+def make_etag(*parts) -> str:
+    """Builds a strong ETag value from version components."""
+    raw = "|".join(str(p) for p in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+# ---------------- Compression ----------------
+
+def negotiate_encoding() -> str:
+    """Picks br, gzip or identity from the request's Accept-Encoding."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return "identity"
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _compress_stream(chunks: Iterable, encoding: str) -> Iterator[bytes]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        process, finish = compressor.compress, compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            out = process(chunk)
+            if out:
+                yield out
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def _apply_encoding(resp, encoding: str):
+    if encoding == "identity" or resp.status_code != 200 or "Content-Encoding" in resp.headers:
+        return resp
+    if resp.direct_passthrough:  # files
+        return resp
+
+    if resp.is_streamed:
+        resp.response = _compress_stream(resp.response, encoding)
+        resp.headers.pop("Content-Length", None)
+    else:
+        data = resp.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return resp
+        resp.set_data(_compress(data, encoding))
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
+# ---------------- Encoded response cache ----------------
+
+class CachedBody(NamedTuple):
+    body: bytes
+    mimetype: str
+    content_encoding: Optional[str]
+
+
+class ResponseCache:
+    """
+    Process-local LRU of final response bodies keyed by representation ETag.
+    ETags are derived from data versions, so an entry is valid for as long as
+    its key is still being computed; stale keys simply fall out of the LRU.
+    """
+    _entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+    _size = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, etag: str) -> Optional[CachedBody]:
+        with cls._lock:
+            entry = cls._entries.get(etag)
+            if entry is not None:
+                cls._entries.move_to_end(etag)
+            return entry
+
+    @classmethod
+    def set(cls, etag: str, entry: CachedBody):
+        size = len(entry.body)
+        if size > settings.RESPONSE_CACHE_MAX_BYTES // 8:
+            return  # one huge payload should not flush everything else
+        with cls._lock:
+            previous = cls._entries.pop(etag, None)
+            if previous is not None:
+                cls._size -= len(previous.body)
+            cls._entries[etag] = entry
+            cls._size += size
+            while cls._size > settings.RESPONSE_CACHE_MAX_BYTES and cls._entries:
+                _, evicted = cls._entries.popitem(last=False)
+                cls._size -= len(evicted.body)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._size = 0
+
+
+def _cached_response(entry: CachedBody):
+    resp = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    if entry.content_encoding:
+        resp.headers["Content-Encoding"] = entry.content_encoding
+    return resp
+
+
+# ---------------- Conditional GET ----------------
+
+def conditional(etag_fn: Callable[..., Optional[str]], compress: bool = False):
+    """
+    Adds strong ETag / If-None-Match handling to a GET view.
+
+    etag_fn receives the view's arguments and returns the ETag, derived from
+    versions rather than the body, so a match short-circuits to 304 before
+    the view queries or serializes anything. Returning None disables it
+    (e.g. when Redis, which holds the versions, is unavailable).
+
+    With compress=True the response is gzip/brotli encoded per Accept-Encoding,
+    and the encoded bytes are kept in ResponseCache under the ETag, so repeat
+    requests skip both serialization and compression. Streamed responses are
+    compressed on the fly but never cached.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                etag = etag_fn(*args, **kwargs)
+            except Exception:
+                # Conditional GET is an optimization; never fail the request over it.
+                etag = None
+
+            encoding = negotiate_encoding() if compress else "identity"
+            if etag and encoding != "identity":
+                # Each encoding is a distinct representation and needs its own strong ETag.
+                etag = f"{etag}-{encoding}"
+
+            if etag and request.if_none_match.contains_weak(etag):
+                resp = make_response("", 304)
+            elif etag and compress and (entry := ResponseCache.get(etag)) is not None:
+                resp = _cached_response(entry)
+            else:
+                resp = make_response(f(*args, **kwargs))
+                if compress:
+                    resp = _apply_encoding(resp, encoding)
+                    if etag and resp.status_code == 200 and not resp.is_streamed:
+                        ResponseCache.set(etag, CachedBody(
+                            resp.get_data(), resp.mimetype, resp.headers.get("Content-Encoding")
+                        ))
+
+            if etag and resp.status_code in (200, 304):
+                resp.set_etag(etag)
+                resp.headers["Cache-Control"] = "no-cache"
+            if compress:
+                resp.vary.add("Accept-Encoding")
+            return resp
+        return wrapper
+    return decorator
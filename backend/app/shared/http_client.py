@@ -0,0 +1,26 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def make_session(pool_size: int = 10, retries: int = 0, headers: dict = None) -> requests.Session:
+    """
+    A requests.Session with a keep-alive connection pool, for third-party APIs
+    called from request threads and workers. Sessions are thread-safe for this
+    use and should be created once per process (see the clients' _get_session()).
+
+    retries applies to connection errors and idempotent methods only; callers
+    still pass an explicit timeout on every request.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, backoff_factor=0.2, allowed_methods=frozenset({"GET", "HEAD"}),
+                          status_forcelist=(502, 503, 504)),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import time
+from functools import wraps
+from typing import Optional
+
+from flask import request, g, jsonify, current_app, make_response
+
+from app.shared.config import settings
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+
+log = get_logger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+LOCK_TTL_SEC = 30       # longest a request may hold the in-flight lock
+WAIT_TIMEOUT_SEC = 10   # how long a concurrent duplicate waits for the first one
+POLL_INTERVAL_SEC = 0.05
+
+
+def _get_redis():
+    try:
+        return RedisClient.get_client()
+    except Exception:
+        return None
+
+
+def _scope() -> str:
+    """Keys are per caller, so two users can never see each other's responses."""
+    admin = getattr(g, "admin", None)
+    if admin:
+        return f"admin:{admin.get('admin_id')}"
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        identity = get_jwt_identity()
+        if identity:
+            return f"user:{identity}"
+    except Exception:
+        pass
+    return f"anon:{request.remote_addr}"
+
+
+def _fingerprint() -> str:
+    """Same key with a different request is a client bug, not a retry."""
+    if request.mimetype in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        # Reading the raw body would stop Flask from parsing the form (admin uploads).
+        body = json.dumps({
+            "form": request.form.to_dict(flat=False),
+            "files": sorted(f"{name}:{file.filename}" for name, file in request.files.items(multi=True)),
+        }, sort_keys=True).encode()
+    else:
+        body = request.get_data(cache=True)
+    raw = b"|".join([request.method.encode(), request.full_path.encode(), body])
+    return hashlib.sha1(raw).hexdigest()
+
+
+def _replay(stored: dict):
+    resp = current_app.response_class(stored["body"], status=stored["status"], mimetype=stored["mimetype"])
+    resp.headers[REPLAY_HEADER] = "true"
+    return resp
+
+
+def _wait_for(redis, key) -> Optional[dict]:
+    deadline = time.monotonic() + WAIT_TIMEOUT_SEC
+    while time.monotonic() < deadline:
+        raw = redis.get(key)
+        if raw:
+            return json.loads(raw)
+        if not redis.exists(f"{key}:lock"):
+            # Owner finished without storing (5xx) or died; let the caller retry.
+            return None
+        time.sleep(POLL_INTERVAL_SEC)
+    return None
+
+
+def idempotent(f):
+    """
+    Honors the Idempotency-Key header on a mutating view.
+
+    The first request with a key runs the view under an in-flight lock and
+    its status/body is stored for IDEMPOTENCY_TTL_SEC. Retries get the stored
+    response back (with Idempotent-Replayed: true) without running the view;
+    concurrent duplicates wait for the first to finish, or get 409 if it
+    takes too long. 5xx responses are not stored, so they can be retried.
+    Requests without the header, or with Redis unavailable, run normally.
+    Place it below the auth decorator so the caller is known.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        idem_key = request.headers.get(HEADER)
+        redis = _get_redis() if idem_key else None
+        if not redis:
+            return f(*args, **kwargs)
+
+        key = "idem:" + hashlib.sha1(f"{_scope()}|{idem_key}".encode()).hexdigest()
+        fingerprint = _fingerprint()
+        try:
+            stored = redis.get(key)
+            locked = not stored and redis.set(f"{key}:lock", fingerprint, nx=True, ex=LOCK_TTL_SEC)
+        except Exception as e:
+            log.error("Idempotency store unavailable", extra={"error": str(e)})
+            return f(*args, **kwargs)
+
+        if not stored and not locked:
+            stored = _wait_for(redis, key)
+            if stored is None:
+                return jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409
+
+        if stored:
+            stored = json.loads(stored) if isinstance(stored, str) else stored
+            if stored["fingerprint"] != fingerprint:
+                return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+            return _replay(stored)
+
+        try:
+            resp = make_response(f(*args, **kwargs))
+            if resp.status_code < 500 and not resp.is_streamed:
+                try:
+                    redis.set(key, json.dumps({
+                        "status": resp.status_code,
+                        "mimetype": resp.mimetype,
+                        "body": resp.get_data(as_text=True),
+                        "fingerprint": fingerprint,
+                    }), ex=settings.IDEMPOTENCY_TTL_SEC)
+                except Exception as e:
+                    # The write already happened; losing replay protection beats failing it.
+                    log.error("Failed to store idempotent response", extra={"error": str(e)})
+            return resp
+        finally:
+            try:
+                redis.delete(f"{key}:lock")
+            except Exception:
+                pass
+    return wrapper
@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app.shared.exceptions import ValidationError
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+def parse_limit(raw, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Parses a page-size query arg, clamping it to [1, maximum]."""
+    try:
+        limit = int(raw) if raw not in (None, "") else default
+    except (ValueError, TypeError):
+        raise ValidationError("limit must be an integer")
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encodes a (created_at, id) keyset position as an opaque, URL-safe token.
+    Clients must treat it as a black box and pass it back unchanged.
+    """
+    payload = json.dumps({"c": created_at.isoformat(), "i": int(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Inverse of encode_cursor. Returns None for an empty token."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except Exception:
+        raise ValidationError("Invalid cursor")
+
+
+def keyset_page(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Splits a `LIMIT limit + 1` result into the page and the cursor for the next one.
+    Rows must carry `created_at` and `id` and be ordered by (created_at DESC, id DESC).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["id"])
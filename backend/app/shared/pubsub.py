@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.shared.redis_client import RedisClient
+from app.shared.logging_config import get_logger
+
+log = get_logger(__name__)
+
+Handler = Callable[[Optional[str]], None]
+
+
+class PubSub:
+    """
+    Cross-worker notifications over Redis pub/sub.
+
+    Each process runs one daemon listener thread (started lazily, and restarted
+    after a fork, so it works under Gunicorn with or without --preload).
+    Handlers receive the message payload, or None after a reconnect, meaning
+    "messages may have been missed - drop anything derived from shared state".
+    """
+    _handlers: Dict[str, List[Handler]] = {}
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+    _pid: Optional[int] = None
+
+    POLL_TIMEOUT = 1.0
+    RECONNECT_DELAY = 2.0
+
+    @classmethod
+    def subscribe(cls, channel: str, handler: Handler):
+        with cls._lock:
+            handlers = cls._handlers.setdefault(channel, [])
+            if handler not in handlers:
+                handlers.append(handler)
+        cls.ensure_listener()
+
+    @classmethod
+    def publish(cls, channel: str, message: str = "") -> bool:
+        try:
+            RedisClient.get_client().publish(channel, message)
+            return True
+        except Exception as e:
+            log.error("PubSub publish failed", extra={"channel": channel, "error": str(e)})
+            return False
+
+    @classmethod
+    def ensure_listener(cls):
+        """Cheap enough to call on every request path that relies on notifications."""
+        if cls._pid == os.getpid() and cls._thread and cls._thread.is_alive():
+            return
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._thread and cls._thread.is_alive():
+                return
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._listen, name="redis-pubsub-listener", daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _dispatch(cls, channel: str, message: Optional[str]):
+        for handler in list(cls._handlers.get(channel, [])):
+            try:
+                handler(message)
+            except Exception as e:
+                log.error("PubSub handler failed", extra={"channel": channel, "error": str(e)})
+
+    @classmethod
+    def _listen(cls):
+        while True:
+            pubsub = None
+            try:
+                pubsub = RedisClient.get_client().pubsub(ignore_subscribe_messages=True)
+                subscribed = set()
+                first_pass = True
+                while True:
+                    channels = set(cls._handlers) - subscribed
+                    if channels:
+                        pubsub.subscribe(*channels)
+                        subscribed |= channels
+                        if first_pass:
+                            # (Re)connected: anything published while we were away is lost.
+                            for channel in subscribed:
+                                cls._dispatch(channel, None)
+                            first_pass = False
+
+                    msg = pubsub.get_message(timeout=cls.POLL_TIMEOUT)
+                    if msg and msg.get("type") == "message":
+                        cls._dispatch(msg["channel"], msg.get("data"))
+            except Exception as e:
+                log.error("PubSub listener disconnected", extra={"error": str(e)})
+                time.sleep(cls.RECONNECT_DELAY)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
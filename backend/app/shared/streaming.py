@@ -0,0 +1,73 @@
+from itertools import chain
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import pymysql
+from flask import current_app, stream_with_context
+
+from app.shared.database import get_db_connection
+from app.shared.logging_config import get_logger
+
+log = get_logger(__name__)
+
+STREAM_CHUNK_ROWS = 500
+
+
+def stream_rows(query: str, params=None, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[List[dict]]:
+    """
+    Runs query on an unbuffered (server-side) cursor and yields rows in chunks,
+    so only one chunk is held in memory at a time.
+
+    The connection is busy until the generator is exhausted or closed; any
+    follow-up queries per chunk must use a second connection.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+
+def _encode_array(chunks: Iterable[List[dict]], transform: Optional[Callable[[dict], dict]]) -> Iterator[str]:
+    dumps = current_app.json.dumps
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    # Everything up to here (query execution, first fetch) runs before the response starts,
+    # so errors still surface as a normal 500 from the view.
+    yield "["
+    if first is None:
+        yield "]"
+        return
+
+    separator = ""
+    try:
+        for rows in chain([first], chunks):
+            if transform:
+                rows = [transform(row) for row in rows]
+            if rows:
+                yield separator + ",".join(dumps(row) for row in rows)
+                separator = ","
+    except Exception as e:
+        # Headers are already sent; the body will be truncated, which clients see as invalid JSON.
+        log.error("JSON stream aborted", extra={"error": str(e)})
+        raise
+    yield "]"
+
+
+def json_array_response(chunks: Iterable[List[dict]], transform: Optional[Callable[[dict], dict]] = None):
+    """
+    Streams chunks of rows as a single JSON array, byte-compatible in shape with
+    jsonify(list). The first chunk is pulled eagerly so database errors are raised
+    to the calling view instead of producing a broken 200.
+    """
+    body = _encode_array(chunks, transform)
+    head = next(body)
+    return current_app.response_class(
+        stream_with_context(chain([head], body)),
+        mimetype="application/json",
+    )
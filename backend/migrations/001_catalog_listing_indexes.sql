@@ -0,0 +1,6 @@
+-- Keyset pagination for the storefront listings.
+-- GET /api/products            -> WHERE status = 1        ORDER BY created_at DESC, id DESC
+-- GET /api/products/category/N -> WHERE category_id = N   ORDER BY created_at DESC, id DESC
+
+CREATE INDEX idx_products_status_created ON products (status, created_at, id);
+CREATE INDEX idx_products_category_created ON products (category_id, created_at, id);
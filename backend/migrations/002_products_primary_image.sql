@@ -0,0 +1,9 @@
+-- Denormalized first image of each product, so listings and search don't need a
+-- dependent (SELECT image_path FROM product_images ... LIMIT 1) per row.
+-- Maintained by the admin image insert/delete paths (ProductRepository.refresh_primary_image).
+-- Populate existing rows with: python -m app.cli backfill-primary-images
+
+ALTER TABLE products ADD COLUMN primary_image_path VARCHAR(255) NULL;
+
+-- Supports the "first image by id" lookup used to maintain the column.
+CREATE INDEX idx_product_images_product ON product_images (product_id, id);
@@ -0,0 +1,13 @@
+-- MySQL mirror of the live cart holds kept in Redis (StockReservations).
+-- Rewritten every minute by app.jobs.inventory.reconcile_stock_holds; Redis stays authoritative.
+
+CREATE TABLE IF NOT EXISTS stock_reservations (
+    user_id INT NOT NULL,
+    product_id INT NOT NULL,
+    variant_id INT NULL,
+    size VARCHAR(50) NULL,
+    quantity INT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    KEY idx_stock_reservations_sku (product_id, variant_id),
+    KEY idx_stock_reservations_user (user_id)
+);
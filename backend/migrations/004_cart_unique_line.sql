@@ -0,0 +1,18 @@
+-- One row per cart line, so writes can use INSERT ... ON DUPLICATE KEY UPDATE
+-- instead of SELECT-then-INSERT. variant_id and size are nullable and NULLs never
+-- collide in a unique index, so the key is built on NULL-normalized generated columns.
+
+-- 1. Drop duplicate lines, keeping the most recent row of each.
+DELETE older FROM cart older
+JOIN cart newer
+  ON newer.user_id = older.user_id
+ AND newer.product_id = older.product_id
+ AND newer.variant_id <=> older.variant_id
+ AND newer.size <=> older.size
+ AND newer.id > older.id;
+
+-- 2. NULL-safe line key.
+ALTER TABLE cart
+    ADD COLUMN variant_key INT AS (COALESCE(variant_id, 0)) STORED,
+    ADD COLUMN size_key VARCHAR(100) AS (COALESCE(size, '')) STORED,
+    ADD UNIQUE KEY uq_cart_line (user_id, product_id, variant_key, size_key);
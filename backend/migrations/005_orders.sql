@@ -0,0 +1,39 @@
+-- Orders placed from the cart (app.modules.orders).
+-- Prices, names and the shipping address are snapshotted so later catalog or
+-- address edits do not rewrite order history.
+-- status: pending_payment -> paid | payment_failed, confirmed (COD), cancelled.
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    status VARCHAR(32) NOT NULL,
+    payment_method VARCHAR(16) NOT NULL,
+    currency CHAR(3) NOT NULL DEFAULT 'INR',
+    subtotal DECIMAL(10, 2) NOT NULL,
+    savings DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    total DECIMAL(10, 2) NOT NULL,
+    shipping_address JSON NOT NULL,
+    gateway_order_id VARCHAR(64) NULL,
+    gateway_payment_id VARCHAR(64) NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_orders_user (user_id, created_at),
+    UNIQUE KEY uq_orders_gateway_order (gateway_order_id)
+);
+
+CREATE TABLE IF NOT EXISTS order_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    order_id INT NOT NULL,
+    product_id INT NOT NULL,
+    variant_id INT NULL,
+    size VARCHAR(50) NULL,
+    name VARCHAR(255) NOT NULL,
+    image VARCHAR(500) NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    discount_percent DECIMAL(5, 2) NOT NULL DEFAULT 0,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    quantity INT NOT NULL,
+    line_total DECIMAL(10, 2) NOT NULL,
+    KEY idx_order_items_order (order_id),
+    CONSTRAINT fk_order_items_order FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE
+);
@@ -0,0 +1,12 @@
+-- Razorpay webhook events already applied to orders (app.jobs.payments).
+-- Razorpay delivers at least once and the Redis stream may redeliver after a
+-- worker crash, so every event id is recorded in the same transaction as its
+-- order update and skipped if seen again.
+
+CREATE TABLE IF NOT EXISTS payment_events (
+    event_id VARCHAR(64) PRIMARY KEY,
+    event VARCHAR(64) NOT NULL,
+    gateway_order_id VARCHAR(64) NULL,
+    processed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_payment_events_order (gateway_order_id)
+);
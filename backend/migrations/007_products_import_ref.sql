@@ -0,0 +1,7 @@
+-- Row reference for bulk-imported products (app.modules.catalog.importer).
+-- Lets the importer map executemany-inserted rows back to their ids, and makes
+-- re-running an import skip rows that already went in. NULL for products
+-- created through the admin form.
+
+ALTER TABLE products ADD COLUMN import_ref VARCHAR(64) NULL;
+CREATE UNIQUE INDEX uq_products_import_ref ON products (import_ref);
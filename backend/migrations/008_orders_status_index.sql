@@ -0,0 +1,4 @@
+-- Lets the unpaid-order expiry job (app.jobs.orders.expire_unpaid_orders) find
+-- razorpay orders stuck in pending_payment / payment_failed without a scan.
+
+CREATE INDEX idx_orders_status_created ON orders (status, created_at);
@@ -0,0 +1,34 @@
+import contextlib
+
+from app.modules.cart import pricing
+from app.modules.cart.pricing import CartPricing
+
+
+def _price(monkeypatch, lines, prices):
+    monkeypatch.setattr(pricing, "get_cursor", lambda: contextlib.nullcontext(None))
+    monkeypatch.setattr(pricing.CartRepository, "get_prices", staticmethod(lambda cursor, pids, vids: prices))
+    return CartPricing.price(lines)
+
+
+def _line(**extra):
+    return {"product_id": 1, "variant_id": None, "quantity": 2, "price": 100.0, "discount_percent": 10.0, **extra}
+
+
+def test_reprices_against_the_catalog(monkeypatch):
+    lines = [_line()]
+    totals = _price(monkeypatch, lines, {(1, None): {"price": 120, "discount": 10}})
+    assert totals["subtotal"] == 216.0 and totals["price_changes"] == 1
+    assert lines[0]["previous_price"] == 100.0 and lines[0]["final_price"] == 108.0
+
+
+def test_written_back_price_still_compares_with_the_add_time_price(monkeypatch):
+    lines = [_line(price=120.0, added_price=100.0, added_discount_percent=10.0)]
+    _price(monkeypatch, lines, {(1, None): {"price": 120, "discount": 10}})
+    assert lines[0]["price_changed"] and lines[0]["previous_price"] == 100.0
+    assert "added_price" not in lines[0]
+
+
+def test_unavailable_lines_are_left_out(monkeypatch):
+    lines = [_line(), _line(product_id=2)]
+    totals = _price(monkeypatch, lines, {(1, None): {"price": 100, "discount": 10}})
+    assert lines[1]["unavailable"] and totals["items"] == 1 and totals["subtotal"] == 180.0
@@ -0,0 +1,72 @@
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from app.modules.inventory.cache import sku_id
+from app.routes import cart_routes
+from app.routes.cart_routes import cart_bp
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY="test-jwt-secret-with-enough-bytes", JWT_TOKEN_LOCATION=["headers"])
+    JWTManager(app)
+    app.register_blueprint(cart_bp)
+    with app.app_context():
+        token = create_access_token(identity="7")
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+@pytest.fixture
+def no_holds(monkeypatch):
+    """Fails the test if a route reaches the stock reservations."""
+    def fail(*args, **kwargs):
+        raise AssertionError("stock hold taken")
+    for name in ("reserve", "extend", "reserve_many"):
+        monkeypatch.setattr(cart_routes.StockReservations, name, fail)
+
+
+@pytest.mark.parametrize("quantity", [-10, 0, "two", None])
+def test_add_to_cart_rejects_quantity_below_one(client, no_holds, quantity):
+    resp = client.post("/api/add-to-cart", json={"product_id": 1, "quantity": quantity})
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("quantity", [-10, 0, "two", None])
+def test_update_cart_rejects_quantity_below_one(client, no_holds, quantity):
+    resp = client.post("/api/update-cart", json={"product_id": 1, "quantity": quantity})
+    assert resp.status_code == 400
+
+
+@pytest.fixture
+def holds(monkeypatch):
+    """Real reservation scripts on fakeredis, stock 5 per SKU, and a cart holding product 1."""
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    reservations = cart_routes.StockReservations
+    monkeypatch.setattr(cart_routes.StockReservations, "_scripts", None)
+    monkeypatch.setattr("app.modules.inventory.reservations.RedisClient.get_client", classmethod(lambda cls: redis))
+    monkeypatch.setattr("app.modules.inventory.reservations.StockCache.get", staticmethod(lambda *sku: 5))
+    monkeypatch.setattr("app.modules.inventory.reservations.StockCache.get_many",
+                        staticmethod(lambda skus: {sku: 5 for sku in skus}))
+    monkeypatch.setattr(cart_routes.CartStore, "get_lines", staticmethod(
+        lambda user_id: [{"cart_id": sku_id((1, None, None)), "product_id": 1, "variant_id": None, "size": None, "quantity": 1}]))
+    applied = []
+    monkeypatch.setattr(cart_routes.CartStore, "apply", staticmethod(lambda *args: applied.append(args)))
+    reservations.reserve("9", (2, None, None), 1)  # seeds product 2 at 4 available
+    return lambda sku: int(redis.get(reservations.AVAIL_KEY.format(sku=sku_id(sku)))), applied
+
+
+def test_batch_update_of_a_line_not_in_the_cart_takes_no_stock(client, holds):
+    available, applied = holds
+
+    resp = client.post("/api/cart/batch", json={"operations": [
+        {"op": "update", "product_id": 1, "quantity": 2},
+        {"op": "update", "product_id": 2, "quantity": 3},
+    ]})
+
+    assert resp.status_code == 404 and resp.get_json()["details"] == {"items": [sku_id((2, None, None))]}
+    assert available((2, None, None)) == 4 and not applied
@@ -0,0 +1,34 @@
+from app.modules.catalog.events import CatalogEvents
+from app.modules.search.services import SearchService
+
+
+def test_parse_messages():
+    assert CatalogEvents.parse("12:40") == (12, "40")
+    assert CatalogEvents.parse("12") == (12, None)
+    assert CatalogEvents.parse("rebuild:40") == (None, "40")
+    assert CatalogEvents.parse(None) == (None, None)
+
+
+def test_applied_version_moves_only_after_the_refresh(monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(SearchService, "_applied_version", "7")
+    monkeypatch.setattr(SearchService, "refresh_product", classmethod(lambda cls, pid: refreshed.append(pid)))
+
+    SearchService._on_product_changed("3:9")
+    assert refreshed == [3]
+    assert SearchService.applied_version() == "9"
+
+    # Out-of-order or unversioned messages never move it backwards.
+    SearchService._on_product_changed("4:8")
+    SearchService._on_product_changed("5")
+    assert SearchService.applied_version() == "9"
+
+
+def test_failed_refresh_keeps_the_old_version(monkeypatch):
+    def fail(cls, pid):
+        raise RuntimeError("mysql down")
+
+    monkeypatch.setattr(SearchService, "_applied_version", "7")
+    monkeypatch.setattr(SearchService, "refresh_product", classmethod(fail))
+    SearchService._on_product_changed("3:9")
+    assert SearchService.applied_version() == "7"
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from app.modules.catalog.facets import FacetIndex
+from app.shared.pagination import decode_cursor
+
+BASE = datetime(2026, 1, 1)
+
+
+def _product(pid, brand, minutes):
+    return {"id": pid, "name": f"P{pid}", "brand": brand, "price": 300, "mrp": 400, "discount": 25,
+            "created_at": BASE + timedelta(minutes=minutes), "category_id": 1, "color_name": None,
+            "size_stock": None, "image_path": None}
+
+
+def _index():
+    index = FacetIndex()
+    for pid, brand, minutes in [(1, "Lakme", 1), (2, "Nykaa", 5), (3, "Lakme", 3), (4, "Lakme", 3)]:
+        index.upsert(_product(pid, brand, minutes), [])
+    return index
+
+
+def test_items_are_newest_first_and_paged_by_cursor():
+    index = _index()
+    first = index.query({}, limit=2)
+    assert [d["id"] for d in first["items"]] == [2, 4]
+    second = index.query({}, limit=2, after=decode_cursor(first["next_cursor"]))
+    assert [d["id"] for d in second["items"]] == [3, 1]
+    assert second["next_cursor"] is None
+
+
+def test_filters_keep_the_order():
+    result = _index().query({"brand": ["lakme"]}, limit=10)
+    assert [d["id"] for d in result["items"]] == [4, 3, 1]
+    assert {c["value"]: c["count"] for c in result["facets"]["brand"]} == {"lakme": 3, "nykaa": 1}
+
+
+def test_upsert_moves_and_remove_drops_from_the_order():
+    index = _index()
+    index.upsert(_product(1, "Lakme", 10), [])
+    index.remove(2)
+    assert [d["id"] for d in index.query({}, limit=10)["items"]] == [1, 4, 3]
+    assert len(index._order) == 3
@@ -0,0 +1,139 @@
+import contextlib
+import time
+
+import pytest
+
+from app.jobs import orders as order_jobs
+from app.modules.cart import pricing
+from app.modules.orders import services
+from app.modules.orders.gateway import RazorpayGateway
+from app.modules.orders.services import OrderService, _return_stock
+from app.shared.config import settings
+from app.shared.exceptions import AppError, ValidationError
+
+ORDER_ID = 42
+
+
+@pytest.fixture
+def checkout(monkeypatch, stub_server):
+    """
+    place_order with MySQL and Redis collaborators faked and Razorpay served by
+    the local stub. Returns a dict recording what the service did.
+    """
+    state = {
+        "lines": [{"cart_id": "1::", "product_id": 1, "variant_id": None, "size": None, "name": "Lipstick",
+                   "image": "", "quantity": 2, "price": 250.0, "discount_percent": 0.0}],
+        "levels": {("product", 1): {"stock": 5, "sizes": {}}},
+        "commits": 0, "rollbacks": 0, "saved_stock": None, "created": [], "cleared": [], "restored": [],
+        "gateway_orders": [], "deferred": [],
+    }
+
+    @contextlib.contextmanager
+    def fake_transaction():
+        try:
+            yield None, None
+        except Exception:
+            state["rollbacks"] += 1
+            raise
+        state["commits"] += 1
+
+    repo = services.OrderRepository
+    monkeypatch.setattr(services, "transaction", fake_transaction)
+    monkeypatch.setattr(services, "get_cursor", lambda commit=False: contextlib.nullcontext(None))
+    monkeypatch.setattr(repo, "lock_user", staticmethod(lambda cursor, user_id: None))
+    monkeypatch.setattr(repo, "get_address", staticmethod(lambda cursor, user_id, address_id: {"id": address_id}))
+    monkeypatch.setattr(repo, "lock_stock", staticmethod(lambda cursor, pids, vids: state["levels"]))
+    monkeypatch.setattr(repo, "save_stock", staticmethod(lambda cursor, levels: state.update(saved_stock=levels)))
+    monkeypatch.setattr(repo, "create", staticmethod(lambda cursor, *args: state["created"].append(args) or ORDER_ID))
+    monkeypatch.setattr(repo, "add_items", staticmethod(lambda cursor, order_id, items: None))
+    monkeypatch.setattr(repo, "set_gateway_order", staticmethod(
+        lambda cursor, order_id, gateway_order_id: state["gateway_orders"].append((order_id, gateway_order_id))))
+
+    monkeypatch.setattr(services.CartStore, "get_lines", staticmethod(lambda user_id: [dict(l) for l in state["lines"]]))
+    monkeypatch.setattr(services.CartStore, "clear", staticmethod(lambda user_id: state["cleared"].append(user_id)))
+    monkeypatch.setattr(services.CartStore, "apply", staticmethod(
+        lambda user_id, upserts, removals, increments: state["restored"].append(upserts)))
+    monkeypatch.setattr(pricing, "get_cursor", lambda: contextlib.nullcontext(None))
+    monkeypatch.setattr(pricing.CartRepository, "get_prices", staticmethod(
+        lambda cursor, pids, vids: {(1, None): {"price": 250, "discount": 0}}))
+    monkeypatch.setattr(services.StockReservations, "consume", staticmethod(lambda user_id, sku: None))
+    monkeypatch.setattr(services.CatalogEvents, "product_changed", staticmethod(lambda product_id: None))
+    monkeypatch.setattr(services.StockCache, "refresh", staticmethod(lambda product_id: None))
+    monkeypatch.setattr(order_jobs.create_gateway_order, "delay", lambda order_id: state["deferred"].append(order_id))
+
+    monkeypatch.setattr(settings, "RAZORPAY_KEY_ID", "rzp_test_key")
+    monkeypatch.setattr(settings, "RAZORPAY_KEY_SECRET", "rzp_test_secret")
+    monkeypatch.setattr(settings, "RAZORPAY_API_URL", stub_server.url)
+    monkeypatch.setattr(settings, "RAZORPAY_TIMEOUT_SEC", 0.3)
+    monkeypatch.setattr(RazorpayGateway, "_session", None)
+    state["stub"] = stub_server
+    return state
+
+
+def test_places_order_and_creates_gateway_order(checkout):
+    checkout["stub"].route("POST", "/orders", lambda req: (200, {"id": "order_Abc123", "amount": req["json"]["amount"]}))
+
+    order, complete = OrderService.place_order(7, {"address_id": 3})
+
+    assert complete and order["order_id"] == ORDER_ID and order["status"] == "pending_payment"
+    assert order["razorpay_order_id"] == "order_Abc123" and order["amount_paise"] == 50000
+    request = checkout["stub"].calls("/orders")[0]
+    assert request["json"]["amount"] == 50000 and request["json"]["receipt"] == f"order_{ORDER_ID}"
+    assert request["headers"]["Authorization"].startswith("Basic ")
+    assert checkout["commits"] == 1 and checkout["cleared"] == [7]
+    assert checkout["saved_stock"][("product", 1)]["stock"] == 3
+    assert checkout["gateway_orders"] == [(ORDER_ID, "order_Abc123")] and not checkout["deferred"]
+
+
+def test_slow_gateway_defers_order_creation_to_the_worker(checkout):
+    def slow(req):
+        time.sleep(1.0)
+        return 200, {"id": "order_late"}
+    checkout["stub"].route("POST", "/orders", slow)
+
+    order, complete = OrderService.place_order(7, {"address_id": 3})
+
+    assert not complete and "razorpay_order_id" not in order
+    assert checkout["commits"] == 1 and checkout["deferred"] == [ORDER_ID]
+    assert not checkout["gateway_orders"]
+
+
+def test_gateway_error_defers_order_creation(checkout):
+    checkout["stub"].route("POST", "/orders", lambda req: (500, {"error": {"code": "SERVER_ERROR"}}))
+
+    order, complete = OrderService.place_order(7, {"address_id": 3})
+
+    assert not complete and checkout["deferred"] == [ORDER_ID]
+
+
+def test_insufficient_stock_rolls_back_and_keeps_the_cart(checkout):
+    checkout["levels"][("product", 1)]["stock"] = 1
+
+    with pytest.raises(ValidationError) as exc:
+        OrderService.place_order(7, {"address_id": 3})
+
+    assert exc.value.details == {"items": ["1::"]}
+    assert checkout["rollbacks"] == 1 and checkout["commits"] == 0
+    assert checkout["saved_stock"] is None and not checkout["created"]
+    assert not checkout["cleared"] and not checkout["restored"]
+    assert not checkout["stub"].requests
+
+
+def test_missing_gateway_is_refused_before_the_transaction(checkout, monkeypatch):
+    monkeypatch.setattr(settings, "RAZORPAY_KEY_ID", None)
+    monkeypatch.setattr(settings, "RAZORPAY_USE_STUB", False)
+
+    with pytest.raises(AppError) as exc:
+        OrderService.place_order(7, {"address_id": 3})
+
+    assert exc.value.status_code == 503
+    assert checkout["commits"] == checkout["rollbacks"] == 0
+
+
+def test_return_stock_restores_sizes_and_skips_missing_owners():
+    levels = {("variant", 5): {"stock": 1, "sizes": {"M": 0}}}
+    _return_stock(levels, [
+        {"product_id": 1, "variant_id": 5, "size": "M", "quantity": 2},
+        {"product_id": 9, "variant_id": None, "size": None, "quantity": 1},
+    ])
+    assert levels == {("variant", 5): {"stock": 3, "sizes": {"M": 2}}}
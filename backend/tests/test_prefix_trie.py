@@ -0,0 +1,47 @@
+from app.modules.search.trie import PrefixTrie
+
+
+def _trie():
+    trie = PrefixTrie()
+    trie.upsert(("product", 1), "Red Matte Lipstick", 5, {"id": 1})
+    trie.upsert(("product", 2), "Matte Lip Liner", 3, {"id": 2})
+    trie.upsert(("product", 3), "Gold Jhumka Earrings", 9, {"id": 3})
+    return trie
+
+
+def test_any_word_prefix_matches_by_weight():
+    assert [p["id"] for p in _trie().suggest("lip")] == [1, 2]
+    assert [p["id"] for p in _trie().suggest("ear")] == [3]
+
+
+def test_every_query_word_must_match():
+    trie = _trie()
+    assert [p["id"] for p in trie.suggest("matte lip")] == [1, 2]
+    assert [p["id"] for p in trie.suggest("red lip")] == [1]
+    assert trie.suggest("gold lip") == []
+
+
+def test_repeated_words_are_indexed_once():
+    trie = PrefixTrie()
+    trie.upsert("k", "kajal kajal kajal", 1, {"id": "k"})
+    assert trie._words["k"] == ["kajal"]
+
+
+def test_upsert_replaces_and_remove_prunes():
+    trie = _trie()
+    trie.upsert(("product", 1), "Nude Gloss", 5, {"id": 1})
+    assert [p["id"] for p in trie.suggest("lip")] == [2]
+    assert [p["id"] for p in trie.suggest("glo")] == [1]
+
+    trie.remove(("product", 2))
+    trie.remove(("product", 1))
+    assert trie.suggest("lip") == []
+    assert "l" not in trie._root.children and "n" not in trie._root.children
+
+
+def test_multi_word_query_ranks_past_the_cached_top_list():
+    trie = PrefixTrie()
+    for i in range(PrefixTrie.TOP_K + 5):
+        trie.upsert(i, f"kohl pencil {i}", 100 - i, {"id": i})
+    trie.upsert("rare", "kohl stick", 1, {"id": "rare"})
+    assert [p["id"] for p in trie.suggest("kohl st")] == ["rare"]
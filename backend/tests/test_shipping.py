@@ -0,0 +1,142 @@
+import contextlib
+
+import pytest
+
+from app.jobs import shipping as shipping_jobs
+from app.modules.shipping.cache import ShippingQuoteCache
+from app.modules.shipping.client import CourierError, DelhiveryClient
+from app.modules.shipping.services import ShippingService
+from app.shared.config import settings
+
+ORIGIN = "110001"
+
+
+class FakeRedis:
+    """The handful of Redis calls the quote cache and the prefetch lock make."""
+
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+def _pin_codes(serviceable):
+    def handler(req):
+        pins = req["query"]["filter_codes"].split(",")
+        return 200, {"delivery_codes": [
+            {"postal_code": {"pin": int(pin), "pre_paid": "Y", "cod": serviceable[pin]}}
+            for pin in pins if pin in serviceable
+        ]}
+    return handler
+
+
+def _charges(req):
+    return 200, [{"total_amount": 40 + int(req["query"]["cgm"]) / 100}]
+
+
+@pytest.fixture
+def delhivery(monkeypatch, stub_server):
+    redis = FakeRedis()
+    monkeypatch.setattr(settings, "DELHIVERY_API_KEY", "test-token")
+    monkeypatch.setattr(settings, "DELHIVERY_API_URL", stub_server.url)
+    monkeypatch.setattr(settings, "DELHIVERY_ORIGIN_PINCODE", ORIGIN)
+    monkeypatch.setattr(DelhiveryClient, "_session", None)
+    monkeypatch.setattr(ShippingQuoteCache, "_get_redis", staticmethod(lambda: redis))
+    stub_server.route("GET", DelhiveryClient.PINCODES_PATH, _pin_codes({"560001": "Y", "400001": "N"}))
+    stub_server.route("GET", DelhiveryClient.CHARGES_PATH, _charges)
+    stub_server.redis = redis
+    return stub_server
+
+
+def test_serviceability_maps_codes_and_unknown_pincodes(delhivery):
+    result = DelhiveryClient.serviceability(["560001", "400001", "999999"])
+
+    assert result == {
+        "560001": {"serviceable": True, "prepaid": True, "cod": True},
+        "400001": {"serviceable": True, "prepaid": True, "cod": False},
+        "999999": {"serviceable": False, "prepaid": False, "cod": False},
+    }
+    request = delhivery.calls(DelhiveryClient.PINCODES_PATH)[0]
+    assert request["query"]["filter_codes"] == "560001,400001,999999"
+    assert request["headers"]["Authorization"] == "Token test-token"
+
+
+def test_rate_reads_total_amount(delhivery):
+    assert DelhiveryClient.rate(ORIGIN, "560001", 1000) == 50.0
+    query = delhivery.calls(DelhiveryClient.CHARGES_PATH)[0]["query"]
+    assert query["o_pin"] == ORIGIN and query["d_pin"] == "560001" and query["cgm"] == "1000"
+
+
+def test_rate_without_total_amount_is_a_courier_error(delhivery):
+    delhivery.route("GET", DelhiveryClient.CHARGES_PATH, lambda req: (200, [{}]))
+    with pytest.raises(CourierError):
+        DelhiveryClient.rate(ORIGIN, "560001", 500)
+
+
+def test_quote_miss_fetches_and_caches_then_hits(delhivery):
+    quote = ShippingService.get_quote("560001", 700)
+
+    assert quote["serviceable"] and quote["weight_bucket"] == 1000 and quote["rate"] == 50.0
+    assert ShippingQuoteCache.key(ORIGIN, "560001", 1000) in delhivery.redis.data
+    calls = len(delhivery.requests)
+
+    assert ShippingService.get_quote("560001", 900) == quote
+    assert len(delhivery.requests) == calls
+
+
+def test_quote_weight_is_clamped(delhivery):
+    quote = ShippingService.get_quote("560001", 10 ** 9)
+
+    assert quote["weight_bucket"] == 10000
+    assert delhivery.calls(DelhiveryClient.CHARGES_PATH)[0]["query"]["cgm"] == "10000"
+
+
+def test_prefetch_skips_a_failing_chunk(delhivery, monkeypatch):
+    monkeypatch.setattr(DelhiveryClient, "MAX_PINCODES", 1)
+    serviceable = _pin_codes({"560001": "Y", "400001": "N"})
+    delhivery.route("GET", DelhiveryClient.PINCODES_PATH, lambda req: (
+        (400, {"error": "bad pincode"}) if req["query"]["filter_codes"] == "560001" else serviceable(req)
+    ))
+
+    stored = ShippingService.prefetch(["560001", "400001", "not-a-pin"], [500, 1000])
+
+    assert stored == 2
+    assert set(delhivery.redis.data) == {
+        ShippingQuoteCache.key(ORIGIN, "400001", 500), ShippingQuoteCache.key(ORIGIN, "400001", 1000),
+    }
+
+
+def test_prefetch_stops_at_its_budget(delhivery):
+    assert ShippingService.prefetch(["560001"], [500], budget_sec=0) == 0
+    assert not delhivery.requests
+
+
+def test_scheduled_prefetch_dispatches_once_per_window(delhivery, monkeypatch):
+    queued = []
+    monkeypatch.setattr(shipping_jobs.RedisClient, "get_client", staticmethod(lambda: delhivery.redis))
+    monkeypatch.setattr(shipping_jobs.ShippingRepository, "get_address_pincodes",
+                        staticmethod(lambda cursor: [str(560000 + i) for i in range(250)]))
+    monkeypatch.setattr(shipping_jobs, "get_cursor", lambda: contextlib.nullcontext(None))
+    monkeypatch.setattr(shipping_jobs.prefetch_shipping_chunk, "apply_async",
+                        lambda args, expires=None: queued.append(args[0]))
+
+    assert shipping_jobs.prefetch_shipping_quotes.run() == 3
+    assert [len(chunk) for chunk in queued] == [100, 100, 50]
+    assert shipping_jobs.prefetch_shipping_quotes.run() == 0
+    assert len(queued) == 3
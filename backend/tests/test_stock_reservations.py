@@ -0,0 +1,38 @@
+import pytest
+
+from app.modules.inventory import reservations
+from app.modules.inventory.reservations import StockReservations
+
+fakeredis = pytest.importorskip("fakeredis")  # runs the Lua scripts, needs lupa
+
+SKU = (1, None, None)
+OTHER = (2, None, None)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(reservations.RedisClient, "get_client", classmethod(lambda cls: client))
+    monkeypatch.setattr(StockReservations, "_scripts", None)
+    monkeypatch.setattr(reservations.StockCache, "get", staticmethod(lambda *sku: 5))
+    monkeypatch.setattr(reservations.StockCache, "get_many", staticmethod(lambda skus: {sku: 5 for sku in skus}))
+    return client
+
+
+def _available(client, sku):
+    return int(client.get(StockReservations.AVAIL_KEY.format(sku=reservations.sku_id(sku))))
+
+
+def test_negative_hold_cannot_inflate_availability(redis):
+    assert StockReservations.reserve("u1", SKU, 2) == 3
+
+    assert StockReservations.reserve("u1", SKU, -10) is None
+    assert _available(redis, SKU) == 3
+    assert StockReservations.reserve("u2", SKU, 15) is None
+
+
+def test_batch_with_a_negative_hold_is_rejected_whole(redis):
+    assert StockReservations.reserve_many("u1", [(SKU, 2), (OTHER, 1)]) == []
+
+    assert StockReservations.reserve_many("u1", [(SKU, 3), (OTHER, -10)]) == [OTHER]
+    assert _available(redis, SKU) == 3 and _available(redis, OTHER) == 4